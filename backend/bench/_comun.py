@@ -0,0 +1,112 @@
+"""
+Utilidades de los benchmarks (backend/bench/).
+
+preparar() va antes de importar db.database / main: los engines se
+crean al importar. La base es un SQLite temporal con datos sintéticos.
+"""
+
+from __future__ import annotations
+
+import atexit
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+PALABRAS = (
+    "apartamento amplio iluminado balcón parqueadero piscina gimnasio vista "
+    "cocina integral estudio terraza vigilancia cerca metro parque comercio "
+    "remodelado tranquilo familiar duplex chimenea jardín ascensor"
+).split()
+
+
+def preparar(**env: str) -> Path:
+    """
+    BD temporal + entorno del benchmark. Devuelve el archivo .db.
+    """
+    tmp = Path(tempfile.mkdtemp(prefix="metropolitana-bench-"))
+    atexit.register(shutil.rmtree, tmp, True)
+    db = tmp / "bench.db"
+    os.environ["DATABASE_URL"] = f"sqlite:///{db}"
+    os.environ.setdefault("PRECOMPRIMIR_ESTATICOS", "0")
+    os.environ.setdefault("PREGENERAR_BARRIOS", "0")
+    os.environ.setdefault("BARRIOS_ESTATICOS_DIR", str(tmp / "arriendos"))
+    os.environ.update(env)
+    sys.path.insert(0, str(BACKEND_DIR))
+    os.chdir(BACKEND_DIR)
+    return db
+
+
+def sembrar(filas: int, semilla: int = 7) -> None:
+    """
+    init_db() (esquema, FTS, zonas de ejemplo) + filas inmuebles
+    sintéticos en bloque (SQL directo: los triggers llenan el FTS e
+    inmueble_imagen).
+    """
+    from sqlalchemy import text
+
+    from db.database import engine, init_db
+    from services.slugs import ruta_inmueble, slug_inmueble
+
+    init_db()
+    rnd = random.Random(semilla)
+    with engine.begin() as conn:
+        zonas = conn.execute(text("SELECT id, nombre FROM zona")).all()
+        siguiente = conn.execute(text("SELECT COALESCE(MAX(id), 0) + 1 FROM inmueble")).scalar_one()
+        for inicio in range(0, filas, 5_000):
+            lote = []
+            for iid in range(siguiente + inicio, siguiente + min(inicio + 5_000, filas)):
+                zid, zona = rnd.choice(zonas)
+                tipo = rnd.choice(("apartamento", "apartamento", "casa"))
+                slug = slug_inmueble(tipo, zona)
+                lote.append({
+                    "id": iid,
+                    "titulo": f"{tipo.capitalize()} {' '.join(rnd.sample(PALABRAS, 3))} en {zona}",
+                    "tipo": tipo,
+                    "precio_cop": rnd.randrange(900_000, 9_000_000, 50_000),
+                    "area_m2": rnd.randint(30, 250),
+                    "habitaciones": rnd.randint(1, 5),
+                    "banos": rnd.randint(1, 4),
+                    "descripcion": " ".join(rnd.choices(PALABRAS, k=40)) + ".",
+                    "imagenes": f"https://example.com/{iid}.jpg",
+                    "zona_id": zid,
+                    "direccion_referencia": "Referencia general",
+                    "contacto_whatsapp": "Hola",
+                    "publicado": rnd.random() < 0.9,
+                    "slug": slug,
+                    "url_publica": ruta_inmueble(iid, slug),
+                })
+            conn.execute(text("""
+                INSERT INTO inmueble (id, titulo, tipo, precio_cop, area_m2, habitaciones,
+                    banos, descripcion, imagenes, zona_id, direccion_referencia,
+                    contacto_whatsapp, publicado, slug, url_publica)
+                VALUES (:id, :titulo, :tipo, :precio_cop, :area_m2, :habitaciones,
+                    :banos, :descripcion, :imagenes, :zona_id, :direccion_referencia,
+                    :contacto_whatsapp, :publicado, :slug, :url_publica)
+            """), lote)
+
+
+def percentiles(latencias: Sequence[float]) -> Dict[str, float]:
+    """
+    Segundos → ms: p50 / p99 / media.
+    """
+    ordenadas = sorted(latencias)
+    def p(q: float) -> float:
+        return ordenadas[min(len(ordenadas) - 1, int(q * len(ordenadas)))] * 1000
+    return {"p50": p(0.50), "p99": p(0.99), "media": statistics.fmean(ordenadas) * 1000}
+
+
+def cronometrar(fn, repeticiones: int) -> List[float]:
+    out = []
+    for _ in range(repeticiones):
+        t = time.perf_counter()
+        fn()
+        out.append(time.perf_counter() - t)
+    return out
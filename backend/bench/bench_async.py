@@ -0,0 +1,128 @@
+"""
+[user-014] Latencia con N clientes concurrentes: DB_ASYNC=0 (threadpool)
+vs DB_ASYNC=1 (AsyncEngine + aiosqlite).
+
+Cada modo corre en su propio proceso (DB_ASYNC se lee al importar). La
+app se llama en proceso por ASGI (httpx.ASGITransport): sin red, mide
+handlers + BD + serialización. Mezcla de listado (filtros variados),
+detalle y zonas; caches vacíos al empezar cada ronda.
+
+    python bench/bench_async.py                      # ambos modos, 500 clientes
+    python bench/bench_async.py --modo async --clientes 200
+    python bench/bench_async.py --url http://127.0.0.1:8000   # servidor real (uvicorn)
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import time
+from typing import List, Optional
+
+from _comun import percentiles, preparar, sembrar
+
+
+def _paths(n: int, max_id: int, rnd: random.Random) -> List[str]:
+    out = []
+    for k in range(n):
+        r = k % 10
+        if r < 5:
+            out.append(f"/api/inmuebles?limit=24&precio_max={rnd.randint(10, 90) * 100_000}")
+        elif r < 9:
+            out.append(f"/api/inmuebles/{rnd.randint(1, max_id)}")
+        else:
+            out.append("/api/zonas")
+    return out
+
+
+async def _ronda(cliente, paths: List[str]) -> List[float]:
+    async def uno(path: str) -> float:
+        t = time.perf_counter()
+        r = await cliente.get(path)
+        # 404: id sin publicar (la siembra publica ~90%)
+        if r.status_code not in (200, 404):
+            r.raise_for_status()
+        return time.perf_counter() - t
+
+    return list(await asyncio.gather(*(uno(p) for p in paths)))
+
+
+async def _medir(args, url: Optional[str]) -> dict:
+    import httpx
+
+    rnd = random.Random(14)
+    limites = httpx.Limits(max_connections=args.clientes, max_keepalive_connections=args.clientes)
+    if url:
+        cliente = httpx.AsyncClient(base_url=url, limits=limites, timeout=120)
+        limpiar = lambda: None  # noqa: E731
+    else:
+        import main
+        from routes import inmuebles
+        from services.json_cache import payload_cache
+
+        await main.startup()
+        cliente = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=main.app), base_url="http://bench", timeout=120
+        )
+
+        def limpiar() -> None:
+            payload_cache.clear()
+            inmuebles._COUNT_CACHE.clear()
+
+    latencias: List[float] = []
+    inicio = time.perf_counter()
+    async with cliente:
+        for _ in range(args.rondas):
+            limpiar()
+            latencias += await _ronda(cliente, _paths(args.clientes, args.filas, rnd))
+    total = time.perf_counter() - inicio
+    return {**percentiles(latencias), "req_s": len(latencias) / total}
+
+
+def _un_modo(args) -> dict:
+    preparar(DB_ASYNC="1" if args.modo == "async" else "0")
+    sembrar(args.filas)
+    return asyncio.run(_medir(args, None))
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--modo", choices=("sync", "async", "ambos"), default="ambos")
+    ap.add_argument("--clientes", type=int, default=500)
+    ap.add_argument("--rondas", type=int, default=5)
+    ap.add_argument("--filas", type=int, default=5_000)
+    ap.add_argument("--url", help="servidor ya levantado (no siembra datos)")
+    ap.add_argument("--json", action="store_true", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.url:
+        res = asyncio.run(_medir(args, args.url.rstrip("/")))
+        print(f"{args.url}: p50 {res['p50']:.1f} ms, p99 {res['p99']:.1f} ms, {res['req_s']:.0f} req/s")
+        return
+
+    if args.modo != "ambos":
+        res = _un_modo(args)
+        if args.json:
+            print("RESULTADO " + json.dumps(res))
+        else:
+            print(f"{args.modo}: p50 {res['p50']:.1f} ms, p99 {res['p99']:.1f} ms, {res['req_s']:.0f} req/s")
+        return
+
+    print(f"{args.clientes} clientes concurrentes x {args.rondas} rondas, {args.filas} filas\n")
+    print(f"{'modo':<8}{'p50 ms':>10}{'p99 ms':>10}{'media ms':>10}{'req/s':>9}")
+    for modo in ("sync", "async"):
+        salida = subprocess.run(
+            [sys.executable, __file__, "--modo", modo, "--json",
+             "--clientes", str(args.clientes), "--rondas", str(args.rondas), "--filas", str(args.filas)],
+            stdout=subprocess.PIPE, text=True, check=True,
+        ).stdout
+        res = json.loads(salida.rsplit("RESULTADO ", 1)[1])
+        print(f"{modo:<8}{res['p50']:>10.1f}{res['p99']:>10.1f}{res['media']:>10.1f}{res['req_s']:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+[user-005] Listado /api/inmuebles: ruta SQL vs catálogo en memoria
+(CATALOGO_MEMORIA, máscaras NumPy) a 10k / 100k / 1M filas.
+
+Cada tamaño corre en su propio proceso (BD nueva). En cada uno la misma
+secuencia de requests (filtros y orden variados, precio_max aleatorio
+para que el conteo no salga siempre del cache) se mide con el flag
+apagado y encendido: req/s y latencia p50 / p99 por request (TestClient,
+secuencial). También se reporta el tiempo de construir el snapshot.
+
+    python bench/bench_catalogo.py                          # 10k, 100k, 1M
+    python bench/bench_catalogo.py --filas 10000,100000 --requests 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+from _comun import percentiles, preparar, sembrar
+
+ZONAS = ("Laureles", "El Poblado", "Belén", "Envigado")
+ORDENES = ("id", "-id", "precio_cop", "-precio_cop", "area_m2", "-area_m2")
+
+
+def _consultas(n: int) -> List[Dict[str, object]]:
+    rnd = random.Random(5)
+    out = []
+    for _ in range(n):
+        params: Dict[str, object] = {"limit": 24, "orden": rnd.choice(ORDENES)}
+        if rnd.random() < 0.5:
+            params["tipo"] = rnd.choice(("apartamento", "casa"))
+        if rnd.random() < 0.4:
+            params["zona"] = rnd.choice(ZONAS)
+        if rnd.random() < 0.6:
+            params["precio_max"] = rnd.randrange(1_500_000, 9_000_000, 50_000)
+        if rnd.random() < 0.3:
+            params["habitaciones_min"] = rnd.randint(2, 4)
+        out.append(params)
+    return out
+
+
+def _un_tamano(filas: int, requests: int) -> dict:
+    preparar()
+    sembrar(filas)
+
+    from fastapi.testclient import TestClient
+
+    import main
+    from routes import inmuebles
+    from services import catalogo
+
+    if catalogo.np is None:
+        sys.exit("numpy no está instalado: el catálogo en memoria no está disponible")
+
+    consultas = _consultas(requests)
+    out = {"filas": filas}
+    with TestClient(main.app) as client:
+        t = time.perf_counter()
+        catalogo.get_snapshot()
+        out["snapshot_s"] = time.perf_counter() - t
+
+        for modo, activo in (("sql", False), ("memoria", True)):
+            catalogo.CATALOGO_MEMORIA = activo
+            inmuebles._COUNT_CACHE.clear()
+            latencias = []
+            inicio = time.perf_counter()
+            for params in consultas:
+                t = time.perf_counter()
+                r = client.get("/api/inmuebles", params=params)
+                latencias.append(time.perf_counter() - t)
+                assert r.status_code == 200, r.text
+            out[modo] = {**percentiles(latencias), "req_s": len(consultas) / (time.perf_counter() - inicio)}
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--filas", default="10000,100000,1000000", help="tamaños separados por coma")
+    ap.add_argument("--requests", type=int, default=1_000)
+    ap.add_argument("--json", action="store_true", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    tamanos = [int(x) for x in args.filas.split(",") if x.strip()]
+
+    if args.json:
+        print("RESULTADO " + json.dumps(_un_tamano(tamanos[0], args.requests)))
+        return
+
+    print(f"{args.requests} requests por modo (secuencial, limit=24)\n")
+    print(f"{'filas':>9}  {'modo':<9}{'req/s':>9}{'p50 ms':>9}{'p99 ms':>9}{'snapshot s':>12}")
+    for filas in tamanos:
+        salida = subprocess.run(
+            [sys.executable, __file__, "--json", "--filas", str(filas), "--requests", str(args.requests)],
+            stdout=subprocess.PIPE, text=True, check=True,
+        ).stdout
+        res = json.loads(salida.rsplit("RESULTADO ", 1)[1])
+        for modo in ("sql", "memoria"):
+            m = res[modo]
+            snap = f"{res['snapshot_s']:12.2f}" if modo == "memoria" else ""
+            print(f"{filas:>9}  {modo:<9}{m['req_s']:>9.0f}{m['p50']:>9.1f}{m['p99']:>9.1f}{snap}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+[user-019] Compresión: bytes en el cable y CPU por request con
+identity / gzip / br.
+
+- Dinámicas: requests reales por ASGI (httpx.ASGITransport) con cada
+  Accept-Encoding; CompresionMiddleware comprime al vuelo. Bytes = cuerpo
+  crudo recibido (sin descomprimir); CPU = time.process_time() por
+  request (el cuerpo sale del cache de payloads tras el primer pase, así
+  que la diferencia con identity es casi solo compresión).
+- Estáticas (frontend/): por encoding, bytes y CPU por request
+  comprimiendo al vuelo (niveles dinámicos) vs. el hermano precomprimido
+  (niveles máximos, CPU una vez en el build y 0 por request).
+
+    python bench/bench_compresion.py
+    python bench/bench_compresion.py --filas 20000 --requests 100
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from _comun import BACKEND_DIR, preparar, sembrar
+
+DINAMICAS = (
+    ("listado json", "/api/inmuebles?limit=100"),
+    ("export ndjson", "/api/inmuebles/export?formato=ndjson"),
+    ("listado html", "/listado"),
+)
+
+
+async def _dinamica(cliente, path: str, encoding: str, requests: int) -> Tuple[int, float]:
+    """
+    (bytes en el cable, CPU ms por request).
+    """
+    async def uno() -> int:
+        async with cliente.stream("GET", path, headers={"Accept-Encoding": encoding}) as r:
+            assert r.status_code == 200, (path, r.status_code)
+            assert r.headers.get("content-encoding", "identity") == encoding, (path, dict(r.headers))
+            return sum([len(b) async for b in r.aiter_raw()])
+
+    n = await uno()  # llena el cache de payloads
+    t = time.process_time()
+    for _ in range(requests):
+        await uno()
+    return n, (time.process_time() - t) * 1000 / requests
+
+
+def _estaticos(encodings: List[str], requests: int) -> Dict[str, Dict[str, float]]:
+    """
+    Totales sobre frontend/: {encoding: {bytes_dinamico, ms_dinamico,
+    bytes_estatico, ms_build}}.
+    """
+    from services import compresion
+
+    archivos = [
+        p for p in sorted((BACKEND_DIR.parent / "frontend").rglob("*"))
+        if p.is_file() and p.suffix in compresion.EXTENSIONES_PRECOMPRIMIBLES
+    ]
+    datos = [p.read_bytes() for p in archivos]
+    out = {"identity": {"bytes_dinamico": sum(map(len, datos)), "ms_dinamico": 0.0,
+                        "bytes_estatico": sum(map(len, datos)), "ms_build": 0.0}}
+    for encoding in encodings:
+        t = time.process_time()
+        for _ in range(requests):
+            dinamico = [compresion._Compresor(encoding).final(d) for d in datos]
+        ms_dinamico = (time.process_time() - t) * 1000 / requests
+
+        t = time.process_time()
+        estatico = [compresion._comprimir(d, encoding) for d in datos]
+        out[encoding] = {
+            "bytes_dinamico": sum(map(len, dinamico)),
+            "ms_dinamico": ms_dinamico,
+            "bytes_estatico": sum(map(len, estatico)),
+            "ms_build": (time.process_time() - t) * 1000,
+        }
+    return out
+
+
+async def _medir(args) -> None:
+    import httpx
+
+    import main
+    from services import compresion
+
+    await main.startup()
+    encodings = ["identity", "gzip"] + (["br"] if compresion.brotli is not None else [])
+
+    print(f"Dinámicas ({args.filas} filas, {args.requests} requests por encoding, CPU por request)\n")
+    print(f"{'respuesta':<15}{'encoding':<10}{'bytes':>12}{'ratio':>8}{'CPU ms':>9}")
+    transporte = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench", timeout=300) as cliente:
+        for nombre, path in DINAMICAS:
+            base = None
+            for encoding in encodings:
+                n, ms = await _dinamica(cliente, path, encoding, args.requests)
+                base = base or n
+                print(f"{nombre:<15}{encoding:<10}{n:>12,}{n / base:>8.2f}{ms:>9.2f}")
+
+    print("\nEstáticos de frontend/ (totales): al vuelo vs. precomprimidos\n")
+    print(f"{'encoding':<10}{'bytes al vuelo':>16}{'CPU ms/req':>12}{'bytes precomp.':>16}{'CPU ms/req':>12}{'build ms':>10}")
+    for encoding, m in _estaticos(encodings[1:], args.requests).items():
+        print(
+            f"{encoding:<10}{m['bytes_dinamico']:>16,}{m['ms_dinamico']:>12.2f}"
+            f"{m['bytes_estatico']:>16,}{0:>12.2f}{m['ms_build']:>10.1f}"
+        )
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--filas", type=int, default=5_000)
+    ap.add_argument("--requests", type=int, default=50)
+    args = ap.parse_args()
+
+    preparar()
+    sembrar(args.filas)
+    asyncio.run(_medir(args))
+
+
+if __name__ == "__main__":
+    main()
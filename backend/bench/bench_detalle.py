@@ -0,0 +1,130 @@
+"""
+[user-006] Detalle /api/inmuebles/{id}: bytes JSON cacheados vs
+inmueble_to_dict + JSONResponse por request.
+
+La app se llama en proceso por ASGI (httpx.ASGITransport), requests
+secuenciales sobre ids distintos:
+
+- cache: el endpoint real (payload_cache; el primer pase lo llena).
+- dict: la forma anterior, montada solo para el benchmark: session.get
+  de Inmueble y Zona + imágenes, inmueble_to_dict y JSONResponse
+  (json.dumps del dict en cada request).
+
+Por modo: latencia p50 / p99 y, en un pase aparte con tracemalloc,
+memoria asignada por request (pico sobre lo vivo al empezar el request).
+
+    python bench/bench_detalle.py
+    python bench/bench_detalle.py --filas 20000 --requests 5000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+import tracemalloc
+from typing import List
+
+from _comun import percentiles, preparar, sembrar
+
+RUTA_DICT = "/api/bench/detalle-dict/{inmueble_id}"
+
+
+def _montar_dict(app) -> None:
+    """
+    Detalle sin cache de payloads, antes del mount de estáticos en "/".
+    """
+    from fastapi import Depends, HTTPException
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import APIRoute
+    from sqlmodel import Session
+
+    from db.database import get_read_session
+    from models.inmueble import Inmueble, Zona
+    from routes.inmuebles import imagenes_por_inmueble, inmueble_to_dict
+
+    def detalle_dict(inmueble_id: int, session: Session = Depends(get_read_session)):
+        i = session.get(Inmueble, inmueble_id)
+        if not i or not i.publicado:
+            raise HTTPException(status_code=404, detail="Inmueble no encontrado")
+        z = session.get(Zona, i.zona_id) if i.zona_id else None
+        imagenes = imagenes_por_inmueble(session, [i.id]).get(i.id, [])
+        return JSONResponse(inmueble_to_dict(i, z, imagenes))
+
+    app.router.routes.insert(0, APIRoute(RUTA_DICT, detalle_dict, methods=["GET"]))
+
+
+async def _latencias(cliente, paths: List[str]) -> List[float]:
+    out = []
+    for path in paths:
+        t = time.perf_counter()
+        r = await cliente.get(path)
+        out.append(time.perf_counter() - t)
+        assert r.status_code == 200, (path, r.status_code)
+    return out
+
+
+async def _asignado(cliente, paths: List[str]) -> List[int]:
+    out = []
+    for path in paths:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        await cliente.get(path)
+        out.append(tracemalloc.get_traced_memory()[1] - base)
+    return out
+
+
+async def _medir(args) -> None:
+    import httpx
+    from sqlalchemy import text
+
+    import main
+    from db.database import read_engine
+    from services.json_cache import payload_cache
+
+    await main.startup()
+    _montar_dict(main.app)
+
+    with read_engine.connect() as conn:
+        ids = conn.execute(text("SELECT id FROM inmueble WHERE publicado = 1")).scalars().all()
+    ids = random.Random(6).sample(ids, min(args.requests, len(ids)))
+
+    modos: List[tuple] = [
+        ("cache", lambda x: f"/api/inmuebles/{x}"),
+        ("dict", lambda x: RUTA_DICT.format(inmueble_id=x)),
+    ]
+
+    print(f"{args.filas} filas, {len(ids)} requests secuenciales por modo\n")
+    print(f"{'modo':<8}{'p50 ms':>9}{'p99 ms':>9}{'media ms':>10}{'KiB/request':>13}")
+    transporte = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench") as cliente:
+        for modo, ruta in modos:
+            paths = [ruta(x) for x in ids]
+            payload_cache.clear()
+            # Primer pase: llena el cache (modo cache) / calienta SQLite
+            await _latencias(cliente, paths)
+            t = percentiles(await _latencias(cliente, paths))
+
+            tracemalloc.start()
+            try:
+                kib = statistics.fmean(await _asignado(cliente, paths)) / 1024
+            finally:
+                tracemalloc.stop()
+            print(f"{modo:<8}{t['p50']:>9.2f}{t['p99']:>9.2f}{t['media']:>10.2f}{kib:>13.1f}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--filas", type=int, default=5_000)
+    ap.add_argument("--requests", type=int, default=2_000)
+    args = ap.parse_args()
+
+    preparar()
+    sembrar(args.filas)
+    asyncio.run(_medir(args))
+
+
+if __name__ == "__main__":
+    main()
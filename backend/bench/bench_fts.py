@@ -0,0 +1,60 @@
+"""
+[user-003] Búsqueda q=: FTS5 (bm25) vs ILIKE sobre N filas sintéticas.
+
+Mide la primera página del listado (ids + conteo + payloads) con caches
+vacíos, por consulta y modo: latencia p50 / p99, total de resultados y
+bytes de la página. ILIKE no quita tildes ("belen" no encuentra
+"Belén") y busca la frase entera como substring: con varias palabras
+suele dar 0 resultados donde FTS encuentra cada término.
+
+    python bench/bench_fts.py              # 100.000 filas
+    python bench/bench_fts.py --filas 20000 --repeticiones 10
+"""
+
+from __future__ import annotations
+
+import argparse
+
+from _comun import cronometrar, percentiles, preparar, sembrar
+
+CONSULTAS = ("belen", "piscina", "apartamento balcon", "terraza jardin", "laureles gimnasio")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--filas", type=int, default=100_000)
+    ap.add_argument("--repeticiones", type=int, default=20)
+    ap.add_argument("--limit", type=int, default=24)
+    args = ap.parse_args()
+
+    preparar()
+    sembrar(args.filas)
+
+    from sqlmodel import Session
+
+    from db.database import read_engine
+    from routes import inmuebles
+    from services.json_cache import json_array, payload_cache
+
+    def pagina(q: str):
+        payload_cache.clear()
+        inmuebles._COUNT_CACHE.clear()
+        filtros = inmuebles.FiltrosInmueble(q=q)
+        orden = inmuebles.resolver_orden(None, filtros)
+        with Session(read_engine) as session:
+            return inmuebles.pagina_inmuebles(session, filtros, orden, None, args.limit, None)
+
+    print(f"{args.filas} filas, {args.repeticiones} repeticiones, limit={args.limit}\n")
+    print(f"{'consulta':<22}{'modo':<7}{'p50 ms':>9}{'p99 ms':>9}{'total':>8}{'bytes':>9}")
+    fts = inmuebles.FTS_ENABLED
+    for q in CONSULTAS:
+        for modo, activo in (("fts", fts), ("ilike", False)):
+            inmuebles.FTS_ENABLED = activo
+            payloads, _, total = pagina(q)
+            t = percentiles(cronometrar(lambda: pagina(q), args.repeticiones))
+            print(f"{q:<22}{modo:<7}{t['p50']:>9.1f}{t['p99']:>9.1f}{total:>8}{len(json_array(payloads)):>9}")
+    inmuebles.FTS_ENABLED = fts
+
+
+if __name__ == "__main__":
+    main()
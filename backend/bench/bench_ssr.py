@@ -0,0 +1,132 @@
+"""
+[user-022] SSR nativo (Jinja2) vs Prerenderer (Chromium headless).
+
+Tres mediciones sobre el detalle /inmueble/{id}-{slug} (y el listado
+para el SSR):
+
+- render: ssr.render_inmueble / render_listado desde el bootstrap ya
+  armado (solo plantilla + JSON-LD) → renders/s.
+- http: GET ?prerender=1 por TestClient (bootstrap + render + ETag +
+  compresión) → renders/s.
+- prerender: Prerenderer(ttl_seconds=0) contra un uvicorn local, una URL
+  distinta por render (sin caché). Se omite si Playwright/Chromium no
+  está instalado (playwright install chromium).
+
+    python bench/bench_ssr.py
+    python bench/bench_ssr.py --renders 2000 --prerenders 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import socket
+import threading
+import time
+from typing import Callable, List
+
+from _comun import preparar, sembrar
+
+
+def _por_segundo(n: int, fn: Callable[[], None]) -> float:
+    t = time.perf_counter()
+    fn()
+    return n / (time.perf_counter() - t)
+
+
+def _puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _medir_prerender(app, urls: List[str]) -> str:
+    import uvicorn
+
+    from prerender import Prerenderer
+
+    puerto = _puerto_libre()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=puerto, log_level="warning"))
+    hilo = threading.Thread(target=server.run, daemon=True)
+    hilo.start()
+    while not server.started:
+        time.sleep(0.05)
+
+    async def medir() -> str:
+        pre = Prerenderer(ttl_seconds=0, max_cache=1)
+        try:
+            await pre.start()
+        except Exception as e:
+            return f"omitido ({type(e).__name__}: {str(e).splitlines()[0]})"
+        try:
+            # Arranque del navegador fuera de la medición
+            await pre.render(f"http://127.0.0.1:{puerto}{urls[0]}")
+            t = time.perf_counter()
+            for u in urls[1:]:
+                await pre.render(f"http://127.0.0.1:{puerto}{u}")
+            return f"{(len(urls) - 1) / (time.perf_counter() - t):10.1f}"
+        finally:
+            await pre.stop()
+
+    try:
+        return asyncio.run(medir())
+    finally:
+        server.should_exit = True
+        hilo.join()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--filas", type=int, default=2_000)
+    ap.add_argument("--renders", type=int, default=1_000)
+    ap.add_argument("--prerenders", type=int, default=10)
+    args = ap.parse_args()
+
+    preparar()
+    sembrar(args.filas)
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import text
+    from sqlmodel import Session
+
+    import main as app_main
+    from db.database import read_engine
+    from services import bootstrap, ssr
+
+    with read_engine.connect() as conn:
+        urls = conn.execute(
+            text("SELECT url_publica FROM inmueble WHERE publicado = 1 ORDER BY id LIMIT :n"),
+            {"n": args.renders},
+        ).scalars().all()
+    consultas = [{}, {"tipo": "casa"}, {"hab": "3"}, {"precio": "3000000"}]
+
+    with TestClient(app_main.app) as client:
+        asset = app_main.assets.url
+        with Session(read_engine) as session:
+            detalles = [bootstrap.bootstrap_detalle(session, u)[1] for u in urls]
+            listados = [(q, bootstrap.bootstrap_listado(session, q)) for q in consultas]
+
+        def renders_detalle() -> None:
+            for datos in detalles:
+                ssr.render_inmueble(datos, asset)
+
+        def renders_listado() -> None:
+            for k in range(len(urls)):
+                q, datos = listados[k % len(listados)]
+                ssr.render_listado(datos, q, asset)
+
+        def http_detalle() -> None:
+            for u in urls:
+                assert client.get(u, params={"prerender": "1"}).status_code == 200
+
+        print(f"{args.filas} filas, {len(urls)} renders por medición\n")
+        print(f"{'medición':<22}{'renders/s':>10}")
+        print(f"{'render detalle':<22}{_por_segundo(len(urls), renders_detalle):10.1f}")
+        print(f"{'render listado':<22}{_por_segundo(len(urls), renders_listado):10.1f}")
+        print(f"{'http detalle (ssr)':<22}{_por_segundo(len(urls), http_detalle):10.1f}")
+
+    print(f"{'prerender (chromium)':<22}{_medir_prerender(app_main.app, urls[: args.prerenders + 1])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,873 @@
 from __future__ import annotations
 
+import asyncio
 import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Callable, Iterator, List, Optional, Set, Tuple, TypeVar
+
+from anyio import to_thread
 from dotenv import load_dotenv
+from sqlalchemy import String, cast, event, inspect, literal, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlmodel import SQLModel, Session, create_engine, select
-from models.inmueble import Inmueble, Zona
+from sqlmodel.ext.asyncio.session import AsyncSession
+from models.inmueble import Inmueble, InmuebleImagen, Zona, urls_imagenes
+from db.migrations import migrate
+from services.slugs import ruta_inmueble, slug_inmueble, slug_unico, slugify
 
 load_dotenv()
 
+T = TypeVar("T")
+
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./metropolitana.db")
 
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+
+
+def _env_bool(nombre: str, default: str) -> bool:
+    return os.getenv(nombre, default).lower().strip() in ("1", "true", "yes", "on")
+
+
+# ======================================================
+# ENGINE + POOL
+# ======================================================
+# Pool configurable por entorno. SQLite en memoria usa un pool propio
+# de SQLAlchemy (una conexión): ahí no aplican tamaño / recycle.
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))    # segundos; -1 = nunca
+DB_POOL_PRE_PING = _env_bool("DB_POOL_PRE_PING", "1")
+
+# PRAGMAs por conexión (solo SQLite)
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", "-65536"))  # negativo = KiB (64 MiB)
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+
+def _sqlite_en_memoria(url: str) -> bool:
+    return IS_SQLITE and (":memory:" in url or url.rstrip("/").endswith("sqlite:"))
+
+
+def pool_kwargs(url: str) -> dict:
+    if _sqlite_en_memoria(url):
+        return {}
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+def _sqlite_pragmas(dbapi_conn, connection_record) -> None:
+    """
+    WAL: lectores no bloquean al escritor (y viceversa).
+    synchronous=NORMAL: seguro con WAL, un fsync por checkpoint.
+    mmap / cache: lecturas del catálogo sin pasar por read().
+    busy_timeout: esperar el lock en vez de fallar con "database is locked".
+    """
+    cur = dbapi_conn.cursor()
+    cur.execute("PRAGMA journal_mode=WAL")
+    cur.execute("PRAGMA synchronous=NORMAL")
+    _sqlite_pragmas_lectura(cur)
+    cur.close()
+
+
+def _sqlite_pragmas_lectura(cur) -> None:
+    cur.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cur.execute(f"PRAGMA cache_size={SQLITE_CACHE_SIZE}")
+    cur.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+
+
+def _sqlite_pragmas_ro(dbapi_conn, connection_record) -> None:
+    """
+    Conexión de solo lectura: el modo WAL ya lo fija el primario
+    (cambiarlo requiere escribir).
+    """
+    cur = dbapi_conn.cursor()
+    _sqlite_pragmas_lectura(cur)
+    cur.close()
+
+
 # sqlite: check_same_thread necesario
-connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
-engine = create_engine(DATABASE_URL, echo=False, connect_args=connect_args)
+connect_args = {"check_same_thread": False} if IS_SQLITE else {}
+engine = create_engine(
+    DATABASE_URL,
+    echo=False,
+    connect_args=connect_args,
+    **pool_kwargs(DATABASE_URL),
+)
+
+if IS_SQLITE:
+    event.listen(engine, "connect", _sqlite_pragmas)
+
+
+# ======================================================
+# LECTURA (RÉPLICA / SOLO LECTURA)
+# ======================================================
+# read_engine: listado, detalle, zonas, sitemaps y caches en memoria.
+# engine (primario): escrituras, migraciones, seed.
+# - DATABASE_READ_URL explícita: réplica (ej: PostgreSQL streaming).
+# - SQLite en archivo: misma BD abierta con mode=ro (URI), pool propio.
+#   No se usa immutable=1: el primario sigue escribiendo y con WAL los
+#   lectores ven cada commit sin bloquearlo.
+# - SQLite en memoria: no hay segundo archivo, read_engine = engine.
+# Con una réplica remota puede haber retraso: los caches por versión
+# podrían guardar datos de antes del último commit hasta el siguiente.
+
+def sqlite_read_only_url(url: str) -> Optional[str]:
+    """
+    sqlite:///./x.db → sqlite:///file:./x.db?mode=ro&uri=true
+    """
+    if not IS_SQLITE or _sqlite_en_memoria(url) or "?" in url or ":///" not in url:
+        return None
+    scheme, path = url.split(":///", 1)
+    return f"{scheme}:///file:{path}?mode=ro&uri=true"
+
+
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL") or sqlite_read_only_url(DATABASE_URL)
+
+if DATABASE_READ_URL:
+    read_engine = create_engine(
+        DATABASE_READ_URL,
+        echo=False,
+        connect_args=connect_args,
+        **pool_kwargs(DATABASE_READ_URL),
+    )
+    if IS_SQLITE:
+        event.listen(read_engine, "connect", _sqlite_pragmas_ro)
+else:
+    read_engine = engine
+
+
+# ======================================================
+# VERSIÓN DEL CATÁLOGO (invalida caches en memoria)
+# ======================================================
+# La fuente es la BD: la fila catalogo_version la incrementan triggers
+# en inmueble / zona / inmueble_imagen, así que también cuenta
+# escrituras de otros procesos (scripts, SQL a mano, otros workers).
+# catalog_version() relee esa fila cada CATALOG_VERSION_TTL segundos
+# (0 = en cada llamada) y devuelve un contador local que sube con
+# cada cambio: los caches (conteos, facetas, snapshot...) guardan la
+# versión con la que se calcularon y se descartan solos al cambiar.
+#
+# Caches que invalidan por id se registran con on_catalog_change():
+# - commit de este proceso: cambios con los ids tocados.
+# - cambio externo (la BD avanzó sin un commit nuestro que lo
+#   explique): CambiosCatalogo(todo=True), invalidar todo.
+
+CATALOG_VERSION_TTL = float(os.getenv("CATALOG_VERSION_TTL", "1.0"))
+
+# Triggers de versión: SQLite y Postgres (otros motores: solo commits
+# de este proceso, como antes)
+VERSION_EN_BD = IS_SQLITE or engine.dialect.name == "postgresql"
+
+
+@dataclass
+class CambiosCatalogo:
+    """
+    Lo que tocó un commit:
+    - inmuebles: ids de inmuebles insertados / modificados / borrados
+    - zonas: ids de zonas insertadas / modificadas / borradas
+    - zonas_de_inmuebles: zonas (antes y después) de esos inmuebles
+    - todo: cambio externo sin detalle, invalidar todo
+    - version_antes / version_despues: fila catalogo_version al
+      empezar y al terminar la transacción (con el lock de escritura)
+    """
+    inmuebles: Set[int] = field(default_factory=set)
+    zonas: Set[int] = field(default_factory=set)
+    zonas_de_inmuebles: Set[int] = field(default_factory=set)
+    todo: bool = False
+    version_antes: Optional[int] = None
+    version_despues: Optional[int] = None
+
+    def __bool__(self) -> bool:
+        return bool(self.todo or self.inmuebles or self.zonas)
+
+
+_catalog_version = 0
+_catalog_listeners: List[Callable[[CambiosCatalogo], None]] = []
+
+# Conexión propia para leer catalogo_version (misma fuente que read_engine,
+# réplica incluida). catalog_version() se llama con la sesión del request
+# abierta: pedir una segunda conexión al pool de read_engine puede
+# agotarlo (todos los requests esperando su segunda conexión). Las
+# lecturas van bajo _version_lock: una conexión alcanza.
+_VERSION_URL = DATABASE_READ_URL or DATABASE_URL
+if _sqlite_en_memoria(_VERSION_URL):
+    _version_engine = read_engine
+else:
+    _version_engine = create_engine(
+        _VERSION_URL,
+        echo=False,
+        connect_args=connect_args,
+        pool_size=1,
+        max_overflow=0,
+        pool_pre_ping=DB_POOL_PRE_PING,
+    )
+    if IS_SQLITE:
+        event.listen(_version_engine, "connect", _sqlite_pragmas_ro)
+
+# Última versión de BD ya reflejada en los caches (None = sin leer)
+_version_bd: Optional[int] = None
+_version_leida_en = 0.0
+_version_lock = threading.RLock()
+
+
+def _leer_version_bd(conn) -> Optional[int]:
+    if not VERSION_EN_BD:
+        return None
+    return conn.execute(text("SELECT version FROM catalogo_version WHERE id = 1")).scalar()
+
+
+def _notificar(cambios: CambiosCatalogo) -> None:
+    global _catalog_version
+    _catalog_version += 1
+    for fn in _catalog_listeners:
+        fn(cambios)
+
+
+def en_event_loop() -> bool:
+    """
+    True en el hilo del event loop, incluido el callback de
+    AsyncSession.run_sync (DB_ASYNC=1), que corre ahí. En ese hilo no
+    hay I/O sync ni locks de hilos: Db.run deja todo listo antes, en un
+    hilo (preparar_lectura).
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def _version_vencida() -> bool:
+    return VERSION_EN_BD and time.monotonic() - _version_leida_en >= CATALOG_VERSION_TTL
+
+
+def refrescar_catalog_version(forzar: bool = False) -> None:
+    """
+    Relee catalogo_version (como mucho cada CATALOG_VERSION_TTL s).
+    Si la BD avanzó sin un commit nuestro: invalidación total.
+    En el event loop no relee (lo hace preparar_lectura en un hilo).
+    """
+    global _version_bd, _version_leida_en
+    if not forzar and (not _version_vencida() or en_event_loop()):
+        return
+    if not VERSION_EN_BD:
+        return
+
+    with _version_lock:
+        if not forzar and time.monotonic() - _version_leida_en < CATALOG_VERSION_TTL:
+            return
+        try:
+            with _version_engine.connect() as conn:
+                version = _leer_version_bd(conn)
+        except Exception:
+            # Tabla aún no creada (antes de init_db): sin versión de BD
+            return
+        _version_leida_en = time.monotonic()
+        if version is None or version == _version_bd:
+            return
+        if _version_bd is not None:
+            _notificar(CambiosCatalogo(todo=True))
+        _version_bd = version
+
+
+def catalog_version() -> int:
+    refrescar_catalog_version()
+    return _catalog_version
+
+
+# Estructuras derivadas del catálogo que se reconstruyen con I/O sync
+# (snapshot en memoria, grilla geo, índice de clusters), como pares
+# (vencida, preparar): vencida() sin I/O, preparar() reconstruye.
+_preparaciones: List[Tuple[Callable[[], bool], Callable[[], object]]] = []
+
+
+def al_preparar_lectura(vencida: Callable[[], bool], preparar: Callable[[], object]) -> None:
+    _preparaciones.append((vencida, preparar))
+
+
+def lectura_vencida() -> bool:
+    """
+    Sin I/O: hay que releer la versión o reconstruir algo.
+    """
+    return _version_vencida() or any(vencida() for vencida, _ in _preparaciones)
+
+
+def preparar_lectura() -> None:
+    """
+    Versión al día y estructuras reconstruidas. En un hilo: Db.run la
+    llama antes de run_sync, que corre en el event loop.
+    """
+    refrescar_catalog_version()
+    for vencida, preparar in _preparaciones:
+        if vencida():
+            preparar()
+
+
+def bump_catalog_version() -> None:
+    with _version_lock:
+        _notificar(CambiosCatalogo(todo=True))
+
+
+def on_catalog_change(fn: Callable[[CambiosCatalogo], None]):
+    """
+    Registra fn(cambios), llamada tras cada commit que modifica
+    inmuebles o zonas, y con todo=True ante cambios externos.
+    """
+    _catalog_listeners.append(fn)
+    return fn
+
+
+def _toca_catalogo(objs) -> bool:
+    return any(isinstance(o, (Inmueble, Zona, InmuebleImagen)) for o in objs)
+
+
+@event.listens_for(Session, "before_flush")
+def _version_antes(session, flush_context, instances) -> None:
+    """
+    Primera escritura al catálogo en la transacción: tomar el lock de
+    escritura (UPDATE sin cambios) y leer la versión. Con el lock nadie
+    más puede escribir hasta el commit: lo que la versión avance desde
+    acá hasta version_despues es solo nuestro.
+    """
+    if not VERSION_EN_BD:
+        return
+    cambios = session.info.setdefault("cambios_catalogo", CambiosCatalogo())
+    if cambios.version_antes is not None:
+        return
+    if not _toca_catalogo((*session.new, *session.dirty, *session.deleted)):
+        return
+    conn = session.connection()
+    conn.execute(text("UPDATE catalogo_version SET version = version WHERE id = 1"))
+    cambios.version_antes = _leer_version_bd(conn)
+
+
+@event.listens_for(Session, "after_flush")
+def _marcar_catalogo_sucio(session, flush_context) -> None:
+    cambios = session.info.setdefault("cambios_catalogo", CambiosCatalogo())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Inmueble):
+            cambios.inmuebles.add(obj.id)
+            # zona actual + anterior (si el inmueble cambió de zona)
+            hist = inspect(obj).attrs.zona_id.history
+            for zid in (obj.zona_id, *hist.deleted):
+                if zid is not None:
+                    cambios.zonas_de_inmuebles.add(zid)
+        elif isinstance(obj, Zona):
+            cambios.zonas.add(obj.id)
+    if cambios.version_antes is not None:
+        cambios.version_despues = _leer_version_bd(session.connection())
+
+
+@event.listens_for(Session, "after_commit")
+def _commit_catalogo(session) -> None:
+    global _version_bd
+    cambios = session.info.pop("cambios_catalogo", None)
+    if not cambios:
+        return
+
+    with _version_lock:
+        if cambios.version_despues is not None:
+            # Otro proceso escribió antes que nosotros y aún no se vio:
+            # los ids de este commit no alcanzan, invalidar todo
+            if _version_bd is not None and _version_bd != cambios.version_antes:
+                cambios.todo = True
+            _version_bd = cambios.version_despues
+        _notificar(cambios)
+
+
+@event.listens_for(Session, "after_rollback")
+def _rollback_catalogo(session) -> None:
+    session.info.pop("cambios_catalogo", None)
+
+
+# ======================================================
+# SLUGS PERSISTIDOS (Zona.slug, Inmueble.slug / url_publica)
+# ======================================================
+# Se calculan al escribir (eventos de mapper, misma transacción) para
+# que lecturas y redirecciones no repitan slugify() por request.
+# - Zona: slug único (nombre repetido → sufijo -2, -3...).
+# - Inmueble: depende de tipo + nombre de zona; url_publica necesita
+#   el id, por eso en INSERT se completa en after_insert.
+# - Renombrar una zona recalcula los slugs de sus inmuebles.
+
+def _cambio(target, *attrs: str) -> bool:
+    estado = inspect(target)
+    return any(estado.attrs[a].history.has_changes() for a in attrs)
+
+
+@event.listens_for(Zona, "before_insert")
+@event.listens_for(Zona, "before_update")
+def _slug_zona(mapper, connection, target: Zona) -> None:
+    if target.slug and not _cambio(target, "nombre"):
+        return
+    base = slugify(target.nombre)
+    tabla = Zona.__table__
+    stmt = select(tabla.c.slug).where(tabla.c.slug.like(f"{base}%"))
+    if target.id is not None:
+        stmt = stmt.where(tabla.c.id != target.id)
+    target.slug = slug_unico(base, connection.execute(stmt).scalars())
+
+
+@event.listens_for(Zona, "after_update")
+def _slugs_inmuebles_de_zona(mapper, connection, target: Zona) -> None:
+    if not _cambio(target, "nombre"):
+        return
+    tabla = Inmueble.__table__
+    tipos = connection.execute(
+        select(tabla.c.tipo).where(tabla.c.zona_id == target.id).distinct()
+    ).scalars().all()
+    for tipo in tipos:
+        slug = slug_inmueble(tipo, target.nombre)
+        connection.execute(
+            tabla.update()
+            .where(tabla.c.zona_id == target.id, tabla.c.tipo == tipo)
+            .values(
+                slug=slug,
+                url_publica=(
+                    literal("/inmueble/", String)
+                    + cast(tabla.c.id, String)
+                    + literal(f"-{slug}", String)
+                ),
+            )
+        )
+
+
+@event.listens_for(Inmueble, "before_insert")
+@event.listens_for(Inmueble, "before_update")
+def _slug_inmueble(mapper, connection, target: Inmueble) -> None:
+    if target.slug and target.url_publica and not _cambio(target, "tipo", "zona_id"):
+        return
+    zona_nombre = connection.execute(
+        select(Zona.__table__.c.nombre).where(Zona.__table__.c.id == target.zona_id)
+    ).scalar()
+    target.slug = slug_inmueble(target.tipo, zona_nombre)
+    if target.id is not None:
+        target.url_publica = ruta_inmueble(target.id, target.slug)
+
+
+@event.listens_for(Inmueble, "after_insert")
+def _url_inmueble(mapper, connection, target: Inmueble) -> None:
+    if target.url_publica:
+        return
+    url = ruta_inmueble(target.id, target.slug)
+    tabla = Inmueble.__table__
+    connection.execute(
+        tabla.update().where(tabla.c.id == target.id).values(url_publica=url)
+    )
+    set_committed_value(target, "url_publica", url)
+
+
+# ======================================================
+# IMÁGENES (Inmueble.imagenes → inmueble_imagen)
+# ======================================================
+# La columna de texto sigue siendo la entrada al escribir; las filas
+# ordenadas de inmueble_imagen se reescriben cuando cambia. width /
+# height se conservan para las URLs que siguen presentes.
+# Se mantiene sincronizado con triggers (no depende del ORM): un UPDATE
+# por SQL a mano o desde otro proceso también reescribe las filas.
+# Otros motores: eventos del ORM, como antes.
+#
+# Partir "a.jpg, b.jpg" en SQLite sin CTE (no se permiten en triggers):
+# json_quote escapa el texto entero y ninguna secuencia de escape lleva
+# comas, así que cambiar "," por '","' deja un array JSON válido.
+
+IMAGENES_EN_BD = VERSION_EN_BD
+
+_IMAGENES_URLS_SQLITE = """
+    SELECT key, trim(value, ' ' || char(9, 10, 11, 12, 13)) AS url
+    FROM json_each('[' || replace(json_quote(COALESCE(new.imagenes, '')), ',', '","') || ']')
+"""
+
+_IMAGENES_INSERT_SQLITE = f"""
+    INSERT INTO inmueble_imagen (inmueble_id, position, url, width, height)
+    SELECT
+        new.id, ROW_NUMBER() OVER (ORDER BY u.key) - 1, u.url,
+        (SELECT m.width FROM inmueble_imagen m
+         WHERE m.inmueble_id = new.id AND m.position < 0 AND m.url = u.url LIMIT 1),
+        (SELECT m.height FROM inmueble_imagen m
+         WHERE m.inmueble_id = new.id AND m.position < 0 AND m.url = u.url LIMIT 1)
+    FROM ({_IMAGENES_URLS_SQLITE}) u
+    WHERE u.url <> '';
+"""
+
+_IMAGENES_DDL_SQLITE = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS inmueble_imagen_ai AFTER INSERT ON inmueble BEGIN
+        {_IMAGENES_INSERT_SQLITE}
+    END
+    """,
+    # Las filas viejas pasan a position < 0 (libera el índice único y
+    # deja width / height a mano para el INSERT) y después se borran
+    f"""
+    CREATE TRIGGER IF NOT EXISTS inmueble_imagen_au AFTER UPDATE OF imagenes ON inmueble BEGIN
+        UPDATE inmueble_imagen SET position = -1 - position
+        WHERE inmueble_id = new.id AND position >= 0;
+        {_IMAGENES_INSERT_SQLITE}
+        DELETE FROM inmueble_imagen WHERE inmueble_id = new.id AND position < 0;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS inmueble_imagen_bd BEFORE DELETE ON inmueble BEGIN
+        DELETE FROM inmueble_imagen WHERE inmueble_id = old.id;
+    END
+    """,
+]
+
+_IMAGENES_DDL_POSTGRES = [
+    """
+    CREATE OR REPLACE FUNCTION inmueble_imagen_sync() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            DELETE FROM inmueble_imagen WHERE inmueble_id = OLD.id;
+            RETURN OLD;
+        END IF;
+        UPDATE inmueble_imagen SET position = -1 - position
+        WHERE inmueble_id = NEW.id AND position >= 0;
+        INSERT INTO inmueble_imagen (inmueble_id, position, url, width, height)
+        SELECT
+            NEW.id, ROW_NUMBER() OVER (ORDER BY u.n) - 1, u.url,
+            (SELECT m.width FROM inmueble_imagen m
+             WHERE m.inmueble_id = NEW.id AND m.position < 0 AND m.url = u.url LIMIT 1),
+            (SELECT m.height FROM inmueble_imagen m
+             WHERE m.inmueble_id = NEW.id AND m.position < 0 AND m.url = u.url LIMIT 1)
+        FROM (
+            SELECT n, btrim(x, E' \\t\\n\\r\\f\\x0B') AS url
+            FROM unnest(string_to_array(COALESCE(NEW.imagenes, ''), ',')) WITH ORDINALITY AS t(x, n)
+        ) u
+        WHERE u.url <> '';
+        DELETE FROM inmueble_imagen WHERE inmueble_id = NEW.id AND position < 0;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS inmueble_imagen_aiu ON inmueble",
+    """
+    CREATE TRIGGER inmueble_imagen_aiu
+    AFTER INSERT OR UPDATE OF imagenes ON inmueble
+    FOR EACH ROW EXECUTE FUNCTION inmueble_imagen_sync()
+    """,
+    "DROP TRIGGER IF EXISTS inmueble_imagen_bd ON inmueble",
+    """
+    CREATE TRIGGER inmueble_imagen_bd
+    BEFORE DELETE ON inmueble
+    FOR EACH ROW EXECUTE FUNCTION inmueble_imagen_sync()
+    """,
+]
+
+
+def init_imagenes() -> None:
+    """
+    Crea los triggers de imágenes. Si son nuevos, reescribe las filas
+    de todos los inmuebles (pudieron quedar desfasadas por escrituras
+    que no pasaron por el ORM).
+    """
+    if not IMAGENES_EN_BD:
+        return
+
+    with engine.begin() as conn:
+        existe = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE name = 'inmueble_imagen_au'")
+            if IS_SQLITE else
+            text("SELECT 1 FROM pg_trigger WHERE tgname = 'inmueble_imagen_aiu'")
+        ).first()
+
+        for ddl in _IMAGENES_DDL_SQLITE if IS_SQLITE else _IMAGENES_DDL_POSTGRES:
+            conn.execute(text(ddl))
+
+        if not existe:
+            conn.execute(text("UPDATE inmueble SET imagenes = imagenes"))
+
+
+def _guardar_imagenes(connection, inmueble_id: int, imagenes: Optional[str]) -> None:
+    tabla = InmuebleImagen.__table__
+    medidas = {
+        url: (w, h)
+        for url, w, h in connection.execute(
+            select(tabla.c.url, tabla.c.width, tabla.c.height)
+            .where(tabla.c.inmueble_id == inmueble_id)
+        )
+    }
+    connection.execute(tabla.delete().where(tabla.c.inmueble_id == inmueble_id))
+
+    urls = urls_imagenes(imagenes)
+    if urls:
+        connection.execute(tabla.insert(), [
+            {
+                "inmueble_id": inmueble_id,
+                "position": n,
+                "url": url,
+                "width": medidas.get(url, (None, None))[0],
+                "height": medidas.get(url, (None, None))[1],
+            }
+            for n, url in enumerate(urls)
+        ])
+
+
+def _imagenes_insert(mapper, connection, target: Inmueble) -> None:
+    _guardar_imagenes(connection, target.id, target.imagenes)
+
+
+def _imagenes_update(mapper, connection, target: Inmueble) -> None:
+    if _cambio(target, "imagenes"):
+        _guardar_imagenes(connection, target.id, target.imagenes)
+
+
+def _imagenes_delete(mapper, connection, target: Inmueble) -> None:
+    tabla = InmuebleImagen.__table__
+    connection.execute(tabla.delete().where(tabla.c.inmueble_id == target.id))
+
+
+if not IMAGENES_EN_BD:
+    event.listen(Inmueble, "after_insert", _imagenes_insert)
+    event.listen(Inmueble, "after_update", _imagenes_update)
+    event.listen(Inmueble, "before_delete", _imagenes_delete)
+
+
+# ======================================================
+# BÚSQUEDA DE TEXTO (SQLite FTS5)
+# ======================================================
+# Índice invertido sobre titulo / descripcion / nombre de zona.
+# unicode61 + remove_diacritics: "belen" encuentra "Belén".
+# Se mantiene sincronizado con triggers (no depende del ORM).
+
+FTS_ENABLED = IS_SQLITE
+
+_FTS_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS inmueble_fts USING fts5(
+        titulo, descripcion, zona,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS inmueble_fts_ai AFTER INSERT ON inmueble BEGIN
+        INSERT INTO inmueble_fts (rowid, titulo, descripcion, zona)
+        VALUES (
+            new.id, new.titulo, new.descripcion,
+            (SELECT nombre FROM zona WHERE id = new.zona_id)
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS inmueble_fts_ad AFTER DELETE ON inmueble BEGIN
+        DELETE FROM inmueble_fts WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS inmueble_fts_au
+    AFTER UPDATE OF titulo, descripcion, zona_id ON inmueble BEGIN
+        DELETE FROM inmueble_fts WHERE rowid = old.id;
+        INSERT INTO inmueble_fts (rowid, titulo, descripcion, zona)
+        VALUES (
+            new.id, new.titulo, new.descripcion,
+            (SELECT nombre FROM zona WHERE id = new.zona_id)
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS zona_fts_au AFTER UPDATE OF nombre ON zona BEGIN
+        UPDATE inmueble_fts SET zona = new.nombre
+        WHERE rowid IN (SELECT id FROM inmueble WHERE zona_id = new.id);
+    END
+    """,
+]
+
+
+def init_fts() -> None:
+    """
+    Crea el índice FTS5 + triggers. Si el índice es nuevo,
+    lo llena con los inmuebles existentes.
+    """
+    if not FTS_ENABLED:
+        return
+
+    with engine.begin() as conn:
+        existe = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE name = 'inmueble_fts'")
+        ).first()
+
+        for ddl in _FTS_DDL:
+            conn.execute(text(ddl))
+
+        if not existe:
+            conn.execute(text("""
+                INSERT INTO inmueble_fts (rowid, titulo, descripcion, zona)
+                SELECT i.id, i.titulo, i.descripcion, z.nombre
+                FROM inmueble i LEFT JOIN zona z ON z.id = i.zona_id
+            """))
+
+
+# ======================================================
+# catalogo_version (fila única + triggers)
+# ======================================================
+
+_TABLAS_CATALOGO = ("inmueble", "zona", "inmueble_imagen")
+
+_VERSION_DDL_SQLITE = [
+    """
+    CREATE TABLE IF NOT EXISTS catalogo_version (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        version INTEGER NOT NULL
+    )
+    """,
+    "INSERT OR IGNORE INTO catalogo_version (id, version) VALUES (1, 0)",
+    *(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {tabla}_version_{op.lower()}
+        AFTER {op} ON {tabla} BEGIN
+            UPDATE catalogo_version SET version = version + 1 WHERE id = 1;
+        END
+        """
+        for tabla in _TABLAS_CATALOGO
+        for op in ("INSERT", "UPDATE", "DELETE")
+    ),
+]
+
+_VERSION_DDL_POSTGRES = [
+    """
+    CREATE TABLE IF NOT EXISTS catalogo_version (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        version BIGINT NOT NULL
+    )
+    """,
+    "INSERT INTO catalogo_version (id, version) VALUES (1, 0) ON CONFLICT DO NOTHING",
+    """
+    CREATE OR REPLACE FUNCTION catalogo_version_bump() RETURNS trigger AS $$
+    BEGIN
+        UPDATE catalogo_version SET version = version + 1 WHERE id = 1;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    *(
+        ddl
+        for tabla in _TABLAS_CATALOGO
+        for ddl in (
+            f"DROP TRIGGER IF EXISTS {tabla}_version ON {tabla}",
+            f"""
+            CREATE TRIGGER {tabla}_version
+            AFTER INSERT OR UPDATE OR DELETE ON {tabla}
+            FOR EACH STATEMENT EXECUTE FUNCTION catalogo_version_bump()
+            """,
+        )
+    ),
+]
+
+
+def init_catalogo_version() -> None:
+    """
+    Crea catalogo_version + triggers y toma la versión actual como base.
+    """
+    if not VERSION_EN_BD:
+        return
+
+    with engine.begin() as conn:
+        for ddl in _VERSION_DDL_SQLITE if IS_SQLITE else _VERSION_DDL_POSTGRES:
+            conn.execute(text(ddl))
+    refrescar_catalog_version(forzar=True)
 
 
 def init_db() -> None:
     SQLModel.metadata.create_all(engine)
+    migrate(engine)
+    init_fts()
+    init_imagenes()
+    init_catalogo_version()
     seed_if_empty()
 
 
-def get_session() -> Session:
-    return Session(engine)
+def get_read_session() -> Iterator[Session]:
+    """
+    Dependencia FastAPI (rutas de solo lectura, sobre read_engine): la
+    sesión se cierra (y la conexión vuelve al pool) al terminar el
+    request, también si hubo excepción.
+    """
+    with Session(read_engine) as session:
+        yield session
+
+
+# ======================================================
+# MODO ASYNC (opcional)
+# ======================================================
+# DB_ASYNC=1: los handlers async (listado, detalle, zonas) hacen el I/O
+# por aiosqlite / asyncpg sin ocupar hilos del threadpool de anyio.
+# La lógica de consulta es la misma (sync): corre con
+# AsyncSession.run_sync(), que adapta una Session normal sobre la
+# conexión async. Con DB_ASYNC=0 esa misma función va al threadpool.
+
+DB_ASYNC = _env_bool("DB_ASYNC", "0")
+
+_ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+}
+
+
+def async_database_url(url: str) -> str:
+    scheme, sep, rest = url.partition("://")
+    driver = _ASYNC_DRIVERS.get(scheme.split("+")[0], scheme)
+    return f"{driver}{sep}{rest}"
+
+
+# Solo lo usan handlers de lectura: apunta a la réplica si la hay
+_ASYNC_READ_URL = DATABASE_READ_URL or DATABASE_URL
+
+async_engine = (
+    create_async_engine(
+        async_database_url(_ASYNC_READ_URL),
+        echo=False,
+        **pool_kwargs(_ASYNC_READ_URL),
+    )
+    if DB_ASYNC
+    else None
+)
+
+if async_engine is not None and IS_SQLITE:
+    event.listen(
+        async_engine.sync_engine,
+        "connect",
+        _sqlite_pragmas_ro if DATABASE_READ_URL else _sqlite_pragmas,
+    )
+
+
+class Db:
+    """
+    Sesión de lectura para handlers async: db.run(fn, *args) ejecuta
+    fn(session, *args) sin bloquear el event loop con I/O.
+    """
+
+    def __init__(self, session):
+        self.session = session
+
+    async def run(self, fn: Callable[..., T], *args) -> T:
+        if isinstance(self.session, AsyncSession):
+            # run_sync corre fn en el event loop: la relectura de versión
+            # y las reconstrucciones (I/O por engines sync) van antes, en
+            # un hilo; adentro de fn solo se usa lo ya armado
+            if lectura_vencida():
+                await to_thread.run_sync(preparar_lectura)
+            return await self.session.run_sync(fn, *args)
+        return await to_thread.run_sync(fn, self.session, *args)
+
+
+async def get_db() -> AsyncIterator[Db]:
+    if async_engine is not None:
+        async with AsyncSession(async_engine) as session:
+            yield Db(session)
+    else:
+        with Session(read_engine) as session:
+            yield Db(session)
 
 
 def seed_if_empty() -> None:
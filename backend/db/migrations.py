@@ -0,0 +1,160 @@
+"""
+Migraciones ligeras (sin Alembic).
+
+create_all() solo crea tablas que no existen: NO agrega índices ni
+columnas a tablas existentes. Aquí van esos cambios, en orden y una
+sola vez por base de datos. La versión aplicada se guarda en la tabla
+schema_version.
+
+Para agregar una migración: escribir la función y sumarla al final
+de MIGRATIONS con el siguiente número. Nunca reordenar ni borrar.
+"""
+
+from __future__ import annotations
+
+from typing import Callable, List, Tuple
+
+from sqlalchemy import Connection, Engine, inspect, text
+from sqlmodel import SQLModel
+
+from models.inmueble import urls_imagenes
+from services.slugs import ruta_inmueble, slug_inmueble, slug_unico, slugify
+
+
+# ======================================================
+# MIGRACIONES
+# ======================================================
+
+def _crear_indices(conn: Connection, nombres: Tuple[str, ...]) -> None:
+    """
+    Crea (si faltan) los índices de models/ con esos nombres.
+    Por nombre: una migración vieja no debe crear índices sobre
+    columnas que agrega una migración posterior.
+    """
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            if index.name in nombres:
+                index.create(conn, checkfirst=True)
+
+
+def _m001_indices(conn: Connection) -> None:
+    """
+    Índices de listado (models/inmueble.py) en bases existentes.
+    """
+    _crear_indices(conn, (
+        "ix_zona_nombre",
+        "ix_inmueble_pub_id",
+        "ix_inmueble_pub_precio",
+        "ix_inmueble_pub_area",
+        "ix_inmueble_pub_tipo_precio",
+        "ix_inmueble_zona_tipo_precio",
+    ))
+
+
+def _agregar_columnas(conn: Connection, tabla: str, columnas: List[Tuple[str, str]]) -> None:
+    existentes = {c["name"] for c in inspect(conn).get_columns(tabla)}
+    for nombre, tipo in columnas:
+        if nombre not in existentes:
+            conn.execute(text(f"ALTER TABLE {tabla} ADD COLUMN {nombre} {tipo}"))
+
+
+def _m002_slugs(conn: Connection) -> None:
+    """
+    Columnas zona.slug, inmueble.slug / url_publica + backfill + índices
+    únicos. Mismo criterio que los eventos de escritura (services/slugs).
+    """
+    _agregar_columnas(conn, "zona", [("slug", "VARCHAR")])
+    _agregar_columnas(conn, "inmueble", [("slug", "VARCHAR"), ("url_publica", "VARCHAR")])
+
+    usados = set(conn.execute(
+        text("SELECT slug FROM zona WHERE slug IS NOT NULL")
+    ).scalars())
+    for zid, nombre in conn.execute(
+        text("SELECT id, nombre FROM zona WHERE slug IS NULL ORDER BY id")
+    ).all():
+        slug = slug_unico(slugify(nombre), usados)
+        usados.add(slug)
+        conn.execute(text("UPDATE zona SET slug = :s WHERE id = :id"), {"s": slug, "id": zid})
+
+    filas = conn.execute(text("""
+        SELECT i.id, i.tipo, z.nombre
+        FROM inmueble i LEFT JOIN zona z ON z.id = i.zona_id
+        WHERE i.slug IS NULL OR i.url_publica IS NULL
+    """)).all()
+    if filas:
+        params = []
+        for iid, tipo, zona_nombre in filas:
+            slug = slug_inmueble(tipo, zona_nombre)
+            params.append({"s": slug, "u": ruta_inmueble(iid, slug), "id": iid})
+        conn.execute(
+            text("UPDATE inmueble SET slug = :s, url_publica = :u WHERE id = :id"),
+            params,
+        )
+
+    _crear_indices(conn, ("ux_zona_slug", "ux_inmueble_url_publica"))
+
+
+def _m003_imagenes(conn: Connection) -> None:
+    """
+    Llena inmueble_imagen (create_all ya creó la tabla) a partir de la
+    columna inmueble.imagenes, para inmuebles que aún no tienen filas.
+    """
+    _crear_indices(conn, ("ux_inmueble_imagen_pos",))
+
+    filas = conn.execute(text("""
+        SELECT id, imagenes FROM inmueble i
+        WHERE NOT EXISTS (SELECT 1 FROM inmueble_imagen m WHERE m.inmueble_id = i.id)
+    """)).all()
+    params = [
+        {"i": iid, "p": n, "u": url}
+        for iid, imagenes in filas
+        for n, url in enumerate(urls_imagenes(imagenes))
+    ]
+    if params:
+        conn.execute(
+            text("INSERT INTO inmueble_imagen (inmueble_id, position, url) VALUES (:i, :p, :u)"),
+            params,
+        )
+
+
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "índices de listado inmueble / zona", _m001_indices),
+    (2, "slugs persistidos inmueble / zona", _m002_slugs),
+    (3, "imágenes de inmueble en tabla propia", _m003_imagenes),
+]
+
+
+# ======================================================
+# RUNNER
+# ======================================================
+
+def schema_version(conn: Connection) -> int:
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)"
+    ))
+    return conn.execute(
+        text("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+    ).scalar_one()
+
+
+def migrate(engine: Engine) -> int:
+    """
+    Aplica las migraciones pendientes (cada una en su transacción).
+    Devuelve la versión final.
+    """
+    with engine.begin() as conn:
+        actual = schema_version(conn)
+
+    for version, nombre, fn in MIGRATIONS:
+        if version <= actual:
+            continue
+        with engine.begin() as conn:
+            fn(conn)
+            conn.execute(
+                text("INSERT INTO schema_version (version) VALUES (:v)"),
+                {"v": version},
+            )
+        print(f"🛠️ Migración {version} aplicada: {nombre}")
+        actual = version
+
+    return actual
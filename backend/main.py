@@ -2,13 +2,17 @@ from __future__ import annotations
 
 import os
 from pathlib import Path
+from typing import Optional
 
-from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse, FileResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi import Depends, FastAPI, Request
+from fastapi.responses import HTMLResponse, RedirectResponse
 from dotenv import load_dotenv
 
 from prerender import Prerenderer, is_probably_bot
+from db.database import Db, get_db, init_db
+from services import bootstrap, catalogo, ssr
+from services.assets import ASSETS_PREFIX, Assets
+from services.compresion import CompresionMiddleware, StaticPrecomprimidos, precomprimir
 
 # ======================================================
 # CARGA VARIABLES DE ENTORNO
@@ -35,6 +39,11 @@ ENABLE_PRERENDER = os.getenv("ENABLE_PRERENDER", "0").lower().strip() in (
 
 IS_PROD = ENV == "prod" and ENABLE_PRERENDER
 
+# .br / .gz de frontend/ al arrancar (0 si ya se generan en el build)
+PRECOMPRIMIR_ESTATICOS = os.getenv("PRECOMPRIMIR_ESTATICOS", "1").lower().strip() in (
+    "1", "true", "yes", "on"
+)
+
 # ======================================================
 # BASE URL PÚBLICA
 # ======================================================
@@ -49,6 +58,9 @@ BACKEND_DIR = Path(__file__).resolve().parent
 PROJECT_DIR = BACKEND_DIR.parent
 FRONTEND_DIR = PROJECT_DIR / "frontend"
 
+# Manifest de assets + shells HTML (se arma en startup)
+assets: Optional[Assets] = None
+
 # ======================================================
 # PRERENDER (SEO – SOLO BOTS EN PRODUCCIÓN)
 # ======================================================
@@ -61,6 +73,7 @@ from routes.inmuebles import router as inmuebles_router
 from routes.zonas import router as zonas_router
 from routes.chatbot import router as chatbot_router
 
+from routes.barrios import pregenerar_barrios, router as barrios_router
 from routes.robots import router as robots_router
 from routes.sitemap_index import router as sitemap_index_router
 from routes.sitemap_static import router as sitemap_static_router
@@ -77,6 +90,9 @@ app.include_router(zonas_router, prefix="/api")
 app.include_router(chatbot_router, prefix="/api")
 
 # ---------- SEO ----------
+# /arriendos/* (landings de barrio / ciudad) y /listado.html (301).
+# Antes del mount "/" de estáticos: si no, el mount las captura.
+app.include_router(barrios_router)
 app.include_router(robots_router)
 app.include_router(sitemap_index_router)
 app.include_router(sitemap_static_router)
@@ -89,6 +105,23 @@ app.include_router(sitemap_inmuebles_router)
 
 @app.on_event("startup")
 async def startup():
+    init_db()
+
+    if PRECOMPRIMIR_ESTATICOS and FRONTEND_DIR.exists():
+        n = precomprimir(FRONTEND_DIR)
+        print(f"✅ Estáticos precomprimidos ({n} archivos nuevos)")
+
+    if FRONTEND_DIR.exists():
+        global assets
+        assets = Assets(FRONTEND_DIR)
+        print(f"✅ Assets versionados ({len(assets.manifest)} archivos)")
+        # /arriendos/*: con las refs del manifest actual
+        pregenerar_barrios()
+
+    if catalogo.catalogo_activo():
+        catalogo.get_snapshot()
+        print("✅ Catálogo en memoria ACTIVADO")
+
     if IS_PROD:
         try:
             await prerenderer.start()
@@ -129,6 +162,10 @@ async def prerender_middleware(request: Request, call_next):
     if not IS_PROD:
         return await call_next(request)
 
+    # SSR nativo (Jinja2) para esta ruta: Playwright queda de fallback
+    if ssr.ruta_ssr(path):
+        return await call_next(request)
+
     ua = request.headers.get("user-agent", "")
     qp = dict(request.query_params)
 
@@ -153,6 +190,11 @@ async def prerender_middleware(request: Request, call_next):
 
     return await call_next(request)
 
+# ======================================================
+# COMPRESIÓN (gzip / brotli) — registrada al final: envuelve todo
+# ======================================================
+app.add_middleware(CompresionMiddleware)
+
 # ======================================================
 # FRONTEND ROUTING (CLAVE PARA URLS LIMPIAS)
 # ======================================================
@@ -161,23 +203,56 @@ if FRONTEND_DIR.exists():
 
     # Home
     @app.get("/", include_in_schema=False)
-    async def home():
-        return FileResponse(FRONTEND_DIR / "index.html")
+    async def home(request: Request, db: Db = Depends(get_db)):
+        shell = assets.shell("index.html")
+        if not bootstrap.BOOTSTRAP_INICIAL:
+            return shell.response(request)
+        return shell.response_bootstrap(request, await db.run(bootstrap.bootstrap_home))
 
     # Listado
     @app.get("/listado", include_in_schema=False)
-    async def listado():
-        return FileResponse(FRONTEND_DIR / "listado.html")
+    async def listado(request: Request, db: Db = Depends(get_db)):
+        if ssr.pide_ssr(request):
+            query = dict(request.query_params)
+            datos = await db.run(bootstrap.bootstrap_listado, query)
+            return ssr.html_response(request, ssr.render_listado(datos, query, assets.url))
+        shell = assets.shell("listado.html")
+        if not bootstrap.BOOTSTRAP_INICIAL:
+            return shell.response(request)
+        datos = await db.run(bootstrap.bootstrap_listado, dict(request.query_params))
+        return shell.response_bootstrap(request, datos)
 
     # ⭐ DETALLE INMUEBLE (URL LIMPIA)
     @app.get("/inmueble/{slug}", include_in_schema=False)
-    async def inmueble_detalle(slug: str):
-        return FileResponse(FRONTEND_DIR / "inmueble.html")
-
-    # Assets (CSS / JS / imágenes)
+    async def inmueble_detalle(request: Request, slug: str, db: Db = Depends(get_db)):
+        con_ssr = ssr.pide_ssr(request)
+        # Por url_publica: slug viejo o mal escrito → 301 a la canónica
+        redireccion, datos = await db.run(
+            bootstrap.bootstrap_detalle, f"/inmueble/{slug}", con_ssr or bootstrap.BOOTSTRAP_INICIAL
+        )
+        if redireccion:
+            if request.url.query:
+                redireccion = f"{redireccion}?{request.url.query}"
+            return RedirectResponse(redireccion, status_code=301)
+        if con_ssr:
+            html = ssr.render_inmueble(datos, assets.url)
+            if html is None:
+                return HTMLResponse("<h1>Inmueble no encontrado</h1>", status_code=404)
+            return ssr.html_response(request, html)
+        shell = assets.shell("inmueble.html")
+        if not bootstrap.BOOTSTRAP_INICIAL:
+            return shell.response(request)
+        return shell.response_bootstrap(request, datos)
+
+    # CSS / JS con hash de contenido: caché inmutable
+    @app.get(ASSETS_PREFIX + "{versionado:path}", include_in_schema=False)
+    async def asset_versionado(request: Request, versionado: str):
+        return assets.response_asset(request, versionado)
+
+    # Assets (CSS / JS / imágenes), con .br / .gz precomprimidos
     app.mount(
         "/",
-        StaticFiles(directory=str(FRONTEND_DIR), html=False),
+        StaticPrecomprimidos(directory=str(FRONTEND_DIR), html=False),
         name="static"
     )
 
@@ -1,11 +1,25 @@
 from __future__ import annotations
 
-from typing import Optional
+from typing import List, Optional
+from sqlalchemy import Index, text
 from sqlmodel import SQLModel, Field
 
 
+# Índices parciales: solo filas publicadas (lo único que lee el API).
+# SQLite exige el mismo término que genera la consulta (publicado = 1).
+SOLO_PUBLICADOS = {
+    "sqlite_where": text("publicado = 1"),
+    "postgresql_where": text("publicado"),
+}
+
+
 class Zona(SQLModel, table=True):
     __tablename__ = "zona"
+    __table_args__ = (
+        Index("ix_zona_nombre", "nombre"),
+        # Búsqueda por slug (/api/zonas/{slug})
+        Index("ux_zona_slug", "slug", unique=True),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     nombre: str
@@ -14,9 +28,24 @@ class Zona(SQLModel, table=True):
     lng: float
     radio_m: int = 1200
 
+    # Derivado de nombre (se asigna al escribir, ver db/database.py)
+    slug: Optional[str] = None
+
 
 class Inmueble(SQLModel, table=True):
     __tablename__ = "inmueble"
+    __table_args__ = (
+        # Listado por defecto (orden id) y rango de precio / orden precio
+        Index("ix_inmueble_pub_id", "id", **SOLO_PUBLICADOS),
+        Index("ix_inmueble_pub_precio", "precio_cop", "id", **SOLO_PUBLICADOS),
+        Index("ix_inmueble_pub_area", "area_m2", "id", **SOLO_PUBLICADOS),
+        # Filtro tipo (+ rango precio)
+        Index("ix_inmueble_pub_tipo_precio", "tipo", "precio_cop", **SOLO_PUBLICADOS),
+        # Filtro zona (+ tipo + rango precio)
+        Index("ix_inmueble_zona_tipo_precio", "zona_id", "tipo", "precio_cop"),
+        # Ruta canónica /inmueble/{id}-{slug}
+        Index("ux_inmueble_url_publica", "url_publica", unique=True),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
 
@@ -28,6 +57,8 @@ class Inmueble(SQLModel, table=True):
     banos: int
 
     descripcion: str
+    # URLs separadas por coma: entrada de escritura (compatibilidad).
+    # Las lecturas usan InmuebleImagen, sincronizada por triggers en la BD.
     imagenes: str
     direccion_referencia: str
     contacto_whatsapp: str
@@ -35,3 +66,32 @@ class Inmueble(SQLModel, table=True):
 
     # Foreign key pura (SIN Relationship)
     zona_id: int = Field(foreign_key="zona.id")
+
+    # Derivados de tipo + nombre de zona (se asignan al escribir)
+    slug: Optional[str] = None
+    url_publica: Optional[str] = None
+
+
+class InmuebleImagen(SQLModel, table=True):
+    """
+    Imágenes ordenadas de un inmueble (position 0 = portada).
+    """
+    __tablename__ = "inmueble_imagen"
+    __table_args__ = (
+        # Portada (position = 0) y galería ordenada por inmueble
+        Index("ux_inmueble_imagen_pos", "inmueble_id", "position", unique=True),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    inmueble_id: int = Field(foreign_key="inmueble.id")
+    position: int
+    url: str
+    width: Optional[int] = None
+    height: Optional[int] = None
+
+
+def urls_imagenes(imagenes: Optional[str]) -> List[str]:
+    """
+    "a.jpg, b.jpg" → ["a.jpg", "b.jpg"] (columna Inmueble.imagenes).
+    """
+    return [x.strip() for x in (imagenes or "").split(",") if x.strip()]
@@ -1,13 +1,21 @@
 from __future__ import annotations
 
+import hashlib
 import os
+import sys
+import threading
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Iterator, Optional, Tuple
 import json
 
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, Request, Response
 from fastapi.responses import HTMLResponse, RedirectResponse
 
+from services import compresion
+from services.assets import CACHE_CONTROL_HTML, construir_manifest, reescribir_refs
+from services.http_cache import etag_for, etag_matches
+
 # ======================================================
 # Router
 # ======================================================
@@ -23,6 +31,19 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 FRONTEND_DIR = BASE_DIR.parent / "frontend"
 INDEX_HTML = FRONTEND_DIR / "index.html"
 
+# En dev se revisa el mtime de index.html en cada request (recarga sola)
+ENV = os.getenv("ENV", "dev").lower().strip()
+RECARGAR_PLANTILLA = ENV != "prod"
+
+# Páginas pre-generadas (startup / CLI): {slug}.html + .br / .gz
+# Con varios workers conviene generarlas una vez en el deploy
+# (python -m routes.barrios) y arrancar con PREGENERAR_BARRIOS=0; si
+# no, cada worker las escribe al arrancar (temporales propios, sin choques)
+ESTATICOS_DIR = Path(os.getenv("BARRIOS_ESTATICOS_DIR", str(BASE_DIR / "build" / "arriendos")))
+PREGENERAR_BARRIOS = os.getenv("PREGENERAR_BARRIOS", "1").lower().strip() in (
+    "1", "true", "yes", "on"
+)
+
 # ======================================================
 # Definición territorial (ESCALABLE)
 # ======================================================
@@ -151,20 +172,277 @@ def build_schema_barrio(ciudad: str, barrio: str):
         ]
     }
 
-def inject_seo(html: str, title: str, description: str, canonical: str, schema: dict):
-    html = html.replace("<title>", f"<title>{title} | ")
-    return html.replace(
-        "</head>",
-        f"""
+def seo_block(description: str, canonical: str, schema: dict) -> str:
+    return f"""
         <meta name="description" content="{description}">
         <link rel="canonical" href="{canonical}">
         <script type="application/ld+json">
-        {json.dumps(schema, ensure_ascii=False, indent=2)}
+        {json.dumps(schema, ensure_ascii=False, separators=(",", ":"))}
         </script>
-        </head>
         """
+
+
+def inject_seo(html: str, title: str, description: str, canonical: str, schema: dict):
+    html = html.replace("<title>", f"<title>{title} | ")
+    return html.replace("</head>", seo_block(description, canonical, schema) + "</head>")
+
+# ======================================================
+# PLANTILLA PRECOMPILADA + CACHE DE PÁGINAS
+# ======================================================
+# index.html se lee una vez y se parte en segmentos fijos:
+#   [... <title>] título | [... ] bloque SEO [</head> ...]
+# Cada página (barrio / ciudad) depende solo de TERRITORIO: se arma
+# una vez y queda en memoria como bytes + ETag.
+
+@dataclass(frozen=True)
+class Plantilla:
+    mtime: float
+    # Huella del manifest de assets con el que se reescribieron las refs
+    manifest: str
+    antes_titulo: str
+    antes_head: str
+    resto: str
+
+    def render(self, title: str, description: str, canonical: str, schema: dict) -> str:
+        return (
+            f"{self.antes_titulo}{title} | {self.antes_head}"
+            f"{seo_block(description, canonical, schema)}{self.resto}"
+        )
+
+
+@dataclass(frozen=True)
+class Pagina:
+    html: bytes
+    etag: str
+
+
+_lock = threading.Lock()
+_plantilla: Optional[Plantilla] = None
+_paginas: Dict[str, Pagina] = {}
+
+
+def _cargar_plantilla() -> Optional[Plantilla]:
+    if not INDEX_HTML.exists():
+        return None
+    mtime = INDEX_HTML.stat().st_mtime
+    # Refs de css/js → /assets/... con hash (absolutas: la página vive en /arriendos/)
+    manifest = construir_manifest(FRONTEND_DIR)
+    html = reescribir_refs(load_frontend(), manifest)
+    antes_titulo, sep_t, resto = html.partition("<title>")
+    if not sep_t:
+        antes_titulo, resto = "", html
+    antes_head, sep_h, fin = resto.partition("</head>")
+    return Plantilla(
+        mtime=mtime,
+        manifest=huella_manifest(manifest),
+        antes_titulo=antes_titulo + sep_t,
+        antes_head=antes_head,
+        resto=sep_h + fin,
     )
 
+
+def huella_manifest(manifest: Dict[str, str]) -> str:
+    data = json.dumps(manifest, sort_keys=True).encode("utf-8")
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def get_plantilla() -> Optional[Plantilla]:
+    global _plantilla
+    if _plantilla is not None and not RECARGAR_PLANTILLA:
+        return _plantilla
+    try:
+        mtime = INDEX_HTML.stat().st_mtime
+    except OSError:
+        mtime = None
+    if _plantilla is not None and _plantilla.mtime == mtime:
+        return _plantilla
+    with _lock:
+        _plantilla = _cargar_plantilla()
+        _paginas.clear()
+    return _plantilla
+
+
+def datos_pagina(slug: str) -> Optional[Tuple[str, str, str, dict]]:
+    """
+    (title, description, canonical, schema) de /arriendos/{slug}:
+    barrio canónico o ciudad. None si no existe en TERRITORIO.
+    """
+    if slug in BARRIOS_CANONICOS:
+        ciudad = BARRIOS_CANONICOS[slug]
+        title, description = build_seo(ciudad, slug)
+        return title, description, f"{PUBLIC_BASE_URL}/arriendos/{slug}", build_schema_barrio(ciudad, slug)
+    if slug in TERRITORIO:
+        title, description = build_seo(slug)
+        return title, description, f"{PUBLIC_BASE_URL}/arriendos/{slug}", {}
+    return None
+
+
+def get_pagina(slug: str) -> Optional[Pagina]:
+    plantilla = get_plantilla()
+    pagina = _paginas.get(slug)
+    if pagina is not None:
+        return pagina
+
+    datos = datos_pagina(slug)
+    if datos is None:
+        return None
+    if plantilla is None:
+        html = "<h1>Frontend no encontrado</h1>".encode("utf-8")
+    else:
+        html = plantilla.render(*datos).encode("utf-8")
+
+    pagina = Pagina(html=html, etag=etag_for(html))
+    with _lock:
+        _paginas[slug] = pagina
+    return pagina
+
+
+# ======================================================
+# PRE-GENERACIÓN ESTÁTICA (STARTUP / CLI)
+# ======================================================
+# Todo /arriendos/{slug} sale de TERRITORIO: se escribe a disco una vez
+# (con .br / .gz) y se sirve con FileResponse (sendfile, sin render ni
+# copia en Python). Escala a miles de barrios sin trabajo por request.
+#
+# Las páginas llevan URLs /assets/... con hash: junto a ellas va
+# ESTAMPA con la huella del manifest. Si los assets cambiaron (otro
+# deploy, PREGENERAR_BARRIOS=0 con un build viejo), los archivos no se
+# sirven y se usa la página en memoria hasta regenerar.
+
+ESTAMPA = ".manifest"
+
+# (mtime_ns de ESTAMPA, contenido): se relee solo si el archivo cambia
+_estampa: Optional[Tuple[int, str]] = None
+
+def slugs_territorio() -> Iterator[str]:
+    """
+    Todos los /arriendos/{slug}: barrios canónicos y ciudades
+    (si un slug es ambos, gana el barrio, igual que el router).
+    """
+    yield from BARRIOS_CANONICOS
+    for ciudad in TERRITORIO:
+        if ciudad not in BARRIOS_CANONICOS:
+            yield ciudad
+
+
+def _escribir_si_cambia(destino: Path, data: bytes) -> bool:
+    # Sin reescribir lo igual: el mtime se conserva y precomprimir() lo salta
+    if destino.exists() and destino.stat().st_size == len(data) and destino.read_bytes() == data:
+        return False
+    compresion.escribir_atomico(destino, data)
+    return True
+
+
+def generar_estaticos(destino: Path = ESTATICOS_DIR) -> int:
+    """
+    Renderiza cada página a destino/{slug}.html, borra las de slugs que
+    ya no están en TERRITORIO y precomprime. Devuelve cuántas escribió.
+    """
+    plantilla = get_plantilla()
+    if plantilla is None:
+        return 0
+
+    destino.mkdir(parents=True, exist_ok=True)
+    escritos = 0
+    vigentes = set()
+    for slug in slugs_territorio():
+        archivo = destino / f"{slug}.html"
+        vigentes.add(archivo.name)
+        html = plantilla.render(*datos_pagina(slug)).encode("utf-8")
+        escritos += _escribir_si_cambia(archivo, html)
+
+    for viejo in destino.glob("*.html*"):
+        # Temporales de otro worker que está escribiendo ahora mismo
+        if viejo.name.endswith(compresion.SUFIJO_TMP):
+            continue
+        base = viejo.name
+        for sufijo in compresion.SUFIJOS.values():
+            base = base.removesuffix(sufijo)
+        if base not in vigentes:
+            viejo.unlink()
+
+    compresion.precomprimir(destino)
+    # Al final: mientras no coincida, archivo_estatico() no usa las páginas
+    _escribir_si_cambia(destino / ESTAMPA, plantilla.manifest.encode("utf-8"))
+    return escritos
+
+
+def _leer_estampa() -> Optional[str]:
+    global _estampa
+    archivo = ESTATICOS_DIR / ESTAMPA
+    try:
+        mtime = archivo.stat().st_mtime_ns
+    except OSError:
+        return None
+    estampa = _estampa
+    if estampa is None or estampa[0] != mtime:
+        estampa = _estampa = (mtime, archivo.read_text(encoding="utf-8").strip())
+    return estampa[1]
+
+
+def archivo_estatico(slug: str) -> Optional[Path]:
+    """
+    destino/{slug}.html si existe, se generó con el manifest actual y
+    (en dev) no es más viejo que index.html.
+    """
+    plantilla = get_plantilla()
+    if plantilla is None or _leer_estampa() != plantilla.manifest:
+        return None
+    archivo = ESTATICOS_DIR / f"{slug}.html"
+    try:
+        mtime = archivo.stat().st_mtime
+    except OSError:
+        return None
+    if RECARGAR_PLANTILLA and INDEX_HTML.exists() and mtime < INDEX_HTML.stat().st_mtime:
+        return None
+    return archivo
+
+
+def estatico_response(request: Request, archivo: Path) -> Response:
+    response = compresion.file_response(
+        archivo,
+        request.headers.get("accept-encoding", ""),
+        headers={"Cache-Control": CACHE_CONTROL_HTML},
+    )
+    if etag_matches(request, response.headers["etag"]):
+        return Response(status_code=304, headers={
+            "ETag": response.headers["etag"],
+            "Cache-Control": CACHE_CONTROL_HTML,
+            "Vary": "Accept-Encoding",
+        })
+    return response
+
+
+def pregenerar_barrios() -> None:
+    """
+    Startup (main.py). Con PREGENERAR_BARRIOS=0 no se escribe nada:
+    se usan los archivos del build si su manifest coincide.
+    """
+    if PREGENERAR_BARRIOS:
+        n = generar_estaticos()
+        print(f"✅ Páginas de barrios / ciudades pre-generadas ({n} nuevas)")
+        return
+    plantilla = get_plantilla()
+    if plantilla is not None and _leer_estampa() != plantilla.manifest:
+        print("⚠️ Páginas de barrios pre-generadas con otros assets: se sirven desde memoria")
+
+
+def servir_pagina(request: Request, slug: str) -> Response:
+    """
+    Archivo pre-generado si existe; si no, la página en memoria.
+    """
+    archivo = archivo_estatico(slug)
+    if archivo is not None:
+        return estatico_response(request, archivo)
+    return pagina_response(request, get_pagina(slug))
+
+
+def pagina_response(request: Request, pagina: Pagina) -> Response:
+    headers = {"ETag": pagina.etag, "Cache-Control": CACHE_CONTROL_HTML}
+    if etag_matches(request, pagina.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=pagina.html, media_type="text/html; charset=utf-8", headers=headers)
+
 # ======================================================
 # REDIRECCIÓN LEGACY (301)
 # ======================================================
@@ -187,24 +465,14 @@ async def legacy_listado_redirect(zona: Optional[str] = None):
 async def arriendos_barrio_canonico(request: Request, barrio: str):
     barrio = barrio.lower()
 
+    # Misma plantilla de ruta que /arriendos/{ciudad}: si no es barrio,
+    # se resuelve como ciudad (esa ruta nunca se alcanza sola)
     if barrio not in BARRIOS_CANONICOS:
+        if barrio in TERRITORIO:
+            return await arriendos_ciudad(request, barrio)
         return HTMLResponse("<h1>Barrio no encontrado</h1>", status_code=404)
 
-    ciudad = BARRIOS_CANONICOS[barrio]
-
-    title, description = build_seo(ciudad, barrio)
-    schema = build_schema_barrio(ciudad, barrio)
-
-    html = load_frontend()
-    html = inject_seo(
-        html=html,
-        title=title,
-        description=description,
-        canonical=f"{PUBLIC_BASE_URL}/arriendos/{barrio}",
-        schema=schema
-    )
-
-    return HTMLResponse(content=html)
+    return servir_pagina(request, barrio)
 
 # ======================================================
 # URL CIUDAD
@@ -216,18 +484,7 @@ async def arriendos_ciudad(request: Request, ciudad: str):
     if ciudad not in TERRITORIO:
         return HTMLResponse("<h1>Ciudad no encontrada</h1>", status_code=404)
 
-    title, description = build_seo(ciudad)
-
-    html = load_frontend()
-    html = inject_seo(
-        html=html,
-        title=title,
-        description=description,
-        canonical=f"{PUBLIC_BASE_URL}/arriendos/{ciudad}",
-        schema={}
-    )
-
-    return HTMLResponse(content=html)
+    return servir_pagina(request, ciudad)
 
 # ======================================================
 # URL SECUNDARIA CIUDAD/BARRIO (NO INDEXABLE)
@@ -243,3 +500,8 @@ async def arriendos_barrio_secundario(ciudad: str, barrio: str):
         url=f"{PUBLIC_BASE_URL}/arriendos/{barrio}",
         status_code=302
     )
+
+
+if __name__ == "__main__":
+    destino = Path(sys.argv[1]) if len(sys.argv) > 1 else ESTATICOS_DIR
+    print(f"✅ {generar_estaticos(destino)} páginas escritas en {destino}")
@@ -1,14 +1,27 @@
 from __future__ import annotations
 
+import base64
+import json
+import math
+import os
 import re
-from typing import Optional, List
+from dataclasses import dataclass, replace
+from typing import AsyncIterator, Optional, List, Dict, Iterator, Tuple
 
-from fastapi import APIRouter, Depends, Query, HTTPException
-from fastapi.responses import RedirectResponse
+import anyio
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, Response
+from fastapi.responses import RedirectResponse, StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy import case, func, literal_column, text, tuple_
 from sqlmodel import Session, select
+from starlette.concurrency import iterate_in_threadpool
 
-from db.database import get_session
-from models.inmueble import Inmueble, Zona
+from db.database import Db, read_engine, get_db, get_read_session, catalog_version, FTS_ENABLED
+from models.inmueble import Inmueble, InmuebleImagen, Zona
+from services import catalogo, clusters, geo
+from services.slugs import ruta_inmueble, slug_inmueble, slugify
+from services.json_cache import payload_cache, encode_json, json_array
+from services.http_cache import cached_json_response
 
 router = APIRouter(prefix="/inmuebles", tags=["inmuebles"])
 
@@ -24,59 +37,52 @@ PUBLIC_BASE_URL = "https://tudominio.com"  # ← cambia solo aquí en prod
 # HELPERS SEO / SLUG / URL CANÓNICA
 # ======================================================
 
-def slugify(text: str) -> str:
-    """
-    Convierte texto a slug SEO-safe, estable y consistente.
-    NO depende del idioma.
-    """
-    text = text.lower().strip()
-    text = (
-        text.replace("á", "a")
-        .replace("é", "e")
-        .replace("í", "i")
-        .replace("ó", "o")
-        .replace("ú", "u")
-        .replace("ñ", "n")
-        .replace("ü", "u")
-    )
-    text = re.sub(r"[^\w\s-]", "", text)
-    text = re.sub(r"[\s_-]+", "-", text)
-    return text.strip("-")
-
+# slugify / slug_inmueble / ruta_inmueble: services/slugs.py
+# (también los usan los eventos de escritura y la migración 2).
 
 def build_inmueble_slug(i: Inmueble, z: Optional[Zona]) -> str:
     """
-    Slug SEMÁNTICO y ESTABLE para SEO.
-    No usa el título completo (evita cambios futuros).
+    Slug persistido (Inmueble.slug); se calcula solo si falta.
     """
-    parts = [
-        i.tipo or "inmueble",
-        "en",
-        z.nombre if z else "",
-    ]
-    return slugify(" ".join(parts))
+    return i.slug or slug_inmueble(i.tipo, z.nombre if z else None)
 
 
 def build_public_url(i: Inmueble, z: Optional[Zona]) -> str:
     """
     URL pública canónica definitiva.
     """
-    slug = build_inmueble_slug(i, z)
-    return f"/inmueble/{i.id}-{slug}"
+    return i.url_publica or ruta_inmueble(i.id, build_inmueble_slug(i, z))
 
 
-def inmueble_to_dict(i: Inmueble, z: Optional[Zona]) -> dict:
+def imagenes_por_inmueble(session: Session, ids: List[int]) -> Dict[int, List[str]]:
     """
-    Serializador único (NO repetir lógica).
+    URLs ordenadas por inmueble: UNA consulta para todos los ids
+    (ux_inmueble_imagen_pos).
     """
-    slug = build_inmueble_slug(i, z)
+    out: Dict[int, List[str]] = {}
+    if not ids:
+        return out
+    rows = session.exec(
+        select(InmuebleImagen.inmueble_id, InmuebleImagen.url)
+        .where(InmuebleImagen.inmueble_id.in_(ids))
+        .order_by(InmuebleImagen.inmueble_id, InmuebleImagen.position)
+    ).all()
+    for inmueble_id, url in rows:
+        out.setdefault(inmueble_id, []).append(url)
+    return out
 
+
+def inmueble_to_dict(i: Inmueble, z: Optional[Zona], imagenes: List[str]) -> dict:
+    """
+    Serializador único (NO repetir lógica).
+    imagenes: URLs ordenadas (imagenes_por_inmueble).
+    """
     return {
         # =============================
         # Identidad SEO
         # =============================
         "id": i.id,
-        "slug": slug,
+        "slug": build_inmueble_slug(i, z),
         "url_publica": build_public_url(i, z),
 
         # =============================
@@ -93,11 +99,7 @@ def inmueble_to_dict(i: Inmueble, z: Optional[Zona]) -> dict:
         # =============================
         # Media
         # =============================
-        "imagenes": [
-            x.strip()
-            for x in (i.imagenes or "").split(",")
-            if x.strip()
-        ],
+        "imagenes": imagenes,
 
         # =============================
         # Contacto
@@ -112,7 +114,7 @@ def inmueble_to_dict(i: Inmueble, z: Optional[Zona]) -> dict:
             {
                 "id": z.id,
                 "nombre": z.nombre,
-                "slug": slugify(z.nombre),
+                "slug": z.slug or slugify(z.nombre),
                 "ciudad": z.ciudad,
                 "lat": z.lat,
                 "lng": z.lng,
@@ -125,57 +127,836 @@ def inmueble_to_dict(i: Inmueble, z: Optional[Zona]) -> dict:
 
 
 # ======================================================
-# LISTADO DE INMUEBLES (API)
+# FILTROS (COMPARTIDOS POR LISTADO Y CONTEO)
 # ======================================================
 
-@router.get("")
-def listar_inmuebles(
+@dataclass(frozen=True)
+class FiltrosInmueble:
+    """
+    Filtros normalizados del listado.
+    Hashable: sirve como llave de cache.
+    """
+    q: Optional[str] = None
+    tipo: Optional[str] = None
+    zona: Optional[str] = None
+    precio_min: Optional[int] = None
+    precio_max: Optional[int] = None
+    habitaciones_min: Optional[int] = None
+    # (min_lng, min_lat, max_lng, max_lat)
+    bbox: Optional[Tuple[float, float, float, float]] = None
+    # (lat, lng, radio_m)
+    cerca: Optional[Tuple[float, float, int]] = None
+
+    def zonas_geo(self) -> Optional[List[int]]:
+        """
+        Zonas dentro del bbox / radio (índice espacial), o None si
+        no hay filtro geográfico.
+        """
+        ids: Optional[set] = None
+        if self.bbox:
+            ids = set(geo.zonas_en_bbox(self.bbox))
+        if self.cerca:
+            en_radio = set(geo.zonas_en_radio(*self.cerca))
+            ids = en_radio if ids is None else ids & en_radio
+        return None if ids is None else sorted(ids)
+
+
+RADIO_DEFAULT_M = 2_000
+RADIO_MAX_M = 50_000
+
+
+def parse_bbox(bbox: Optional[str]) -> Optional[Tuple[float, float, float, float]]:
+    if not bbox:
+        return None
+    try:
+        min_lng, min_lat, max_lng, max_lat = (float(x) for x in bbox.split(","))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="bbox: min_lng,min_lat,max_lng,max_lat")
+    # float() acepta "nan" / "inf": sin este chequeo llegan a geo / clusters
+    if not all(math.isfinite(x) for x in (min_lng, min_lat, max_lng, max_lat)):
+        raise HTTPException(status_code=400, detail="bbox: valores no finitos")
+    if not (
+        -180 <= min_lng <= 180 and -180 <= max_lng <= 180
+        and -90 <= min_lat <= 90 and -90 <= max_lat <= 90
+    ):
+        raise HTTPException(status_code=400, detail="bbox: lat fuera de ±90 o lng fuera de ±180")
+    if min_lng > max_lng or min_lat > max_lat:
+        raise HTTPException(status_code=400, detail="bbox: mínimos mayores que máximos")
+    return (min_lng, min_lat, max_lng, max_lat)
+
+
+def filtros_inmueble(
     q: Optional[str] = None,
     tipo: Optional[str] = Query(default=None, description="apartamento|casa"),
     zona: Optional[str] = Query(default=None, description="Nombre de zona"),
     precio_min: Optional[int] = None,
     precio_max: Optional[int] = None,
-    session: Session = Depends(get_session),
+    habitaciones_min: Optional[int] = None,
+    bbox: Optional[str] = Query(default=None, description="min_lng,min_lat,max_lng,max_lat"),
+    lat: Optional[float] = Query(default=None, ge=-90, le=90),
+    lng: Optional[float] = Query(default=None, ge=-180, le=180),
+    radio_m: Optional[int] = Query(default=None, ge=1, description=f"Metros (máx {RADIO_MAX_M})"),
+) -> FiltrosInmueble:
+    if (lat is None) != (lng is None):
+        raise HTTPException(status_code=400, detail="lat y lng van juntos")
+
+    return FiltrosInmueble(
+        q=(q or "").strip() or None,
+        tipo=tipo.lower() if tipo else None,
+        zona=zona or None,
+        precio_min=precio_min,
+        precio_max=precio_max,
+        habitaciones_min=habitaciones_min,
+        bbox=parse_bbox(bbox),
+        cerca=(
+            (lat, lng, min(radio_m or RADIO_DEFAULT_M, RADIO_MAX_M))
+            if lat is not None
+            else None
+        ),
+    )
+
+
+# ======================================================
+# BÚSQUEDA DE TEXTO (FTS5 + bm25)
+# ======================================================
+
+# Pesos bm25 por columna: titulo, descripcion, zona
+BM25_PESOS = (10.0, 1.0, 5.0)
+
+
+def fts_query(q: str) -> str:
+    """
+    Convierte texto libre en una consulta FTS5 segura:
+    cada palabra entre comillas y como prefijo ("bel"* → Belén).
+    """
+    tokens = re.findall(r"\w+", q.lower())
+    if not tokens:
+        return '""'
+    return " ".join(f'"{t}"*' for t in tokens)
+
+
+def busqueda_fts(q: str):
+    """
+    Subconsulta (inmueble_id, rank) sobre inmueble_fts.
+    rank = bm25 (menor = más relevante).
+    """
+    pesos = ", ".join(str(p) for p in BM25_PESOS)
+    return (
+        select(
+            literal_column("rowid").label("inmueble_id"),
+            literal_column(f"bm25(inmueble_fts, {pesos})").label("rank"),
+        )
+        .select_from(text("inmueble_fts"))
+        .where(text("inmueble_fts MATCH :fts_q").bindparams(fts_q=fts_query(q)))
+        .subquery("busqueda")
+    )
+
+
+def aplicar_filtros(stmt, f: FiltrosInmueble):
+    """
+    Aplica los filtros a un select que ya hace JOIN con Zona.
+    """
+    stmt = stmt.where(Inmueble.publicado == True)  # noqa
+
+    if f.q:
+        if FTS_ENABLED:
+            # JOIN con el índice FTS: filtra y expone busqueda.rank
+            busqueda = busqueda_fts(f.q)
+            stmt = stmt.join(busqueda, busqueda.c.inmueble_id == Inmueble.id)
+        else:
+            like = f"%{f.q}%"
+            stmt = stmt.where(
+                Inmueble.titulo.ilike(like)
+                | Inmueble.descripcion.ilike(like)
+            )
+
+    if f.tipo:
+        stmt = stmt.where(Inmueble.tipo == f.tipo)
+
+    if f.zona:
+        stmt = stmt.where(Zona.nombre == f.zona)
+
+    if f.precio_min is not None:
+        stmt = stmt.where(Inmueble.precio_cop >= f.precio_min)
+
+    if f.precio_max is not None:
+        stmt = stmt.where(Inmueble.precio_cop <= f.precio_max)
+
+    if f.habitaciones_min is not None:
+        stmt = stmt.where(Inmueble.habitaciones >= f.habitaciones_min)
+
+    zona_ids = f.zonas_geo()
+    if zona_ids is not None:
+        stmt = stmt.where(Inmueble.zona_id.in_(zona_ids))
+
+    return stmt
+
+
+# ======================================================
+# PAGINACIÓN KEYSET (CURSOR OPACO)
+# ======================================================
+
+PAGE_SIZE_DEFAULT = 24
+PAGE_SIZE_MAX = 100
+
+# orden → columna. Prefijo "-" = descendente. El id desempata siempre.
+# "relevancia" solo aplica con q (columna rank del JOIN FTS).
+ORDENES = {
+    "id": Inmueble.id,
+    "precio_cop": Inmueble.precio_cop,
+    "area_m2": Inmueble.area_m2,
+    "relevancia": literal_column("busqueda.rank"),
+}
+
+
+def resolver_orden(orden: Optional[str], f: FiltrosInmueble) -> str:
+    """
+    Sin orden explícito: relevancia si hay búsqueda FTS, si no id.
+    """
+    con_rank = bool(f.q) and FTS_ENABLED
+    if not orden:
+        return "relevancia" if con_rank else "id"
+    if orden.lstrip("-") == "relevancia" and not con_rank:
+        raise HTTPException(status_code=400, detail="orden=relevancia requiere q")
+    if orden.lstrip("-") not in ORDENES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"orden debe ser uno de: {', '.join(ORDENES)} (prefijo '-' = desc)",
+        )
+    return orden
+
+
+def encode_cursor(orden: str, valor, last_id: int) -> str:
+    raw = json.dumps([orden, valor, last_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+# Tipo del valor de orden en el cursor (el cursor viene del cliente:
+# un valor de otro tipo rompería la comparación en SQL / numpy)
+TIPOS_CURSOR = {
+    "id": (int,),
+    "precio_cop": (int,),
+    "area_m2": (int,),
+    "relevancia": (int, float),
+}
+
+
+# Rango de INTEGER en SQLite / BIGINT: fuera de él el bind da OverflowError
+INT64_MIN, INT64_MAX = -(2**63), 2**63 - 1
+
+
+def _valor_valido(valor, tipos: Tuple[type, ...]) -> bool:
+    if isinstance(valor, bool) or not isinstance(valor, tipos):
+        return False
+    if isinstance(valor, int):
+        return INT64_MIN <= valor <= INT64_MAX
+    return math.isfinite(valor)
+
+
+def decode_cursor(cursor: str, orden: str) -> Tuple[object, int]:
+    """
+    Devuelve (valor, last_id). 400 si el cursor es inválido
+    o fue emitido para otro orden.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        c_orden, valor, last_id = json.loads(base64.urlsafe_b64decode(padded))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    if c_orden != orden:
+        raise HTTPException(status_code=400, detail="Cursor no corresponde al orden")
+    if not _valor_valido(last_id, (int,)) or not _valor_valido(valor, TIPOS_CURSOR[orden.lstrip("-")]):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    return valor, last_id
+
+
+def aplicar_orden(stmt, orden: str, cursor: Optional[str]):
+    """
+    orden ya validado por resolver_orden().
+    """
+    desc = orden.startswith("-")
+    col = ORDENES[orden.lstrip("-")]
+
+    if cursor:
+        valor, last_id = decode_cursor(cursor, orden)
+        if col is Inmueble.id:
+            stmt = stmt.where(Inmueble.id < last_id if desc else Inmueble.id > last_id)
+        else:
+            key = tuple_(col, Inmueble.id)
+            stmt = stmt.where(key < (valor, last_id) if desc else key > (valor, last_id))
+
+    if col is Inmueble.id:
+        return stmt.order_by(Inmueble.id.desc() if desc else Inmueble.id)
+    if desc:
+        return stmt.order_by(col.desc(), Inmueble.id.desc())
+    return stmt.order_by(col, Inmueble.id)
+
+
+# ======================================================
+# CONTEO TOTAL (CACHEADO POR VERSIÓN DEL CATÁLOGO)
+# ======================================================
+
+_COUNT_CACHE: Dict[FiltrosInmueble, Tuple[int, int]] = {}
+_COUNT_CACHE_MAX = 512
+
+
+def contar_inmuebles(session: Session, f: FiltrosInmueble) -> int:
+    version = catalog_version()
+    hit = _COUNT_CACHE.get(f)
+    if hit and hit[0] == version:
+        return hit[1]
+
+    stmt = aplicar_filtros(
+        select(func.count(Inmueble.id))
+        .select_from(Inmueble)
+        .join(Zona, Zona.id == Inmueble.zona_id, isouter=True),
+        f,
+    )
+    total = session.exec(stmt).one()
+
+    if len(_COUNT_CACHE) >= _COUNT_CACHE_MAX:
+        _COUNT_CACHE.clear()
+    _COUNT_CACHE[f] = (version, total)
+    return total
+
+
+# ======================================================
+# PAYLOADS PRE-SERIALIZADOS (CACHE POR INMUEBLE)
+# ======================================================
+
+def payloads_por_id(session: Session, ids: List[int]) -> List[Optional[bytes]]:
+    """
+    JSON (bytes) de inmueble_to_dict() por id, en el mismo orden; None si
+    no existe o no está publicado. Lo que no está en cache se carga en UNA
+    consulta por PK (JOIN con Zona) + UNA de imágenes.
+    """
+    cached = payload_cache.get_many(ids)
+    faltan = [x for x in ids if x not in cached]
+
+    if faltan:
+        generation = payload_cache.generation
+        rows = session.exec(
+            select(Inmueble, Zona)
+            .join(Zona, Zona.id == Inmueble.zona_id, isouter=True)
+            .where(Inmueble.id.in_(faltan), Inmueble.publicado == True)  # noqa
+        ).all()
+        imagenes = imagenes_por_inmueble(session, [i.id for i, _ in rows])
+        for i, z in rows:
+            payload = encode_json(inmueble_to_dict(i, z, imagenes.get(i.id, [])))
+            payload_cache.put(i.id, z.id if z else None, payload, generation)
+            cached[i.id] = payload
+
+    return [cached.get(x) for x in ids]
+
+
+def payloads_inmuebles(session: Session, ids: List[int]) -> List[bytes]:
+    """
+    Igual que payloads_por_id(), omitiendo los que no existen.
+    """
+    return [p for p in payloads_por_id(session, ids) if p is not None]
+
+
+# ======================================================
+# PROYECCIÓN DE CAMPOS (?fields= / ?view=card)
+# ======================================================
+# Cada campo declara las columnas SQL que necesita: el SELECT solo
+# trae esas columnas (no se recorta después de inmueble_to_dict).
+
+def _portada():
+    """
+    URL de la imagen en position 0 (subconsulta por índice, sin traer
+    el resto de la galería).
+    """
+    return (
+        select(InmuebleImagen.url)
+        .where(
+            InmuebleImagen.inmueble_id == Inmueble.id,
+            InmuebleImagen.position == 0,
+        )
+        .scalar_subquery()
+    )
+
+
+# campo → (columnas {etiqueta: expresión}, extractor(fila) → valor)
+CAMPOS = {
+    "id": ({"id": Inmueble.id}, lambda r: r["id"]),
+    "slug": ({"slug": Inmueble.slug}, lambda r: r["slug"]),
+    "url_publica": ({"url_publica": Inmueble.url_publica}, lambda r: r["url_publica"]),
+    "titulo": ({"titulo": Inmueble.titulo}, lambda r: r["titulo"]),
+    "tipo": ({"tipo": Inmueble.tipo}, lambda r: r["tipo"]),
+    "precio_cop": ({"precio_cop": Inmueble.precio_cop}, lambda r: r["precio_cop"]),
+    "area_m2": ({"area_m2": Inmueble.area_m2}, lambda r: r["area_m2"]),
+    "habitaciones": ({"habitaciones": Inmueble.habitaciones}, lambda r: r["habitaciones"]),
+    "banos": ({"banos": Inmueble.banos}, lambda r: r["banos"]),
+    "descripcion": ({"descripcion": Inmueble.descripcion}, lambda r: r["descripcion"]),
+    # galería: consulta aparte por página (ver payloads_proyectados)
+    "imagenes": ({}, lambda r: r["imagenes"]),
+    "imagen": ({"imagen": _portada()}, lambda r: r["imagen"]),
+    "direccion_referencia": (
+        {"direccion_referencia": Inmueble.direccion_referencia},
+        lambda r: r["direccion_referencia"],
+    ),
+    "contacto_whatsapp": (
+        {"contacto_whatsapp": Inmueble.contacto_whatsapp},
+        lambda r: r["contacto_whatsapp"],
+    ),
+}
+
+# Sub-campos de zona: zona.nombre, zona.ciudad, ... (objeto anidado)
+CAMPOS_ZONA = {
+    "id": ({"zona_id_real": Zona.id}, lambda r: r["zona_id_real"]),
+    "nombre": ({"zona_nombre": Zona.nombre}, lambda r: r["zona_nombre"]),
+    "slug": ({"zona_slug": Zona.slug}, lambda r: r["zona_slug"]),
+    "ciudad": ({"zona_ciudad": Zona.ciudad}, lambda r: r["zona_ciudad"]),
+    "lat": ({"zona_lat": Zona.lat}, lambda r: r["zona_lat"]),
+    "lng": ({"zona_lng": Zona.lng}, lambda r: r["zona_lng"]),
+    "radio_m": ({"zona_radio_m": Zona.radio_m}, lambda r: r["zona_radio_m"]),
+}
+
+VISTAS = {
+    "card": ("id", "titulo", "precio_cop", "url_publica", "imagen", "zona.nombre"),
+}
+
+
+def parse_campos(fields: Optional[str], view: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """
+    None = payload completo. Si no, tupla de campos válidos (en orden).
+    "zona" sola equivale a todos sus sub-campos.
+    """
+    if not fields and not view:
+        return None
+
+    campos: List[str] = []
+    if view:
+        if view not in VISTAS:
+            raise HTTPException(status_code=400, detail=f"view debe ser uno de: {', '.join(VISTAS)}")
+        campos.extend(VISTAS[view])
+
+    for c in (fields or "").split(","):
+        c = c.strip()
+        if not c:
+            continue
+        if c == "zona":
+            campos.extend(f"zona.{k}" for k in CAMPOS_ZONA)
+            continue
+        if c not in CAMPOS and not (c.startswith("zona.") and c[5:] in CAMPOS_ZONA):
+            raise HTTPException(status_code=400, detail=f"Campo desconocido: {c}")
+        campos.append(c)
+
+    return tuple(dict.fromkeys(campos))
+
+
+def _spec(campo: str):
+    if campo.startswith("zona."):
+        return CAMPOS_ZONA[campo[5:]]
+    return CAMPOS[campo]
+
+
+def payloads_proyectados(session: Session, ids: List[int], campos: Tuple[str, ...]) -> List[bytes]:
+    """
+    Una consulta por PK que trae solo las columnas de los campos pedidos.
+    """
+    if not ids:
+        return []
+
+    columnas = {"id": Inmueble.id, "zona_id_real": Zona.id}
+    for c in campos:
+        columnas.update(_spec(c)[0])
+
+    rows = session.exec(
+        select(*(col.label(label) for label, col in columnas.items()))
+        .select_from(Inmueble)
+        .join(Zona, Zona.id == Inmueble.zona_id, isouter=True)
+        .where(Inmueble.id.in_(ids))
+    ).all()
+    por_id = {r.id: dict(r._mapping) for r in rows}
+
+    if "imagenes" in campos:
+        imagenes = imagenes_por_inmueble(session, list(por_id))
+        for x, r in por_id.items():
+            r["imagenes"] = imagenes.get(x, [])
+
+    out: List[bytes] = []
+    for x in ids:
+        r = por_id.get(x)
+        if r is None:
+            continue
+        d: dict = {}
+        for c in campos:
+            valor = _spec(c)[1](r)
+            if c.startswith("zona."):
+                if r["zona_id_real"] is not None:
+                    d.setdefault("zona", {})[c[5:]] = valor
+                else:
+                    d["zona"] = None
+            else:
+                d[c] = valor
+        out.append(encode_json(d))
+    return out
+
+
+# ======================================================
+# LISTADO DE INMUEBLES (API)
+# ======================================================
+
+def pagina_inmuebles(
+    session: Session,
+    filtros: FiltrosInmueble,
+    orden: str,
+    cursor: Optional[str],
+    limit: int,
+    campos: Optional[Tuple[str, ...]],
+) -> Tuple[List[bytes], Optional[str], int]:
+    """
+    Una página del listado: (payloads, cursor siguiente o None, total).
+    Sync: corre en el threadpool o vía AsyncSession.run_sync (Db.run).
+    """
+    if catalogo.catalogo_activo() and not filtros.q:
+        # Filtros / orden / conteo en memoria
+        cursor_pos = decode_cursor(cursor, orden) if cursor else None
+        ids, valores, has_more, total = catalogo.consultar(
+            filtros, orden, cursor_pos, limit
+        )
+    else:
+        # Solo (id, columna de orden): el resto sale del cache de payloads
+        stmt = aplicar_filtros(
+            select(Inmueble.id, ORDENES[orden.lstrip("-")])
+            .join(Zona, Zona.id == Inmueble.zona_id, isouter=True),
+            filtros,
+        )
+        stmt = aplicar_orden(stmt, orden, cursor).limit(limit + 1)
+
+        rows = session.exec(stmt).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        ids = [r[0] for r in rows]
+        valores = [r[1] for r in rows]
+        total = contar_inmuebles(session, filtros)
+
+    next_cursor = encode_cursor(orden, valores[-1], ids[-1]) if has_more else None
+
+    if campos is None:
+        payloads = payloads_inmuebles(session, ids)
+    else:
+        payloads = payloads_proyectados(session, ids, campos)
+
+    return payloads, next_cursor, total
+
+
+@router.get("")
+async def listar_inmuebles(
+    request: Request,
+    filtros: FiltrosInmueble = Depends(filtros_inmueble),
+    limit: int = Query(default=PAGE_SIZE_DEFAULT, ge=1, description=f"Máximo {PAGE_SIZE_MAX}"),
+    orden: Optional[str] = Query(
+        default=None,
+        description="id|precio_cop|area_m2|relevancia, prefijo '-' = desc",
+    ),
+    cursor: Optional[str] = Query(default=None, description="Cursor opaco (X-Next-Cursor)"),
+    fields: Optional[str] = Query(default=None, description="Campos separados por coma (zona.nombre, imagen...)"),
+    view: Optional[str] = Query(default=None, description="Preset de campos: card"),
+    db: Db = Depends(get_db),
 ):
     """
-    Listado API:
+    Listado API (paginado por cursor):
     - Usado por frontend
     - Usado por sitemap
     - Usado por schema
+
+    Headers:
+    - X-Total-Count: total con los filtros (cacheado)
+    - X-Next-Cursor / Link rel="next": siguiente página (si hay)
+    """
+
+    limit = min(limit, PAGE_SIZE_MAX)
+    orden = resolver_orden(orden, filtros)
+    campos = parse_campos(fields, view)
+
+    payloads, next_cursor, total = await db.run(
+        pagina_inmuebles, filtros, orden, cursor, limit, campos
+    )
+
+    headers = {"X-Total-Count": str(total)}
+
+    if next_cursor:
+        next_url = request.url.include_query_params(cursor=next_cursor)
+        headers["X-Next-Cursor"] = next_cursor
+        headers["Link"] = f'<{next_url}>; rel="next"'
+
+    return cached_json_response(request, json_array(payloads), headers)
+
+
+# ======================================================
+# EXPORTACIÓN COMPLETA EN STREAMING (feeds / partners)
+# ======================================================
+
+EXPORT_YIELD_PER = 500
+
+# Exports simultáneos. Cada uno retiene una conexión mientras dura el
+# stream y avanza en el threadpool: sin tope, los que esperan conexión
+# ocupan todos los hilos y los que ya la tienen no pueden avanzar (el
+# pool se agota hasta pool_timeout). Los que esperan turno esperan en
+# el event loop, sin hilo. Debe quedar por debajo del pool.
+EXPORT_CONCURRENCIA = int(os.getenv("EXPORT_CONCURRENCIA", "4"))
+_export_turnos = anyio.Semaphore(EXPORT_CONCURRENCIA)
+
+EXPORT_FORMATOS = {
+    "ndjson": "application/x-ndjson",
+    "json": "application/json",
+}
+
+
+def iter_export(filtros: FiltrosInmueble, formato: str) -> Iterator[bytes]:
+    """
+    Recorre el resultado por lotes (yield_per + cursor de servidor) y
+    emite cada inmueble apenas se serializa: memoria constante.
+    Abre su propia sesión: el generador vive más que el handler.
+    """
+    stmt = aplicar_filtros(
+        select(Inmueble, Zona).join(Zona, Zona.id == Inmueble.zona_id, isouter=True),
+        filtros,
+    ).order_by(Inmueble.id)
+    stmt = stmt.execution_options(stream_results=True, yield_per=EXPORT_YIELD_PER)
+
+    with Session(read_engine) as session:
+        def payloads() -> Iterator[bytes]:
+            # Una consulta de imágenes por lote de EXPORT_YIELD_PER
+            for lote in session.exec(stmt).partitions():
+                imagenes = imagenes_por_inmueble(session, [i.id for i, _ in lote])
+                for i, z in lote:
+                    yield encode_json(inmueble_to_dict(i, z, imagenes.get(i.id, [])))
+                    session.expunge(i)
+
+        if formato == "ndjson":
+            for payload in payloads():
+                yield payload + b"\n"
+            return
+
+        yield b"["
+        sep = b""
+        for payload in payloads():
+            yield sep + payload
+            sep = b","
+        yield b"]"
+
+
+async def _export_con_turno(partes: Iterator[bytes]) -> AsyncIterator[bytes]:
+    async with _export_turnos:
+        try:
+            async for parte in iterate_in_threadpool(partes):
+                yield parte
+        finally:
+            # Cliente desconectado: cerrar la sesión ya, no en el GC
+            partes.close()
+
+
+@router.get("/export")
+async def exportar_inmuebles(
+    filtros: FiltrosInmueble = Depends(filtros_inmueble),
+    formato: str = Query(default="ndjson", description="ndjson|json"),
+):
+    """
+    Catálogo completo (con filtros), sin paginar, en streaming:
+    - ndjson: un inmueble por línea
+    - json: arreglo JSON enviado por partes (chunked)
     """
+    if formato not in EXPORT_FORMATOS:
+        raise HTTPException(status_code=400, detail="formato debe ser ndjson|json")
+
+    return StreamingResponse(
+        _export_con_turno(iter_export(filtros, formato)),
+        media_type=EXPORT_FORMATOS[formato],
+    )
+
+
+# ======================================================
+# FACETAS (CONTEOS PARA EL SIDEBAR DE BÚSQUEDA)
+# ======================================================
+
+PRECIO_BUCKETS_DEFAULT = (2_000_000, 2_500_000, 3_000_000, 4_000_000)
+PRECIO_BUCKETS_MAX = 20
+
+_FACETS_CACHE: Dict[Tuple[FiltrosInmueble, Tuple[int, ...]], Tuple[int, bytes]] = {}
+_FACETS_CACHE_MAX = 256
 
-    stmt = select(Inmueble).where(Inmueble.publicado == True)  # noqa
 
-    if q:
-        like = f"%{q.strip()}%"
-        stmt = stmt.where(
-            Inmueble.titulo.ilike(like)
-            | Inmueble.descripcion.ilike(like)
+def parse_buckets(buckets: Optional[str]) -> Tuple[int, ...]:
+    if not buckets:
+        return PRECIO_BUCKETS_DEFAULT
+    try:
+        cortes = sorted({int(x) for x in buckets.split(",") if x.strip()})
+    except ValueError:
+        raise HTTPException(status_code=400, detail="buckets: enteros separados por coma")
+    if not cortes or len(cortes) > PRECIO_BUCKETS_MAX:
+        raise HTTPException(status_code=400, detail=f"buckets: entre 1 y {PRECIO_BUCKETS_MAX} cortes")
+    return tuple(cortes)
+
+
+def calcular_facetas(session: Session, f: FiltrosInmueble, cortes: Tuple[int, ...]) -> dict:
+    """
+    Una sola consulta: GROUP BY (tipo, zona, habitaciones, bucket de precio).
+    Las cuatro facetas se suman en Python sobre esas pocas filas.
+    """
+    bucket = case(
+        *((Inmueble.precio_cop < c, n) for n, c in enumerate(cortes)),
+        else_=len(cortes),
+    ).label("bucket")
+
+    stmt = aplicar_filtros(
+        select(
+            Inmueble.tipo,
+            Zona.id,
+            Zona.nombre,
+            Inmueble.habitaciones,
+            bucket,
+            func.count(Inmueble.id),
         )
+        .select_from(Inmueble)
+        .join(Zona, Zona.id == Inmueble.zona_id, isouter=True),
+        f,
+    ).group_by(Inmueble.tipo, Zona.id, Zona.nombre, Inmueble.habitaciones, bucket)
+
+    total = 0
+    por_tipo: Dict[str, int] = {}
+    por_zona: Dict[Optional[int], dict] = {}
+    por_hab: Dict[int, int] = {}
+    por_bucket = [0] * (len(cortes) + 1)
+
+    for tipo, zona_id, zona_nombre, hab, b, n in session.exec(stmt).all():
+        total += n
+        por_tipo[tipo] = por_tipo.get(tipo, 0) + n
+        z = por_zona.setdefault(zona_id, {"id": zona_id, "nombre": zona_nombre, "count": 0})
+        z["count"] += n
+        por_hab[hab] = por_hab.get(hab, 0) + n
+        por_bucket[b] += n
 
-    if tipo:
-        stmt = stmt.where(Inmueble.tipo == tipo.lower())
+    limites = (0, *cortes, None)
+    return {
+        "total": total,
+        "tipo": por_tipo,
+        "zona": sorted(por_zona.values(), key=lambda z: -z["count"]),
+        "habitaciones": {str(h): por_hab[h] for h in sorted(por_hab)},
+        # [min, max): max None = sin tope
+        "precio": [
+            {"min": limites[k], "max": limites[k + 1], "count": por_bucket[k]}
+            for k in range(len(por_bucket))
+        ],
+    }
 
-    if zona:
-        z = session.exec(select(Zona).where(Zona.nombre == zona)).first()
-        if not z:
-            return []
-        stmt = stmt.where(Inmueble.zona_id == z.id)
 
-    if precio_min is not None:
-        stmt = stmt.where(Inmueble.precio_cop >= precio_min)
+@router.get("/facets")
+def facetas_inmuebles(
+    request: Request,
+    filtros: FiltrosInmueble = Depends(filtros_inmueble),
+    buckets: Optional[str] = Query(
+        default=None,
+        description="Cortes de precio separados por coma (ej: 2000000,3000000)",
+    ),
+    session: Session = Depends(get_read_session),
+):
+    """
+    Conteos por tipo, zona, habitaciones y rango de precio con los
+    mismos filtros del listado. Cacheado por filtros normalizados.
+    """
+    cortes = parse_buckets(buckets)
+    key = (filtros, cortes)
+    version = catalog_version()
 
-    if precio_max is not None:
-        stmt = stmt.where(Inmueble.precio_cop <= precio_max)
+    hit = _FACETS_CACHE.get(key)
+    if hit and hit[0] == version:
+        content = hit[1]
+    else:
+        content = encode_json(calcular_facetas(session, filtros, cortes))
+        if len(_FACETS_CACHE) >= _FACETS_CACHE_MAX:
+            _FACETS_CACHE.clear()
+        _FACETS_CACHE[key] = (version, content)
 
-    inmuebles = session.exec(stmt).all()
-    out: List[dict] = []
+    return cached_json_response(request, content)
 
-    for i in inmuebles:
-        z = session.get(Zona, i.zona_id)
-        out.append(inmueble_to_dict(i, z))
 
-    return out
+# ======================================================
+# CLUSTERS PARA EL MAPA
+# ======================================================
+
+@router.get("/clusters")
+def clusters_inmuebles(
+    request: Request,
+    zoom: int = Query(..., ge=clusters.ZOOM_MIN, le=clusters.ZOOM_MAX),
+    filtros: FiltrosInmueble = Depends(filtros_inmueble),
+    session: Session = Depends(get_read_session),
+):
+    """
+    Marcadores agregados (conteo, centroide, precio min/max) para el
+    zoom y viewport (bbox) del mapa.
+    - Sin más filtros que bbox: jerarquía precalculada por zoom.
+    - Con filtros: GROUP BY zona filtrado y agrupación al vuelo.
+    """
+    solo_viewport = replace(filtros, bbox=None) == FiltrosInmueble()
+
+    if solo_viewport:
+        data = clusters.clusters(zoom, filtros.bbox)
+    else:
+        stats = clusters.stats_por_zona(session, lambda stmt: aplicar_filtros(stmt, filtros))
+        data = clusters.clusters(zoom, filtros.bbox, stats)
+
+    return cached_json_response(request, encode_json(data))
+
+
+# ======================================================
+# DETALLE EN LOTE (FAVORITOS, COMPARADOR, CHATBOT)
+# ======================================================
+
+BATCH_MAX = 100
+
+
+class BatchIn(BaseModel):
+    ids: List[int] = []
+
+
+def parse_ids(ids: Optional[str]) -> List[int]:
+    try:
+        return [int(x) for x in (ids or "").split(",") if x.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids: enteros separados por coma")
+
+
+def payload_batch(session: Session, ids: List[int]) -> bytes:
+    """
+    {"items": [...], "missing": [...]} en el orden pedido (sin repetidos).
+    Inmuebles + zonas en una sola consulta (JOIN), vía payload cache.
+    """
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"ids: máximo {BATCH_MAX} por llamada")
+    # GET y POST: fuera de int64 el bind da OverflowError (500)
+    if not all(1 <= x <= INT64_MAX for x in ids):
+        raise HTTPException(status_code=400, detail=f"ids: enteros entre 1 y {INT64_MAX}")
+
+    payloads = dict(zip(ids, payloads_por_id(session, ids)))
+    encontrados = [payloads[x] for x in ids if payloads[x] is not None]
+    missing = [x for x in ids if payloads[x] is None]
+
+    return (
+        b'{"items":' + json_array(encontrados)
+        + b',"missing":' + encode_json(missing) + b"}"
+    )
+
+
+@router.get("/batch")
+def obtener_inmuebles_batch(
+    request: Request,
+    ids: str = Query(..., description=f"Ids separados por coma (máx {BATCH_MAX})"),
+    session: Session = Depends(get_read_session),
+):
+    return cached_json_response(request, payload_batch(session, parse_ids(ids)))
+
+
+@router.post("/batch")
+def obtener_inmuebles_batch_post(
+    payload: BatchIn,
+    session: Session = Depends(get_read_session),
+):
+    return Response(content=payload_batch(session, payload.ids), media_type="application/json")
 
 
 # ======================================================
@@ -183,9 +964,10 @@ def listar_inmuebles(
 # ======================================================
 
 @router.get("/{inmueble_id}")
-def obtener_inmueble(
+async def obtener_inmueble(
+    request: Request,
     inmueble_id: int,
-    session: Session = Depends(get_session)
+    db: Db = Depends(get_db)
 ):
     """
     API detalle:
@@ -193,41 +975,68 @@ def obtener_inmueble(
     - Schema PRO
     """
 
-    i = session.get(Inmueble, inmueble_id)
-    if not i or not i.publicado:
+    payloads = await db.run(payloads_inmuebles, [inmueble_id])
+    if not payloads:
         raise HTTPException(status_code=404, detail="Inmueble no encontrado")
 
-    z = session.get(Zona, i.zona_id)
-    return inmueble_to_dict(i, z)
+    return cached_json_response(request, payloads[0])
 
 
 # ======================================================
 # URL SEO LIMPIA + REDIRECCIÓN 301 DEFINITIVA
 # ======================================================
 
+def resolver_url_publica(session: Session, ruta: str) -> Tuple[Optional[int], Optional[str]]:
+    """
+    /inmueble/{id}-{slug} → (id, redirección).
+
+    - Ruta canónica: una lectura por ux_inmueble_url_publica → (id, None).
+    - Slug viejo o mal escrito: lectura por PK con el id del prefijo →
+      (id, url_publica actual) para el 301.
+    - (None, None): no existe o no está publicado.
+    """
+    inmueble_id = session.exec(
+        select(Inmueble.id).where(Inmueble.url_publica == ruta, Inmueble.publicado == True)  # noqa
+    ).first()
+    if inmueble_id is not None:
+        return inmueble_id, None
+
+    prefijo = ruta.rsplit("/", 1)[-1].split("-", 1)[0]
+    if not prefijo.isdigit():
+        return None, None
+    canonica = session.exec(
+        select(Inmueble.url_publica).where(Inmueble.id == int(prefijo), Inmueble.publicado == True)  # noqa
+    ).first()
+    if not canonica:
+        return None, None
+    return int(prefijo), canonica
+
+
 @router.get("/seo/{inmueble_id}-{slug}", include_in_schema=False)
 def inmueble_seo_redirect(
     inmueble_id: int,
     slug: str,
-    session: Session = Depends(get_session),
+    session: Session = Depends(get_read_session),
 ):
     """
     Endpoint SEO:
     - Valida slug
     - Fuerza URL canónica
     - Redirección 301 definitiva
+
+    Una lectura por PK de las columnas persistidas (sin JOIN a zona).
     """
 
-    i = session.get(Inmueble, inmueble_id)
-    if not i or not i.publicado:
+    row = session.exec(
+        select(Inmueble.slug, Inmueble.url_publica)
+        .where(Inmueble.id == inmueble_id, Inmueble.publicado == True)  # noqa
+    ).first()
+    if not row:
         raise HTTPException(status_code=404)
 
-    z = session.get(Zona, i.zona_id)
-    canonical_path = build_public_url(i, z)
+    expected_slug, canonical_path = row
     canonical_url = f"{PUBLIC_BASE_URL}{canonical_path}"
 
-    expected_slug = build_inmueble_slug(i, z)
-
     # Slug incorrecto → 301
     if slug != expected_slug:
         return RedirectResponse(
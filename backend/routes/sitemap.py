@@ -1,80 +1,93 @@
-from fastapi import APIRouter, Response
+from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
 from datetime import datetime
-import xml.etree.ElementTree as ET
-import requests
+from typing import Iterator
+from xml.sax.saxutils import escape
+from urllib.parse import quote
+
+from sqlmodel import Session, select
+
+from db.database import read_engine
+from models.inmueble import Inmueble, Zona
 
 router = APIRouter()
 
 BASE_URL = "https://www.tusitio.com"  # 🔴 CAMBIA ESTO
-API_INMUEBLES = "http://127.0.0.1:8000/api/inmuebles"
+
+# Filas por lote (cursor de servidor): memoria constante
+SITEMAP_YIELD_PER = 1000
 
 
 def iso_date(dt: datetime | None = None) -> str:
     return (dt or datetime.utcnow()).date().isoformat()
 
 
-@router.get("/sitemap.xml", include_in_schema=False)
-def sitemap():
-    urlset = ET.Element(
-        "urlset",
-        xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"
+def url_xml(loc: str, lastmod: str, priority="0.8", changefreq="weekly") -> str:
+    return (
+        "<url>"
+        f"<loc>{escape(loc)}</loc>"
+        f"<lastmod>{lastmod}</lastmod>"
+        f"<changefreq>{changefreq}</changefreq>"
+        f"<priority>{priority}</priority>"
+        "</url>"
     )
 
-    def add_url(loc: str, lastmod: str, priority="0.8", changefreq="weekly"):
-        url = ET.SubElement(urlset, "url")
-        ET.SubElement(url, "loc").text = loc
-        ET.SubElement(url, "lastmod").text = lastmod
-        ET.SubElement(url, "changefreq").text = changefreq
-        ET.SubElement(url, "priority").text = priority
 
-    # ─────────────────────────────────────────────
-    # URLs FIJAS
-    # ─────────────────────────────────────────────
-    add_url(f"{BASE_URL}/", iso_date(), "1.0", "daily")
-    add_url(f"{BASE_URL}/listado.html", iso_date(), "0.9", "daily")
+def iter_sitemap() -> Iterator[bytes]:
+    """
+    Directo de la BD (réplica de lectura), sin HTTP al propio API:
+    ids de inmuebles por lotes + nombres de zona con inmuebles.
+    """
+    lastmod = iso_date()
 
-    # ─────────────────────────────────────────────
-    # INMUEBLES + BARRIOS
-    # ─────────────────────────────────────────────
-    try:
-        inmuebles = requests.get(API_INMUEBLES, timeout=10).json()
-    except Exception:
-        inmuebles = []
-
-    zonas = set()
-
-    for i in inmuebles:
-        inmueble_id = i.get("id")
-        zona = i.get("zona", {}).get("nombre")
-        lastmod = iso_date()
-
-        # Detalle inmueble
-        if inmueble_id:
-            add_url(
-                f"{BASE_URL}/inmueble.html?id={inmueble_id}",
-                lastmod,
-                "0.7",
-                "weekly"
-            )
-
-        # Guardamos zona para listado por barrio
-        if zona:
-            zonas.add(zona)
+    yield (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+    ).encode("utf-8")
 
     # ─────────────────────────────────────────────
-    # LISTADOS POR BARRIO (SEO POR ZONA)
+    # URLs FIJAS
     # ─────────────────────────────────────────────
-    for zona in zonas:
-        add_url(
-            f"{BASE_URL}/listado.html?zona={zona.replace(' ', '%20')}",
-            iso_date(),
-            "0.8",
-            "daily"
+    yield (
+        url_xml(f"{BASE_URL}/", lastmod, "1.0", "daily")
+        + url_xml(f"{BASE_URL}/listado.html", lastmod, "0.9", "daily")
+    ).encode("utf-8")
+
+    with Session(read_engine) as session:
+        # ─────────────────────────────────────────────
+        # INMUEBLES (solo id)
+        # ─────────────────────────────────────────────
+        stmt = (
+            select(Inmueble.id)
+            .where(Inmueble.publicado == True)  # noqa
+            .order_by(Inmueble.id)
+            .execution_options(stream_results=True, yield_per=SITEMAP_YIELD_PER)
         )
+        for lote in session.exec(stmt).partitions():
+            yield "".join(
+                url_xml(f"{BASE_URL}/inmueble.html?id={inmueble_id}", lastmod, "0.7", "weekly")
+                for inmueble_id in lote
+            ).encode("utf-8")
+
+        # ─────────────────────────────────────────────
+        # LISTADOS POR BARRIO (SEO POR ZONA)
+        # ─────────────────────────────────────────────
+        con_inmuebles = select(Inmueble.zona_id).where(Inmueble.publicado == True)  # noqa
+        zonas = session.exec(
+            select(Zona.nombre).where(Zona.id.in_(con_inmuebles)).distinct()
+        ).all()
+        yield "".join(
+            url_xml(f"{BASE_URL}/listado.html?zona={quote(zona)}", lastmod, "0.8", "daily")
+            for zona in zonas
+            if zona
+        ).encode("utf-8")
+
+    yield b"</urlset>"
 
-    xml_bytes = ET.tostring(urlset, encoding="utf-8", xml_declaration=True)
 
-    return Response(
-        content=xml_bytes,
+@router.get("/sitemap.xml", include_in_schema=False)
+def sitemap():
+    return StreamingResponse(
+        iter_sitemap(),
         media_type="application/xml"
     )
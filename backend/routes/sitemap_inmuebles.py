@@ -2,11 +2,18 @@ from __future__ import annotations
 
 import os
 from datetime import datetime
-from typing import List
+from typing import AsyncIterator, Iterator
+from xml.sax.saxutils import escape
 
-from fastapi import APIRouter, Response
+import anyio
+from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import iterate_in_threadpool
+from sqlmodel import Session, select
 
-import requests
+from db.database import read_engine
+from models.inmueble import Inmueble
+from services.slugs import ruta_inmueble
 
 # ======================================================
 # Router
@@ -23,10 +30,74 @@ PUBLIC_BASE_URL = os.getenv(
     "http://127.0.0.1:8000"
 )
 
-API_INMUEBLES_URL = f"{PUBLIC_BASE_URL}/api/inmuebles"
-
 LASTMOD = datetime.utcnow().strftime("%Y-%m-%d")
 
+# Filas por lote (cursor de servidor): memoria constante
+SITEMAP_YIELD_PER = 1000
+
+# Sitemaps simultáneos. Como el export (routes/inmuebles.py): cada uno
+# retiene una conexión de read_engine mientras dura el stream; sin tope,
+# muchos crawlers a la vez agotan el pool. Los que esperan turno esperan
+# en el event loop, sin hilo ni conexión.
+SITEMAP_CONCURRENCIA = int(os.getenv("SITEMAP_CONCURRENCIA", "2"))
+_sitemap_turnos = anyio.Semaphore(SITEMAP_CONCURRENCIA)
+
+SITEMAP_INICIO = b"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset
+    xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"
+>
+"""
+SITEMAP_FIN = b"</urlset>\n"
+
+
+def url_xml(loc: str) -> str:
+    return (
+        "<url>\n"
+        f"    <loc>{escape(loc)}</loc>\n"
+        f"    <lastmod>{LASTMOD}</lastmod>\n"
+        "    <changefreq>weekly</changefreq>\n"
+        "    <priority>0.8</priority>\n"
+        "</url>\n"
+    )
+
+
+def iter_sitemap_inmuebles() -> Iterator[bytes]:
+    """
+    Directo de la BD (réplica de lectura): solo id + slug + url_publica
+    de los publicados, por lotes, un bloque XML por lote.
+    Sin pasar por /api/inmuebles.
+    Abre su propia sesión: el generador vive más que el handler.
+    """
+    stmt = (
+        select(Inmueble.id, Inmueble.slug, Inmueble.url_publica)
+        .where(Inmueble.publicado == True)  # noqa
+        .order_by(Inmueble.id)
+        .execution_options(stream_results=True, yield_per=SITEMAP_YIELD_PER)
+    )
+
+    yield SITEMAP_INICIO
+    with Session(read_engine) as session:
+        for lote in session.exec(stmt).partitions():
+            partes = []
+            for inmueble_id, slug, url_publica in lote:
+                # url_publica la llenan los eventos / migración 2
+                ruta = url_publica or (ruta_inmueble(inmueble_id, slug) if slug else None)
+                if ruta:
+                    partes.append(url_xml(f"{PUBLIC_BASE_URL}{ruta}"))
+            if partes:
+                yield "".join(partes).encode("utf-8")
+    yield SITEMAP_FIN
+
+
+async def _sitemap_con_turno(partes: Iterator[bytes]) -> AsyncIterator[bytes]:
+    async with _sitemap_turnos:
+        try:
+            async for parte in iterate_in_threadpool(partes):
+                yield parte
+        finally:
+            # Cliente desconectado: cerrar la sesión ya, no en el GC
+            partes.close()
+
 
 # ======================================================
 # Sitemap Inmuebles (URL limpia)
@@ -36,7 +107,7 @@ LASTMOD = datetime.utcnow().strftime("%Y-%m-%d")
     "/sitemap-inmuebles.xml",
     include_in_schema=False
 )
-def sitemap_inmuebles():
+async def sitemap_inmuebles():
     """
     Sitemap de inmuebles usando URL pública canónica:
       /inmueble/{id}-{slug}
@@ -46,42 +117,7 @@ def sitemap_inmuebles():
     ✔ Compatible con Search Console
     ✔ Preparado para expansión futura
     """
-
-    try:
-        resp = requests.get(API_INMUEBLES_URL, timeout=10)
-        resp.raise_for_status()
-        inmuebles: List[dict] = resp.json()
-    except Exception:
-        # En caso de error, no rompemos Google
-        inmuebles = []
-
-    urls_xml = []
-
-    for i in inmuebles:
-        url_publica = i.get("url_publica")
-        if not url_publica:
-            continue
-
-        urls_xml.append(
-            f"""
-            <url>
-                <loc>{PUBLIC_BASE_URL}{url_publica}</loc>
-                <lastmod>{LASTMOD}</lastmod>
-                <changefreq>weekly</changefreq>
-                <priority>0.8</priority>
-            </url>
-            """.strip()
-        )
-
-    xml = f"""<?xml version="1.0" encoding="UTF-8"?>
-<urlset
-    xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"
->
-{chr(10).join(urls_xml)}
-</urlset>
-"""
-
-    return Response(
-        content=xml.strip(),
+    return StreamingResponse(
+        _sitemap_con_turno(iter_sitemap_inmuebles()),
         media_type="application/xml"
     )
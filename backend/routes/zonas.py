@@ -1,25 +1,49 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlmodel import Session, select
 
-from db.database import get_session
+from db.database import Db, get_db
 from models.inmueble import Zona
+from services.http_cache import cached_json_response
+from services.json_cache import encode_json
 
-router = APIRouter(prefix="/api/zonas", tags=["zonas"])
+router = APIRouter(prefix="/zonas", tags=["zonas"])
 
 
-@router.get("")
-def listar_zonas(session: Session = Depends(get_session)):
+def zona_to_dict(z: Zona) -> dict:
+    return {
+        "id": z.id,
+        "nombre": z.nombre,
+        "slug": z.slug,
+        "ciudad": z.ciudad,
+        "lat": z.lat,
+        "lng": z.lng,
+        "radio_m": z.radio_m,
+    }
+
+
+def zonas_json(session: Session) -> bytes:
     zonas = session.exec(select(Zona)).all()
-    return [
-        {
-            "id": z.id,
-            "nombre": z.nombre,
-            "ciudad": z.ciudad,
-            "lat": z.lat,
-            "lng": z.lng,
-            "radio_m": z.radio_m,
-        }
-        for z in zonas
-    ]
+    return encode_json([zona_to_dict(z) for z in zonas])
+
+
+def zona_por_slug_json(session: Session, slug: str) -> Optional[bytes]:
+    # ux_zona_slug: una lectura indexada
+    z = session.exec(select(Zona).where(Zona.slug == slug)).first()
+    return encode_json(zona_to_dict(z)) if z else None
+
+
+@router.get("")
+async def listar_zonas(request: Request, db: Db = Depends(get_db)):
+    return cached_json_response(request, await db.run(zonas_json))
+
+
+@router.get("/{slug}")
+async def obtener_zona(request: Request, slug: str, db: Db = Depends(get_db)):
+    content = await db.run(zona_por_slug_json, slug)
+    if content is None:
+        raise HTTPException(status_code=404, detail="Zona no encontrada")
+    return cached_json_response(request, content)
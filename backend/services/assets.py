@@ -0,0 +1,234 @@
+"""
+Assets con hash de contenido + shells HTML en memoria.
+
+- Manifest: css/styles.css → css/styles.<hash>.css (hash del contenido).
+  Las URLs con hash se sirven en /assets/... con caché inmutable de un
+  año: si el archivo cambia, cambia la URL. No se copian archivos: la
+  ruta con hash resuelve al original (y a sus .br / .gz precomprimidos).
+- Shells: index.html, listado.html e inmueble.html se leen una vez, se
+  reescriben sus referencias a css/ y js/ con las rutas del manifest y
+  se guardan en memoria ya comprimidos. Se sirven con no-cache + ETag
+  (siempre revalidados, 304 si no cambiaron).
+- Bootstrap: un shell puede servirse con el payload inicial embebido
+  (<script id="bootstrap" type="application/json"> antes de </head>),
+  ver services/bootstrap.py. El punto de corte se calcula al arrancar:
+  por request solo se concatenan bytes.
+
+Visitas repetidas: el HTML revalida (304) y los assets salen de caché
+del navegador sin request.
+
+CLI (build / inspección):
+    python -m services.assets ../frontend
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import re
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Mapping, Optional
+
+from fastapi import Request, Response
+
+from services import compresion
+from services.http_cache import etag_for, etag_matches
+from services.json_cache import encode_json
+
+
+ASSETS_PREFIX = "/assets/"
+CACHE_CONTROL_INMUTABLE = "public, max-age=31536000, immutable"
+CACHE_CONTROL_HTML = "no-cache"
+
+# Carpetas de frontend/ con assets versionables
+CARPETAS_ASSETS = ("css", "js")
+HASH_LARGO = 10
+
+SHELLS = ("index.html", "listado.html", "inmueble.html")
+
+# Punto de inyección del bootstrap
+CIERRE_HEAD = b"</head>"
+
+# href="./css/x.css" | src="/js/x.js" | href="css/x.css"
+_REF_ASSET = re.compile(r'(?P<attr>href|src)="(?:\./|/)?(?P<path>(?:css|js)/[^"?#]+)"')
+
+
+# ======================================================
+# MANIFEST
+# ======================================================
+
+def nombre_con_hash(relativo: str, contenido: bytes) -> str:
+    """
+    css/styles.css → css/styles.3f2a1b9c0d.css
+    """
+    h = hashlib.blake2b(contenido, digest_size=16).hexdigest()[:HASH_LARGO]
+    base, punto, ext = relativo.rpartition(".")
+    return f"{base}.{h}.{ext}" if punto else f"{relativo}.{h}"
+
+
+def construir_manifest(frontend_dir: Path) -> Dict[str, str]:
+    """
+    {ruta original relativa: ruta con hash relativa} para css/ y js/.
+    """
+    manifest: Dict[str, str] = {}
+    for carpeta in CARPETAS_ASSETS:
+        base = frontend_dir / carpeta
+        if not base.is_dir():
+            continue
+        for archivo in sorted(base.rglob("*")):
+            if not archivo.is_file() or archivo.suffix not in (".css", ".js"):
+                continue
+            relativo = archivo.relative_to(frontend_dir).as_posix()
+            manifest[relativo] = nombre_con_hash(relativo, archivo.read_bytes())
+    return manifest
+
+
+def reescribir_refs(html: str, manifest: Dict[str, str]) -> str:
+    def sub(m: re.Match) -> str:
+        versionado = manifest.get(m.group("path"))
+        if versionado is None:
+            return m.group(0)
+        return f'{m.group("attr")}="{ASSETS_PREFIX}{versionado}"'
+
+    return _REF_ASSET.sub(sub, html)
+
+
+def script_bootstrap(datos: Mapping[str, bytes]) -> bytes:
+    """
+    {path API: payload JSON ya serializado} → bloque <script> inline.
+    Los payloads no se vuelven a serializar; "<" se escapa (\\u003c)
+    para que ningún texto cierre el <script>.
+    """
+    cuerpo = b"{" + b",".join(encode_json(k) + b":" + v for k, v in datos.items()) + b"}"
+    cuerpo = cuerpo.replace(b"<", b"\\u003c")
+    return b'<script id="bootstrap" type="application/json">' + cuerpo + b"</script>\n"
+
+
+# ======================================================
+# SHELLS HTML EN MEMORIA
+# ======================================================
+
+@dataclass(frozen=True)
+class Shell:
+    html: bytes
+    gzip: bytes
+    br: Optional[bytes]
+    etag: str
+    # Offset de </head> (inyección del bootstrap)
+    corte: int
+
+    @classmethod
+    def desde_html(cls, html: str) -> "Shell":
+        data = html.encode("utf-8")
+        return cls(
+            html=data,
+            gzip=gzip.compress(data, compresslevel=compresion.GZIP_NIVEL_ESTATICO, mtime=0),
+            br=(
+                compresion.brotli.compress(data, quality=compresion.BROTLI_CALIDAD_ESTATICO)
+                if compresion.brotli is not None
+                else None
+            ),
+            etag=etag_for(data),
+            corte=max(data.rfind(CIERRE_HEAD), 0),
+        )
+
+    def response(self, request: Request, headers: Optional[Dict[str, str]] = None) -> Response:
+        out = {
+            **(headers or {}),
+            "Cache-Control": CACHE_CONTROL_HTML,
+            "Vary": "Accept-Encoding",
+        }
+
+        encodings = compresion.encodings_aceptados(request.headers.get("accept-encoding", ""))
+        body, etag = self.html, self.etag
+        for encoding in encodings:
+            variante = self.br if encoding == "br" else self.gzip
+            if variante is not None:
+                body = variante
+                etag = compresion.etag_con_encoding(self.etag, encoding)
+                out["Content-Encoding"] = encoding
+                break
+        out["ETag"] = etag
+
+        if etag_matches(request, self.etag):
+            out.pop("Content-Encoding", None)
+            return Response(status_code=304, headers=out)
+
+        return Response(content=body, media_type="text/html; charset=utf-8", headers=out)
+
+    def response_bootstrap(
+        self,
+        request: Request,
+        datos: Mapping[str, bytes],
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Response:
+        """
+        Shell + payload inicial inline. Dinámico: lo comprime
+        CompresionMiddleware; ETag del HTML final.
+        """
+        if not datos:
+            return self.response(request, headers)
+
+        body = self.html[: self.corte] + script_bootstrap(datos) + self.html[self.corte :]
+
+        etag = etag_for(body)
+        out = {
+            **(headers or {}),
+            "Cache-Control": CACHE_CONTROL_HTML,
+            "ETag": etag,
+        }
+        if etag_matches(request, etag):
+            return Response(status_code=304, headers=out)
+
+        return Response(content=body, media_type="text/html; charset=utf-8", headers=out)
+
+
+class Assets:
+    """
+    Manifest + shells de un directorio frontend/. Se arma al arrancar.
+    """
+
+    def __init__(self, frontend_dir: Path):
+        self.frontend_dir = frontend_dir
+        self.manifest = construir_manifest(frontend_dir)
+        self.por_hash = {v: k for k, v in self.manifest.items()}
+        self.shells: Dict[str, Shell] = {}
+        for nombre in SHELLS:
+            path = frontend_dir / nombre
+            if path.is_file():
+                html = reescribir_refs(path.read_text(encoding="utf-8"), self.manifest)
+                self.shells[nombre] = Shell.desde_html(html)
+
+    def shell(self, nombre: str) -> Shell:
+        return self.shells[nombre]
+
+    def url(self, relativo: str) -> str:
+        """
+        css/styles.css → /assets/css/styles.<hash>.css (o /css/styles.css
+        si no está en el manifest). Para plantillas SSR.
+        """
+        versionado = self.manifest.get(relativo)
+        return f"{ASSETS_PREFIX}{versionado}" if versionado else f"/{relativo}"
+
+    def response_asset(self, request: Request, versionado: str) -> Response:
+        """
+        /assets/css/styles.<hash>.css → frontend/css/styles.css, inmutable.
+        Un hash viejo (otro deploy) da 404: nunca se sirve contenido
+        distinto bajo la misma URL.
+        """
+        original = self.por_hash.get(versionado)
+        if original is None:
+            return Response(status_code=404)
+        return compresion.file_response(
+            self.frontend_dir / original,
+            request.headers.get("accept-encoding", ""),
+            headers={"Cache-Control": CACHE_CONTROL_INMUTABLE},
+        )
+
+
+if __name__ == "__main__":
+    destino = Path(sys.argv[1] if len(sys.argv) > 1 else "../frontend")
+    print(json.dumps(construir_manifest(destino), indent=2))
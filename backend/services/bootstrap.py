@@ -0,0 +1,123 @@
+"""
+Payload inicial embebido en los shells HTML (sin round-trip a la API).
+
+Cada página lleva los mismos JSON que su JS pediría al cargar, con la
+llave = path exacto del request ("/api/inmuebles?limit=6"). El apiGet()
+del frontend mira primero ese bloque y solo va a la red si no está.
+
+Los payloads salen del cache de bytes (payloads_inmuebles /
+pagina_inmuebles): no se vuelve a serializar nada.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Dict, List, Mapping, Optional, Tuple
+from urllib.parse import urlencode
+
+from sqlmodel import Session
+
+from routes.inmuebles import (
+    PAGE_SIZE_MAX,
+    FiltrosInmueble,
+    pagina_inmuebles,
+    payloads_inmuebles,
+    resolver_orden,
+    resolver_url_publica,
+)
+from routes.zonas import zonas_json
+from services.json_cache import encode_json, json_array
+
+
+BOOTSTRAP_INICIAL = os.getenv("BOOTSTRAP_INICIAL", "1").lower().strip() in (
+    "1", "true", "yes", "on"
+)
+
+# Lo que pide buscador.js en el home (loadZonasToSelect / loadDestacados)
+HOME_DESTACADOS = 6
+
+
+# Llave "{path}#pagina": {"total", "next"} de la primera página. En la
+# API van en X-Total-Count / X-Next-Cursor; el bootstrap no tiene headers
+SUFIJO_PAGINA = "#pagina"
+
+
+def _pagina(session: Session, filtros: FiltrosInmueble, limit: int) -> Tuple[bytes, bytes]:
+    orden = resolver_orden(None, filtros)
+    payloads, next_cursor, total = pagina_inmuebles(session, filtros, orden, None, limit, None)
+    return json_array(payloads), encode_json({"total": total, "next": next_cursor})
+
+
+def _listado(session: Session, filtros: FiltrosInmueble, limit: int) -> bytes:
+    return _pagina(session, filtros, limit)[0]
+
+
+def _entero(valor: Optional[str]) -> Optional[int]:
+    if not valor:
+        return None
+    try:
+        return int(valor)
+    except ValueError:
+        return None
+
+
+def bootstrap_home(session: Session) -> Dict[str, bytes]:
+    return {
+        "/api/zonas": zonas_json(session),
+        f"/api/inmuebles?limit={HOME_DESTACADOS}": _listado(
+            session, FiltrosInmueble(), HOME_DESTACADOS
+        ),
+    }
+
+
+def bootstrap_listado(session: Session, query: Mapping[str, str]) -> Dict[str, bytes]:
+    """
+    Mismos parámetros (y en el mismo orden) que loadListado():
+    ?zona=&tipo=&precio=&hab= → /api/inmuebles?limit=100&zona=...
+    más "{path}#pagina" con el total y el cursor de la página siguiente.
+    """
+    precio = _entero(query.get("precio"))
+    hab = _entero(query.get("hab"))
+    if (query.get("precio") and precio is None) or (query.get("hab") and hab is None):
+        # La API respondería 422: que lo resuelva el JS
+        return {}
+
+    params: List[Tuple[str, str]] = [("limit", str(PAGE_SIZE_MAX))]
+    if query.get("zona"):
+        params.append(("zona", query["zona"]))
+    if query.get("tipo"):
+        params.append(("tipo", query["tipo"]))
+    if precio is not None:
+        params.append(("precio_max", query["precio"]))
+    if hab is not None:
+        params.append(("habitaciones_min", query["hab"]))
+
+    filtros = FiltrosInmueble(
+        zona=query.get("zona") or None,
+        tipo=query["tipo"].lower() if query.get("tipo") else None,
+        precio_max=precio,
+        habitaciones_min=hab,
+    )
+    path = f"/api/inmuebles?{urlencode(params)}"
+    items, pagina = _pagina(session, filtros, PAGE_SIZE_MAX)
+    return {path: items, path + SUFIJO_PAGINA: pagina}
+
+
+def bootstrap_detalle(
+    session: Session,
+    ruta: str,
+    con_payload: bool = True,
+) -> Tuple[Optional[str], Dict[str, bytes]]:
+    """
+    /inmueble/{id}-{slug} → (redirección, {"/api/inmuebles/{id}": payload}).
+
+    La ruta se resuelve por url_publica (resolver_url_publica): si no es
+    la canónica, redirección = url_publica actual (301) y sin payload.
+    Sin payload si no existe (el JS muestra "no encontrado" con la
+    respuesta 404 de la API) o con con_payload=False (shell sin bootstrap).
+    """
+    inmueble_id, redireccion = resolver_url_publica(session, ruta)
+    if redireccion or inmueble_id is None or not con_payload:
+        return redireccion, {}
+    payloads = payloads_inmuebles(session, [inmueble_id])
+    return None, ({f"/api/inmuebles/{inmueble_id}": payloads[0]} if payloads else {})
@@ -0,0 +1,219 @@
+"""
+Catálogo columnar en memoria (opcional).
+
+Snapshot de los inmuebles publicados como arrays NumPy:
+precio_cop, area_m2, habitaciones, banos, tipo (código) y zona_id.
+El listado filtra, ordena y cuenta con máscaras vectorizadas y solo
+va a la BD para hidratar la página pedida (un SELECT ... IN por PK).
+
+- Activar con CATALOGO_MEMORIA=1 (requiere numpy).
+- El snapshot se reconstruye cuando cambia catalog_version() y se
+  reemplaza de forma atómica (una sola referencia).
+- Búsqueda de texto (q) NO se resuelve aquí: sigue en FTS5.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from sqlmodel import Session, select
+
+from db.database import al_preparar_lectura, catalog_version, en_event_loop, read_engine
+from models.inmueble import Inmueble, Zona
+
+try:
+    import numpy as np
+except ImportError:  # numpy es opcional
+    np = None
+
+
+CATALOGO_MEMORIA = os.getenv("CATALOGO_MEMORIA", "0").lower().strip() in (
+    "1", "true", "yes", "on"
+)
+
+
+def catalogo_activo() -> bool:
+    return CATALOGO_MEMORIA and np is not None
+
+
+# ======================================================
+# SNAPSHOT
+# ======================================================
+
+@dataclass(frozen=True)
+class Snapshot:
+    version: int
+    ids: "np.ndarray"
+    precio_cop: "np.ndarray"
+    area_m2: "np.ndarray"
+    habitaciones: "np.ndarray"
+    banos: "np.ndarray"
+    tipo: "np.ndarray"              # código → tipos[código]
+    zona_id: "np.ndarray"
+    tipos: Dict[str, int]
+    zonas_por_nombre: Dict[str, List[int]]
+    # orden ascendente (columna, id) precalculado por columna
+    ordenes: Dict[str, "np.ndarray"]
+
+    def columna(self, nombre: str) -> "np.ndarray":
+        return getattr(self, nombre)
+
+
+def construir_snapshot() -> Snapshot:
+    version = catalog_version()
+
+    with Session(read_engine) as session:
+        rows = session.exec(
+            select(
+                Inmueble.id,
+                Inmueble.precio_cop,
+                Inmueble.area_m2,
+                Inmueble.habitaciones,
+                Inmueble.banos,
+                Inmueble.tipo,
+                Inmueble.zona_id,
+            )
+            .where(Inmueble.publicado == True)  # noqa
+            .order_by(Inmueble.id)
+        ).all()
+        zonas = session.exec(select(Zona.id, Zona.nombre)).all()
+
+    tipos: Dict[str, int] = {}
+    tipo_codes = [tipos.setdefault(r[5], len(tipos)) for r in rows]
+
+    zonas_por_nombre: Dict[str, List[int]] = {}
+    for zid, nombre in zonas:
+        zonas_por_nombre.setdefault(nombre, []).append(zid)
+
+    ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+    precio = np.fromiter((r[1] for r in rows), dtype=np.int64, count=len(rows))
+    area = np.fromiter((r[2] for r in rows), dtype=np.int64, count=len(rows))
+
+    return Snapshot(
+        version=version,
+        ids=ids,
+        precio_cop=precio,
+        area_m2=area,
+        habitaciones=np.fromiter((r[3] for r in rows), dtype=np.int32, count=len(rows)),
+        banos=np.fromiter((r[4] for r in rows), dtype=np.int32, count=len(rows)),
+        tipo=np.array(tipo_codes, dtype=np.int16),
+        zona_id=np.fromiter((r[6] for r in rows), dtype=np.int64, count=len(rows)),
+        tipos=tipos,
+        zonas_por_nombre=zonas_por_nombre,
+        ordenes={
+            # ids ya viene ordenado: el orden por id es la identidad
+            "id": np.arange(len(rows), dtype=np.int64),
+            "precio_cop": np.lexsort((ids, precio)),
+            "area_m2": np.lexsort((ids, area)),
+        },
+    )
+
+
+_snapshot: Optional[Snapshot] = None
+_lock = threading.Lock()
+
+
+def get_snapshot() -> Snapshot:
+    """
+    Devuelve el snapshot vigente; si el catálogo cambió lo reconstruye
+    (un solo hilo construye, el resto espera y reutiliza).
+    """
+    global _snapshot
+    snap = _snapshot
+    # En el event loop (DB_ASYNC) sin I/O ni lock: el último snapshot;
+    # Db.run lo reconstruye antes en un hilo si estaba vencido
+    if snap is not None and (snap.version == catalog_version() or en_event_loop()):
+        return snap
+
+    with _lock:
+        snap = _snapshot
+        if snap is None or snap.version != catalog_version():
+            snap = construir_snapshot()
+            _snapshot = snap  # swap atómico
+    return snap
+
+
+def snapshot_vencido() -> bool:
+    return catalogo_activo() and (_snapshot is None or _snapshot.version != catalog_version())
+
+
+al_preparar_lectura(snapshot_vencido, get_snapshot)
+
+
+# ======================================================
+# CONSULTA
+# ======================================================
+
+def _mascara_filtros(snap: Snapshot, f) -> "np.ndarray":
+    mask = np.ones(len(snap.ids), dtype=bool)
+
+    if f.tipo:
+        code = snap.tipos.get(f.tipo)
+        if code is None:
+            return np.zeros(len(snap.ids), dtype=bool)
+        mask &= snap.tipo == code
+
+    if f.zona:
+        zona_ids = snap.zonas_por_nombre.get(f.zona)
+        if not zona_ids:
+            return np.zeros(len(snap.ids), dtype=bool)
+        mask &= np.isin(snap.zona_id, zona_ids)
+
+    if f.precio_min is not None:
+        mask &= snap.precio_cop >= f.precio_min
+
+    if f.precio_max is not None:
+        mask &= snap.precio_cop <= f.precio_max
+
+    if f.habitaciones_min is not None:
+        mask &= snap.habitaciones >= f.habitaciones_min
+
+    zona_ids = f.zonas_geo()
+    if zona_ids is not None:
+        mask &= np.isin(snap.zona_id, zona_ids)
+
+    return mask
+
+
+def consultar(
+    f,
+    orden: str,
+    cursor_pos: Optional[Tuple[object, int]],
+    limit: int,
+) -> Tuple[List[int], List[object], bool, int]:
+    """
+    Mismo contrato que el listado SQL (filtros + orden keyset).
+    Devuelve (ids de la página, valores de orden, hay_más, total).
+    """
+    snap = get_snapshot()
+    desc = orden.startswith("-")
+    nombre = orden.lstrip("-")
+    col = snap.columna("ids" if nombre == "id" else nombre)
+
+    mask = _mascara_filtros(snap, f)
+    total = int(np.count_nonzero(mask))
+
+    if cursor_pos is not None:
+        valor, last_id = cursor_pos
+        if desc:
+            mask &= (col < valor) | ((col == valor) & (snap.ids < last_id))
+        else:
+            mask &= (col > valor) | ((col == valor) & (snap.ids > last_id))
+
+    orden_idx = snap.ordenes[nombre]
+    if desc:
+        orden_idx = orden_idx[::-1]
+
+    pagina = orden_idx[mask[orden_idx]][: limit + 1]
+    has_more = len(pagina) > limit
+    pagina = pagina[:limit]
+
+    return (
+        snap.ids[pagina].tolist(),
+        col[pagina].tolist(),
+        has_more,
+        total,
+    )
@@ -0,0 +1,282 @@
+"""
+Clusters de marcadores para el mapa, precalculados por nivel de zoom.
+
+Jerarquía (quadtree sobre Web Mercator):
+- Nivel base (ZOOM_MAX): una celda por grupo de zonas cercanas, con
+  estadísticas por zona (conteo, precio min/max) de los inmuebles
+  publicados. Los inmuebles se ubican en el centro de su zona.
+- Cada nivel z se arma sumando las 4 celdas hijas del nivel z+1.
+  Celda = 1/CELDAS_POR_TILE de un tile de 256 px (~64 px en pantalla).
+
+Actualización incremental: cada commit marca las zonas afectadas
+(on_catalog_change). En la siguiente lectura solo se recalculan esas
+zonas (un GROUP BY ... WHERE zona_id IN) y las celdas de sus ancestros.
+Escrituras de otros procesos (catalog_version, todo=True): se
+reconstruye el índice completo.
+
+Con filtros (tipo, precio...) no hay precálculo: se agrupa al vuelo
+desde las estadísticas por zona filtradas (pocas filas).
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import func
+from sqlmodel import Session, select
+
+from db.database import (
+    CambiosCatalogo,
+    al_preparar_lectura,
+    catalog_version,
+    en_event_loop,
+    on_catalog_change,
+    read_engine,
+)
+from models.inmueble import Inmueble, Zona
+
+
+ZOOM_MIN = 0
+ZOOM_MAX = 18
+CELDAS_POR_TILE = 4
+
+Celda = Tuple[int, int]
+
+
+@dataclass(frozen=True)
+class ZonaStats:
+    id: int
+    lat: float
+    lng: float
+    count: int
+    precio_min: int
+    precio_max: int
+
+
+@dataclass
+class Cluster:
+    count: int = 0
+    lat_sum: float = 0.0
+    lng_sum: float = 0.0
+    precio_min: Optional[int] = None
+    precio_max: Optional[int] = None
+    zonas: int = 0
+
+    def sumar(self, count: int, lat_sum: float, lng_sum: float,
+              precio_min: int, precio_max: int, zonas: int) -> None:
+        self.count += count
+        self.lat_sum += lat_sum
+        self.lng_sum += lng_sum
+        self.precio_min = precio_min if self.precio_min is None else min(self.precio_min, precio_min)
+        self.precio_max = precio_max if self.precio_max is None else max(self.precio_max, precio_max)
+        self.zonas += zonas
+
+    def sumar_zona(self, z: ZonaStats) -> None:
+        self.sumar(z.count, z.lat * z.count, z.lng * z.count, z.precio_min, z.precio_max, 1)
+
+    def sumar_cluster(self, c: "Cluster") -> None:
+        self.sumar(c.count, c.lat_sum, c.lng_sum, c.precio_min, c.precio_max, c.zonas)
+
+    def to_dict(self) -> dict:
+        return {
+            "lat": self.lat_sum / self.count,
+            "lng": self.lng_sum / self.count,
+            "count": self.count,
+            "precio_min": self.precio_min,
+            "precio_max": self.precio_max,
+            "zonas": self.zonas,
+        }
+
+
+def celda(lat: float, lng: float, zoom: int) -> Celda:
+    """
+    Celda Web Mercator (misma grilla que los tiles del mapa).
+    """
+    n = (2 ** zoom) * CELDAS_POR_TILE
+    lat = max(min(lat, 85.0511), -85.0511)
+    x = (lng + 180.0) / 360.0 * n
+    rad = math.radians(lat)
+    y = (1.0 - math.log(math.tan(rad) + 1.0 / math.cos(rad)) / math.pi) / 2.0 * n
+    return (min(int(x), n - 1), min(int(y), n - 1))
+
+
+# ======================================================
+# ESTADÍSTICAS POR ZONA (SQL)
+# ======================================================
+
+def stats_por_zona(
+    session: Session,
+    filtrar: Optional[Callable] = None,
+    zona_ids: Optional[Iterable[int]] = None,
+) -> List[ZonaStats]:
+    """
+    (zona, conteo, precio min/max) de inmuebles publicados.
+    filtrar: stmt → stmt con los filtros del listado (aplicar_filtros);
+    None = catálogo completo.
+    """
+    stmt = (
+        select(
+            Zona.id, Zona.lat, Zona.lng,
+            func.count(Inmueble.id),
+            func.min(Inmueble.precio_cop),
+            func.max(Inmueble.precio_cop),
+        )
+        .select_from(Inmueble)
+        .join(Zona, Zona.id == Inmueble.zona_id)
+    )
+    if filtrar is None:
+        stmt = stmt.where(Inmueble.publicado == True)  # noqa
+    else:
+        stmt = filtrar(stmt)
+
+    if zona_ids is not None:
+        stmt = stmt.where(Zona.id.in_(list(zona_ids)))
+
+    rows = session.exec(stmt.group_by(Zona.id, Zona.lat, Zona.lng)).all()
+    return [ZonaStats(*r) for r in rows]
+
+
+def agrupar(stats: Iterable[ZonaStats], zoom: int) -> Dict[Celda, Cluster]:
+    niveles: Dict[Celda, Cluster] = {}
+    for z in stats:
+        niveles.setdefault(celda(z.lat, z.lng, zoom), Cluster()).sumar_zona(z)
+    return niveles
+
+
+# ======================================================
+# ÍNDICE PRECALCULADO (CATÁLOGO SIN FILTROS)
+# ======================================================
+
+class ClusterIndex:
+    def __init__(self, stats: Iterable[ZonaStats]):
+        self.zonas: Dict[int, ZonaStats] = {z.id: z for z in stats}
+        # zonas por celda base (para recalcular una celda sin recorrer todo)
+        self.zonas_por_celda: Dict[Celda, Set[int]] = {}
+        self.niveles: List[Dict[Celda, Cluster]] = [{} for _ in range(ZOOM_MAX + 1)]
+
+        for z in self.zonas.values():
+            self.zonas_por_celda.setdefault(celda(z.lat, z.lng, ZOOM_MAX), set()).add(z.id)
+        self._recalcular(set(self.zonas_por_celda))
+
+    def _recalcular(self, celdas_base: Set[Celda]) -> None:
+        """
+        Recalcula las celdas base dadas y sube por sus ancestros.
+        """
+        base = self.niveles[ZOOM_MAX]
+        for c in celdas_base:
+            cl = Cluster()
+            for zid in self.zonas_por_celda.get(c, ()):
+                cl.sumar_zona(self.zonas[zid])
+            if cl.count:
+                base[c] = cl
+            else:
+                base.pop(c, None)
+
+        hijas = celdas_base
+        for zoom in range(ZOOM_MAX - 1, ZOOM_MIN - 1, -1):
+            abajo, nivel = self.niveles[zoom + 1], self.niveles[zoom]
+            padres = {(x // 2, y // 2) for x, y in hijas}
+            for px, py in padres:
+                cl = Cluster()
+                for dx in (0, 1):
+                    for dy in (0, 1):
+                        h = abajo.get((px * 2 + dx, py * 2 + dy))
+                        if h is not None:
+                            cl.sumar_cluster(h)
+                if cl.count:
+                    nivel[(px, py)] = cl
+                else:
+                    nivel.pop((px, py), None)
+            hijas = padres
+
+    def actualizar(self, zona_ids: Set[int], stats: Iterable[ZonaStats]) -> None:
+        nuevas = {z.id: z for z in stats}
+        tocadas: Set[Celda] = set()
+
+        for zid in zona_ids:
+            vieja = self.zonas.pop(zid, None)
+            if vieja is not None:
+                c = celda(vieja.lat, vieja.lng, ZOOM_MAX)
+                self.zonas_por_celda.get(c, set()).discard(zid)
+                tocadas.add(c)
+
+            z = nuevas.get(zid)
+            if z is not None:
+                self.zonas[zid] = z
+                c = celda(z.lat, z.lng, ZOOM_MAX)
+                self.zonas_por_celda.setdefault(c, set()).add(zid)
+                tocadas.add(c)
+
+        self._recalcular(tocadas)
+
+
+_index: Optional[ClusterIndex] = None
+_pendientes: Set[int] = set()
+# Cambio externo: no se sabe qué zonas, reconstruir entero
+_reconstruir = False
+_lock = threading.Lock()
+
+
+@on_catalog_change
+def _marcar_pendientes(cambios: CambiosCatalogo) -> None:
+    global _reconstruir
+    with _lock:
+        if cambios.todo:
+            _reconstruir = True
+            return
+        _pendientes.update(cambios.zonas, cambios.zonas_de_inmuebles)
+
+
+def indice_vencido() -> bool:
+    # Solo si ya se usó: no se arma un índice que nadie pidió
+    return _index is not None and (_reconstruir or bool(_pendientes))
+
+
+def get_index() -> ClusterIndex:
+    global _index, _reconstruir
+    catalog_version()  # fuera del lock: puede llamar a _marcar_pendientes
+    # En el event loop (DB_ASYNC) sin I/O ni lock: el último índice
+    # armado; Db.run lo actualiza antes en un hilo si estaba vencido
+    index = _index
+    if index is not None and en_event_loop():
+        return index
+    with _lock:
+        if _index is None or _reconstruir:
+            _pendientes.clear()
+            _reconstruir = False
+            with Session(read_engine) as session:
+                _index = ClusterIndex(stats_por_zona(session))
+        elif _pendientes:
+            zona_ids = set(_pendientes)
+            _pendientes.clear()
+            with Session(read_engine) as session:
+                _index.actualizar(zona_ids, stats_por_zona(session, zona_ids=zona_ids))
+        return _index
+
+
+al_preparar_lectura(indice_vencido, get_index)
+
+
+def clusters(
+    zoom: int,
+    bbox: Optional[Tuple[float, float, float, float]] = None,
+    stats: Optional[List[ZonaStats]] = None,
+) -> List[dict]:
+    """
+    Clusters del nivel zoom (centroide dentro del bbox si se da).
+    stats: estadísticas filtradas; None = índice precalculado.
+    """
+    zoom = max(ZOOM_MIN, min(ZOOM_MAX, zoom))
+    nivel = get_index().niveles[zoom] if stats is None else agrupar(stats, zoom)
+
+    out = [c.to_dict() for c in nivel.values()]
+    if bbox:
+        min_lng, min_lat, max_lng, max_lat = bbox
+        out = [
+            c for c in out
+            if min_lat <= c["lat"] <= max_lat and min_lng <= c["lng"] <= max_lng
+        ]
+    return out
@@ -0,0 +1,413 @@
+"""
+Compresión de respuestas (gzip / brotli).
+
+- Dinámicas (API, HTML renderizado): CompresionMiddleware comprime al
+  vuelo las respuestas de tipo texto / JSON desde COMPRESION_MIN_BYTES.
+  También los streams (export): un compresor por respuesta, flush cada
+  COMPRESION_FLUSH_BYTES de entrada (no por bloque: cada flush cierra un
+  bloque deflate / brotli y con filas chicas duplica el tamaño).
+- Estáticas (frontend/): precomprimir() genera una vez los hermanos
+  .br / .gz (al arrancar o en el build) y file_response() /
+  StaticPrecomprimidos los sirven tal cual: nada se comprime por request.
+
+brotli es opcional: sin el paquete solo se usa gzip.
+
+CLI (build):
+    python -m services.compresion ../frontend
+"""
+
+from __future__ import annotations
+
+import gzip
+import mimetypes
+import os
+import sys
+import threading
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from fastapi.responses import FileResponse
+from fastapi.staticfiles import StaticFiles
+from starlette.staticfiles import NotModifiedResponse
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional
+    brotli = None
+
+
+COMPRESION_MIN_BYTES = int(os.getenv("COMPRESION_MIN_BYTES", "1024"))
+# Streams: bytes sin comprimir entre flushes (latencia vs. tamaño)
+COMPRESION_FLUSH_BYTES = int(os.getenv("COMPRESION_FLUSH_BYTES", str(64 * 1024)))
+
+# Niveles: rápidos al vuelo, máximos para estáticos (se hace una vez)
+GZIP_NIVEL_DINAMICO = 5
+BROTLI_CALIDAD_DINAMICO = 4
+GZIP_NIVEL_ESTATICO = 9
+BROTLI_CALIDAD_ESTATICO = 11
+
+TIPOS_COMPRIMIBLES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+
+EXTENSIONES_PRECOMPRIMIBLES = {".html", ".css", ".js", ".json", ".svg", ".xml", ".txt"}
+
+# encoding → extensión del archivo precomprimido
+SUFIJOS = {"br": ".br", "gzip": ".gz"}
+
+# Temporales de escribir_atomico(): {nombre}.{pid}-{hilo}.tmp
+SUFIJO_TMP = ".tmp"
+
+
+def encodings_aceptados(accept_encoding: str) -> List[str]:
+    """
+    Encodings soportados que acepta el cliente, en orden de preferencia
+    del servidor (br, gzip). Respeta q=0.
+    """
+    aceptados = set()
+    for parte in accept_encoding.lower().split(","):
+        nombre, _, params = parte.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        aceptados.add(nombre.strip())
+
+    out = []
+    if brotli is not None and ("br" in aceptados or "*" in aceptados):
+        out.append("br")
+    if "gzip" in aceptados or "*" in aceptados:
+        out.append("gzip")
+    return out
+
+
+def etag_con_encoding(etag: str, encoding: str) -> str:
+    """
+    Cada representación lleva su propio ETag: "abc" → "abc-br".
+    """
+    if etag.endswith('"'):
+        return f'{etag[:-1]}-{encoding}"'
+    return etag
+
+
+def etag_sin_encoding(etag: str) -> str:
+    for encoding in SUFIJOS:
+        sufijo = f'-{encoding}"'
+        if etag.endswith(sufijo):
+            return etag[: -len(sufijo)] + '"'
+    return etag
+
+
+def _etag_304(headers: MutableHeaders, scope) -> None:
+    """
+    304: devolver el mismo validador que llevó el 200 ("abc-br" si el
+    middleware lo comprimió), no el ETag sin sufijo de la ruta. Es el
+    de If-None-Match que coincide con la entidad.
+    """
+    etag = headers.get("etag")
+    if not etag:
+        return
+    base = etag_sin_encoding(etag.removeprefix("W/"))
+    for tag in Headers(scope=scope).get("if-none-match", "").split(","):
+        tag = tag.strip()
+        if tag != etag and etag_sin_encoding(tag.removeprefix("W/")) == base:
+            headers["ETag"] = tag
+            if tag != etag_sin_encoding(tag):
+                _agregar_vary(headers)
+            return
+
+
+def _agregar_vary(headers: MutableHeaders) -> None:
+    vary = headers.get("vary")
+    if not vary:
+        headers["Vary"] = "Accept-Encoding"
+    elif "accept-encoding" not in vary.lower():
+        headers["Vary"] = f"{vary}, Accept-Encoding"
+
+
+# ======================================================
+# DINÁMICAS (MIDDLEWARE ASGI)
+# ======================================================
+
+class _Compresor:
+    def __init__(self, encoding: str, flush_bytes: int = COMPRESION_FLUSH_BYTES):
+        self.flush_bytes = flush_bytes
+        self._sin_flush = 0
+        if encoding == "br":
+            self._c = brotli.Compressor(quality=BROTLI_CALIDAD_DINAMICO)
+            self._flush = self._c.flush
+            self._fin = self._c.finish
+            self._proc = self._c.process
+        else:
+            # wbits 31 = contenedor gzip
+            self._c = zlib.compressobj(GZIP_NIVEL_DINAMICO, zlib.DEFLATED, 31)
+            self._flush = lambda: self._c.flush(zlib.Z_SYNC_FLUSH)
+            self._fin = self._c.flush
+            self._proc = self._c.compress
+
+    def bloque(self, data: bytes) -> bytes:
+        """
+        Salida lista para enviar (puede ser b"": el compresor aún
+        acumula). Flush solo al juntar flush_bytes de entrada.
+        """
+        out = self._proc(data)
+        self._sin_flush += len(data)
+        if self._sin_flush >= self.flush_bytes:
+            self._sin_flush = 0
+            out += self._flush()
+        return out
+
+    def final(self, data: bytes = b"") -> bytes:
+        return self._proc(data) + self._fin()
+
+
+class CompresionMiddleware:
+    """
+    gzip / brotli para respuestas comprimibles >= minimo bytes.
+    No toca respuestas que ya traen Content-Encoding (estáticos
+    precomprimidos) ni 204 / 304. Las de tipo comprimible llevan
+    Vary: Accept-Encoding aunque salgan sin comprimir.
+    """
+
+    def __init__(self, app, minimo: int = COMPRESION_MIN_BYTES):
+        self.app = app
+        self.minimo = minimo
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encodings = encodings_aceptados(Headers(scope=scope).get("accept-encoding", ""))
+        if not encodings:
+            # Sin comprimir, pero la respuesta depende de Accept-Encoding:
+            # un cache compartido no debe darle esta copia a quien sí acepta
+            async def con_vary(message):
+                if message["type"] == "http.response.start":
+                    headers = MutableHeaders(raw=message["headers"])
+                    if headers.get("content-type", "").startswith(TIPOS_COMPRIMIBLES):
+                        _agregar_vary(headers)
+                await send(message)
+
+            await self.app(scope, receive, con_vary)
+            return
+
+        encoding = encodings[0]
+        inicio: Optional[dict] = None
+        buffer: List[bytes] = []
+        compresor: Optional[_Compresor] = None
+        directo = terminado = False
+
+        async def enviar(message):
+            nonlocal inicio, compresor, directo, terminado
+
+            if message["type"] == "http.response.start":
+                inicio = message
+                return
+
+            if message["type"] != "http.response.body" or directo:
+                await send(message)
+                return
+
+            if terminado:
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compresor is not None:
+                data = compresor.bloque(body) if more_body else compresor.final(body)
+                if data or not more_body:
+                    await send({"type": "http.response.body", "body": data, "more_body": more_body})
+                return
+
+            # Aún sin decidir: juntar hasta ver el cuerpo completo o el mínimo.
+            # (BaseHTTPMiddleware reenvía todo como stream + bloque vacío)
+            buffer.append(body)
+            recibido = sum(len(b) for b in buffer)
+            headers = MutableHeaders(raw=inicio["headers"])
+            largo = headers.get("content-length")
+            completo = not more_body or (largo is not None and recibido >= int(largo))
+
+            if not completo and recibido < self.minimo:
+                return
+
+            if inicio["status"] == 304:
+                _etag_304(headers, scope)
+
+            tipo = headers.get("content-type", "")
+            if (
+                inicio["status"] in (204, 304)
+                or "content-encoding" in headers
+                or not tipo.startswith(TIPOS_COMPRIMIBLES)
+                or (completo and recibido < self.minimo)
+            ):
+                directo = True
+                # Bajo el mínimo también varía: con otro largo iría comprimida
+                if tipo.startswith(TIPOS_COMPRIMIBLES):
+                    _agregar_vary(headers)
+                await send(inicio)
+                await send({"type": "http.response.body", "body": b"".join(buffer), "more_body": more_body})
+                return
+
+            compresor = _Compresor(encoding)
+            headers["Content-Encoding"] = encoding
+            _agregar_vary(headers)
+            if "etag" in headers:
+                headers["ETag"] = etag_con_encoding(headers["etag"], encoding)
+
+            if completo:
+                data = compresor.final(b"".join(buffer))
+                headers["Content-Length"] = str(len(data))
+                terminado = True
+                await send(inicio)
+                await send({"type": "http.response.body", "body": data})
+                return
+
+            # Stream: largo desconocido
+            del headers["content-length"]
+            await send(inicio)
+            data = compresor.bloque(b"".join(buffer))
+            if data:
+                await send({"type": "http.response.body", "body": data, "more_body": True})
+
+        await self.app(scope, receive, enviar)
+
+
+# ======================================================
+# ESTÁTICAS (PRECOMPRIMIDAS)
+# ======================================================
+
+def _comprimir(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_CALIDAD_ESTATICO)
+    # mtime=0: salida reproducible entre builds
+    return gzip.compress(data, compresslevel=GZIP_NIVEL_ESTATICO, mtime=0)
+
+
+def escribir_atomico(destino: Path, data: bytes) -> None:
+    """
+    Escribe a un temporal propio (proceso + hilo) y lo renombra: con
+    varios workers generando lo mismo al arrancar, cada uno reemplaza
+    el archivo entero y nadie renombra (o pisa) el temporal de otro.
+    """
+    tmp = destino.with_name(f"{destino.name}.{os.getpid()}-{threading.get_ident()}{SUFIJO_TMP}")
+    try:
+        tmp.write_bytes(data)
+        os.replace(tmp, destino)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def precomprimir(directorio: Path, minimo: int = COMPRESION_MIN_BYTES) -> int:
+    """
+    Genera archivo.br / archivo.gz junto a cada estático comprimible.
+    Solo reescribe los que faltan o son más viejos que el original.
+    Devuelve cuántos archivos escribió.
+    """
+    encodings = ["gzip"] + (["br"] if brotli is not None else [])
+    escritos = 0
+
+    for origen in sorted(directorio.rglob("*")):
+        if not origen.is_file() or origen.suffix not in EXTENSIONES_PRECOMPRIMIBLES:
+            continue
+        stat = origen.stat()
+        if stat.st_size < minimo:
+            continue
+
+        data: Optional[bytes] = None
+        for encoding in encodings:
+            destino = origen.with_name(origen.name + SUFIJOS[encoding])
+            if destino.exists() and destino.stat().st_mtime >= stat.st_mtime:
+                continue
+            if data is None:
+                data = origen.read_bytes()
+            comprimido = _comprimir(data, encoding)
+            if len(comprimido) >= len(data):
+                continue
+            escribir_atomico(destino, comprimido)
+            escritos += 1
+
+    return escritos
+
+
+def variante_precomprimida(path: Path, accept_encoding: str) -> Optional[Tuple[Path, str]]:
+    """
+    (archivo.br | archivo.gz, encoding) si existe y el cliente lo acepta.
+    """
+    for encoding in encodings_aceptados(accept_encoding):
+        variante = path.with_name(path.name + SUFIJOS[encoding])
+        if variante.is_file():
+            return variante, encoding
+    return None
+
+
+def _headers_archivo(path: Path, accept_encoding: str) -> Tuple[Path, Dict[str, str]]:
+    """
+    (archivo a enviar, headers extra) para un estático.
+    """
+    variante = variante_precomprimida(path, accept_encoding)
+    if variante is None:
+        if path.suffix in EXTENSIONES_PRECOMPRIMIBLES:
+            return path, {"Vary": "Accept-Encoding"}
+        return path, {}
+    archivo, encoding = variante
+    return archivo, {"Content-Encoding": encoding, "Vary": "Accept-Encoding"}
+
+
+def file_response(
+    path: Path,
+    accept_encoding: str = "",
+    headers: Optional[Dict[str, str]] = None,
+) -> FileResponse:
+    """
+    FileResponse que prefiere el hermano precomprimido
+    (Content-Type del original, no application/gzip).
+    Con stat ya hecho: ETag / Last-Modified disponibles antes de enviar
+    (para responder 304).
+    """
+    archivo, extra = _headers_archivo(path, accept_encoding)
+    return FileResponse(
+        archivo,
+        media_type=mimetypes.guess_type(path.name)[0],
+        headers={**(headers or {}), **extra},
+        stat_result=os.stat(archivo),
+    )
+
+
+class StaticPrecomprimidos(StaticFiles):
+    """
+    StaticFiles que sirve archivo.br / archivo.gz si existen.
+    """
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        request_headers = Headers(scope=scope)
+        path = Path(full_path)
+        archivo, extra = _headers_archivo(path, request_headers.get("accept-encoding", ""))
+
+        response = FileResponse(
+            archivo,
+            status_code=status_code,
+            media_type=mimetypes.guess_type(path.name)[0],
+            headers=extra,
+            stat_result=stat_result if archivo == path else os.stat(archivo),
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+if __name__ == "__main__":
+    destino = Path(sys.argv[1] if len(sys.argv) > 1 else "../frontend")
+    print(f"✅ {precomprimir(destino)} archivos precomprimidos en {destino}")
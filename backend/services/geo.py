@@ -0,0 +1,147 @@
+"""
+Índice espacial en memoria (grilla uniforme) para búsquedas por mapa.
+
+Los inmuebles NO tienen coordenadas propias: se ubican en el centro
+de su zona (nunca se revela la dirección exacta). Por eso el índice
+es zona → celda, y una búsqueda por bbox / radio se traduce en
+"zona_id IN (...)", que usa ix_inmueble_zona_tipo_precio: la consulta
+nunca lee inmuebles de zonas fuera del viewport.
+
+Consistencia: el índice se construye a demanda y se marca vencido en
+cada commit que toca una Zona (on_catalog_change). Cambios de inmuebles no
+lo afectan: su posición depende solo de zona_id, que ya está en la BD.
+Escrituras de otros procesos (catalog_version, todo=True) también lo
+descartan.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from sqlmodel import Session, select
+
+from db.database import (
+    CambiosCatalogo,
+    al_preparar_lectura,
+    catalog_version,
+    en_event_loop,
+    on_catalog_change,
+    read_engine,
+)
+from models.inmueble import Zona
+
+
+# Tamaño de celda en grados (~1.1 km en latitud)
+CELDA_GRADOS = 0.01
+
+RADIO_TIERRA_M = 6_371_000
+
+
+@dataclass(frozen=True)
+class PuntoZona:
+    id: int
+    lat: float
+    lng: float
+
+
+def celda(lat: float, lng: float) -> Tuple[int, int]:
+    return (math.floor(lat / CELDA_GRADOS), math.floor(lng / CELDA_GRADOS))
+
+
+def distancia_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """
+    Haversine.
+    """
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp = p2 - p1
+    dl = math.radians(lng2 - lng1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * RADIO_TIERRA_M * math.asin(math.sqrt(a))
+
+
+class GridIndex:
+    def __init__(self, zonas: List[PuntoZona]):
+        self.zonas = zonas
+        self.celdas: Dict[Tuple[int, int], List[PuntoZona]] = {}
+        for z in zonas:
+            self.celdas.setdefault(celda(z.lat, z.lng), []).append(z)
+
+    def en_bbox(self, min_lng: float, min_lat: float, max_lng: float, max_lat: float) -> List[PuntoZona]:
+        (c0_lat, c0_lng), (c1_lat, c1_lng) = celda(min_lat, min_lng), celda(max_lat, max_lng)
+        n_celdas = (c1_lat - c0_lat + 1) * (c1_lng - c0_lng + 1)
+
+        # Viewport enorme (país completo): recorrer zonas es más barato
+        if n_celdas > len(self.celdas):
+            candidatas = self.zonas
+        else:
+            candidatas = [
+                z
+                for a in range(c0_lat, c1_lat + 1)
+                for b in range(c0_lng, c1_lng + 1)
+                for z in self.celdas.get((a, b), ())
+            ]
+
+        return [
+            z for z in candidatas
+            if min_lat <= z.lat <= max_lat and min_lng <= z.lng <= max_lng
+        ]
+
+    def en_radio(self, lat: float, lng: float, radio_m: float) -> List[PuntoZona]:
+        # bbox que contiene el círculo, luego distancia exacta
+        dlat = math.degrees(radio_m / RADIO_TIERRA_M)
+        dlng = dlat / max(math.cos(math.radians(lat)), 1e-6)
+        return [
+            z for z in self.en_bbox(lng - dlng, lat - dlat, lng + dlng, lat + dlat)
+            if distancia_m(lat, lng, z.lat, z.lng) <= radio_m
+        ]
+
+
+_grid: Optional[GridIndex] = None
+_gen = 0  # sube al invalidar
+_grid_gen = -1  # _gen con el que se leyó _grid (distinto = vencida)
+_lock = threading.Lock()
+
+
+def grilla_vencida() -> bool:
+    return _grid is None or _grid_gen != _gen
+
+
+def get_grid() -> GridIndex:
+    global _grid, _grid_gen
+    catalog_version()  # cambios externos → _invalidar(todo=True)
+    grid = _grid
+    # En el event loop (DB_ASYNC) sin I/O: la última grilla armada;
+    # Db.run la reconstruye antes en un hilo si estaba vencida
+    if grid is not None and (_grid_gen == _gen or en_event_loop()):
+        return grid
+
+    with _lock:
+        if not grilla_vencida():
+            return _grid
+        gen = _gen
+        with Session(read_engine) as session:
+            rows = session.exec(select(Zona.id, Zona.lat, Zona.lng)).all()
+        # Si se invalidó durante la lectura queda vencida: se relee
+        _grid, _grid_gen = GridIndex([PuntoZona(*r) for r in rows]), gen
+        return _grid
+
+
+al_preparar_lectura(grilla_vencida, get_grid)
+
+
+@on_catalog_change
+def _invalidar(cambios: CambiosCatalogo) -> None:
+    global _gen
+    if cambios.todo or cambios.zonas:
+        _gen += 1
+
+
+def zonas_en_bbox(bbox: Tuple[float, float, float, float]) -> List[int]:
+    return [z.id for z in get_grid().en_bbox(*bbox)]
+
+
+def zonas_en_radio(lat: float, lng: float, radio_m: float) -> List[int]:
+    return [z.id for z in get_grid().en_radio(lat, lng, radio_m)]
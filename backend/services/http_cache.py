@@ -0,0 +1,71 @@
+"""
+Validadores HTTP para respuestas del API.
+
+- ETag fuerte = hash del contenido (igual en todos los workers).
+- If-None-Match → 304 sin cuerpo.
+- Cache-Control con stale-while-revalidate para navegador / CDN.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+from typing import Dict, Optional
+
+from fastapi import Request, Response
+
+from services.compresion import etag_sin_encoding
+
+
+API_MAX_AGE = int(os.getenv("API_MAX_AGE", "60"))
+API_STALE_WHILE_REVALIDATE = int(os.getenv("API_STALE_WHILE_REVALIDATE", "600"))
+
+CACHE_CONTROL_API = (
+    f"public, max-age={API_MAX_AGE}, "
+    f"stale-while-revalidate={API_STALE_WHILE_REVALIDATE}"
+)
+
+
+def etag_for(content: bytes, headers: Optional[Dict[str, str]] = None) -> str:
+    """
+    Hash del cuerpo + headers propios (X-Total-Count, cursor...):
+    si cambia el total con la misma página, cambia el ETag.
+    """
+    h = hashlib.blake2b(content, digest_size=16)
+    for k, v in sorted((headers or {}).items()):
+        h.update(f"\n{k}:{v}".encode("utf-8"))
+    return '"' + h.hexdigest() + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    If-None-Match: lista de ETags o "*". Comparación débil (RFC 9110).
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    # "abc-br" / "abc-gzip": misma entidad, comprimida por CompresionMiddleware
+    return any(
+        etag_sin_encoding(tag.strip().removeprefix("W/")) == opaque
+        for tag in header.split(",")
+    )
+
+
+def cached_json_response(
+    request: Request,
+    content: bytes,
+    headers: Optional[Dict[str, str]] = None,
+    cache_control: str = CACHE_CONTROL_API,
+) -> Response:
+    etag = etag_for(content, headers)
+    out = dict(headers or {})
+    out["ETag"] = etag
+    out["Cache-Control"] = cache_control
+
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=out)
+
+    return Response(content=content, media_type="application/json", headers=out)
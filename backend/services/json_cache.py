@@ -0,0 +1,110 @@
+"""
+Cache de payloads JSON pre-serializados por inmueble.
+
+Guarda la salida de inmueble_to_dict() ya codificada (bytes), para
+armar listados y detalle sin volver a serializar ni pasar por
+jsonable_encoder / json.dumps en cada request.
+
+Invalidación: por id de inmueble y por id de zona (un cambio de zona
+invalida todos sus inmuebles), vía db.database.on_catalog_change().
+Cambios hechos fuera de este proceso (todo=True) vacían el cache: cada
+lectura pasa por catalog_version(), que los detecta.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from db.database import CambiosCatalogo, catalog_version, on_catalog_change
+
+
+def encode_json(data) -> bytes:
+    """
+    Mismo formato que JSONResponse de Starlette (compacto, UTF-8).
+    """
+    return json.dumps(
+        data,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def json_array(parts: Iterable[bytes]) -> bytes:
+    return b"[" + b",".join(parts) + b"]"
+
+
+class JsonCache:
+    """
+    LRU id → bytes, con índice inverso zona_id → ids.
+    """
+
+    def __init__(self, max_items: int = 50_000):
+        self.max_items = max_items
+        self._items: "OrderedDict[int, Tuple[bytes, Optional[int]]]" = OrderedDict()
+        self._por_zona: Dict[int, Set[int]] = {}
+        self._lock = threading.Lock()
+        # Sube con cada invalidación: evita guardar bytes leídos
+        # de la BD antes de un commit que ya los invalidó.
+        self.generation = 0
+
+    def get_many(self, ids: Iterable[int]) -> Dict[int, bytes]:
+        out: Dict[int, bytes] = {}
+        # Relee la versión de BD (TTL): si otro proceso escribió, clear()
+        catalog_version()
+        with self._lock:
+            for x in ids:
+                item = self._items.get(x)
+                if item is not None:
+                    self._items.move_to_end(x)
+                    out[x] = item[0]
+        return out
+
+    def get(self, inmueble_id: int) -> Optional[bytes]:
+        return self.get_many((inmueble_id,)).get(inmueble_id)
+
+    def put(self, inmueble_id: int, zona_id: Optional[int], payload: bytes, generation: int) -> None:
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._drop(inmueble_id)
+            self._items[inmueble_id] = (payload, zona_id)
+            if zona_id is not None:
+                self._por_zona.setdefault(zona_id, set()).add(inmueble_id)
+            while len(self._items) > self.max_items:
+                self._drop(next(iter(self._items)))
+
+    def invalidate(self, cambios: CambiosCatalogo) -> None:
+        if cambios.todo:
+            self.clear()
+            return
+        with self._lock:
+            self.generation += 1
+            for zid in cambios.zonas:
+                for x in list(self._por_zona.get(zid, ())):
+                    self._drop(x)
+            for x in cambios.inmuebles:
+                self._drop(x)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self._items.clear()
+            self._por_zona.clear()
+
+    def _drop(self, inmueble_id: int) -> None:
+        item = self._items.pop(inmueble_id, None)
+        if item is None or item[1] is None:
+            return
+        ids = self._por_zona.get(item[1])
+        if ids is not None:
+            ids.discard(inmueble_id)
+            if not ids:
+                del self._por_zona[item[1]]
+
+
+payload_cache = JsonCache()
+on_catalog_change(payload_cache.invalidate)
@@ -0,0 +1,63 @@
+"""
+Slugs y rutas canónicas (criterio único para API, BD y migraciones).
+
+Se guardan en columnas (Inmueble.slug / url_publica, Zona.slug) al
+escribir: ver eventos en db/database.py y la migración 2.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Iterable, Optional
+
+
+def slugify(text: str) -> str:
+    """
+    Convierte texto a slug SEO-safe, estable y consistente.
+    NO depende del idioma.
+    """
+    text = text.lower().strip()
+    text = (
+        text.replace("á", "a")
+        .replace("é", "e")
+        .replace("í", "i")
+        .replace("ó", "o")
+        .replace("ú", "u")
+        .replace("ñ", "n")
+        .replace("ü", "u")
+    )
+    text = re.sub(r"[^\w\s-]", "", text)
+    text = re.sub(r"[\s_-]+", "-", text)
+    return text.strip("-")
+
+
+def slug_inmueble(tipo: Optional[str], zona_nombre: Optional[str]) -> str:
+    """
+    Slug SEMÁNTICO y ESTABLE para SEO.
+    No usa el título completo (evita cambios futuros).
+    """
+    parts = [
+        tipo or "inmueble",
+        "en",
+        zona_nombre or "",
+    ]
+    return slugify(" ".join(parts))
+
+
+def ruta_inmueble(inmueble_id: int, slug: str) -> str:
+    """
+    URL pública canónica (path).
+    """
+    return f"/inmueble/{inmueble_id}-{slug}"
+
+
+def slug_unico(base: str, usados: Iterable[str]) -> str:
+    """
+    base, base-2, base-3... el primero que no esté en usados.
+    """
+    usados = set(usados)
+    slug, n = base, 1
+    while slug in usados:
+        n += 1
+        slug = f"{base}-{n}"
+    return slug
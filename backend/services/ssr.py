@@ -0,0 +1,270 @@
+"""
+SSR nativo (Jinja2) para bots: detalle y listado.
+
+Alternativa liviana al Prerenderer (Chromium headless): title, meta
+description, canonical, JSON-LD y el markup del listado salen directo
+de la salida de inmueble_to_dict (los mismos payloads cacheados que usa
+el bootstrap), con plantillas compiladas una vez en memoria.
+
+Por ruta (SSR_RUTAS=inmueble,listado): las rutas con SSR se
+renderizan acá; el resto sigue yendo a Playwright (solo en prod).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Callable, Dict, List, Mapping, Optional
+from urllib.parse import urlencode
+
+from fastapi import Request, Response
+from jinja2 import Environment, FileSystemLoader, Template, select_autoescape
+from markupsafe import Markup
+
+from prerender import is_probably_bot
+from services.assets import CACHE_CONTROL_HTML, script_bootstrap
+from services.bootstrap import SUFIJO_PAGINA
+from services.http_cache import etag_for, etag_matches
+
+
+PUBLIC_BASE_URL = os.getenv("PUBLIC_BASE_URL", "http://127.0.0.1:8000").rstrip("/")
+
+# Rutas servidas con SSR a bots ("" = ninguna: todo por Playwright)
+SSR_RUTAS = {
+    r.strip()
+    for r in os.getenv("SSR_RUTAS", "inmueble,listado").lower().split(",")
+    if r.strip()
+}
+
+TEMPLATES_DIR = Path(__file__).resolve().parent.parent / "templates"
+
+SITE_NAME = "Metropolitana de Arrendamientos"
+
+
+# ======================================================
+# PLANTILLAS (COMPILADAS UNA VEZ)
+# ======================================================
+
+def formato_cop(valor) -> str:
+    """
+    Igual que formatCOP() del frontend (es-CO, sin decimales).
+    """
+    return "$ " + f"{int(valor or 0):,}".replace(",", ".")
+
+
+def truncar(texto: Optional[str], n: int = 160) -> str:
+    t = " ".join(str(texto or "").split())
+    return t if len(t) <= n else t[: n - 1].strip() + "…"
+
+
+def jsonld(schema: dict) -> Markup:
+    # "<" escapado: ningún texto puede cerrar el <script>
+    return Markup(json.dumps(schema, ensure_ascii=False).replace("<", "\\u003c"))
+
+
+_env = Environment(
+    loader=FileSystemLoader(str(TEMPLATES_DIR)),
+    autoescape=select_autoescape(["html"]),
+    auto_reload=False,
+    trim_blocks=True,
+    lstrip_blocks=True,
+)
+_env.filters["cop"] = formato_cop
+_env.filters["jsonld"] = jsonld
+
+_templates: Dict[str, Template] = {}
+
+
+def _template(nombre: str) -> Template:
+    t = _templates.get(nombre)
+    if t is None:
+        t = _templates[nombre] = _env.get_template(nombre)
+    return t
+
+
+# ======================================================
+# SELECCIÓN POR RUTA
+# ======================================================
+
+def ruta_ssr(path: str) -> Optional[str]:
+    """
+    Nombre de la ruta si tiene SSR activo: /inmueble/... → "inmueble".
+    """
+    if path.startswith("/inmueble/"):
+        nombre = "inmueble"
+    elif path.rstrip("/") == "/listado":
+        nombre = "listado"
+    else:
+        return None
+    return nombre if nombre in SSR_RUTAS else None
+
+
+def pide_ssr(request: Request) -> bool:
+    """
+    Bot (User-Agent) o ?prerender=1 / _escaped_fragment_ en una ruta con SSR.
+    """
+    if ruta_ssr(request.url.path) is None:
+        return False
+    qp = request.query_params
+    return (
+        qp.get("prerender") == "1"
+        or "_escaped_fragment_" in qp
+        or is_probably_bot(request.headers.get("user-agent", ""))
+    )
+
+
+# ======================================================
+# SCHEMA.ORG (MISMO CRITERIO QUE inmuebles.js)
+# ======================================================
+
+def schema_breadcrumb(items: List[dict]) -> dict:
+    return {
+        "@context": "https://schema.org",
+        "@type": "BreadcrumbList",
+        "itemListElement": [
+            {
+                "@type": "ListItem",
+                "position": n,
+                "name": it["name"],
+                **({"item": f"{PUBLIC_BASE_URL}{it['url']}"} if it.get("url") else {}),
+            }
+            for n, it in enumerate(items, start=1)
+        ],
+    }
+
+
+def schema_inmueble(i: dict) -> dict:
+    url = f"{PUBLIC_BASE_URL}{i['url_publica']}"
+    schema = {
+        "@context": "https://schema.org",
+        "@type": "House" if i.get("tipo") == "casa" else "Apartment",
+        "name": i.get("titulo"),
+        "description": truncar(i.get("descripcion"), 5000),
+        "url": url,
+        "image": i.get("imagenes") or [],
+        "address": {
+            "@type": "PostalAddress",
+            "addressLocality": (i.get("zona") or {}).get("nombre") or "Medellín",
+            "addressRegion": "Antioquia",
+            "addressCountry": "CO",
+        },
+        "offers": {
+            "@type": "Offer",
+            "priceCurrency": "COP",
+            "availability": "https://schema.org/InStock",
+            "url": url,
+        },
+    }
+    if i.get("area_m2"):
+        schema["floorSize"] = {"@type": "QuantitativeValue", "value": i["area_m2"], "unitCode": "MTK"}
+    if i.get("habitaciones"):
+        schema["numberOfRooms"] = i["habitaciones"]
+    if i.get("banos"):
+        schema["numberOfBathroomsTotal"] = i["banos"]
+    if i.get("precio_cop"):
+        schema["offers"]["price"] = i["precio_cop"]
+    return schema
+
+
+# ======================================================
+# RENDER
+# ======================================================
+
+def render_inmueble(
+    datos: Mapping[str, bytes],
+    asset: Callable[[str], str],
+) -> Optional[str]:
+    """
+    datos = bootstrap_detalle()[1]: {"/api/inmuebles/{id}": payload}.
+    None si el inmueble no existe.
+    """
+    if not datos:
+        return None
+    i = json.loads(next(iter(datos.values())))
+    barrio = (i.get("zona") or {}).get("nombre") or "Medellín"
+    crumbs = [
+        {"name": "Inicio", "url": "/"},
+        {"name": "Arriendos", "url": "/arriendos/medellin"},
+        {"name": barrio, "url": f"/arriendos/{(i.get('zona') or {}).get('slug') or 'medellin'}"},
+        {"name": i.get("titulo")},
+    ]
+    return _template("inmueble.html").render(
+        i=i,
+        title=f"{i.get('titulo')} en {barrio} | {SITE_NAME}",
+        description=truncar(f"{i.get('titulo')} en arriendo en {barrio}. {i.get('descripcion') or ''}", 155),
+        canonical=f"{PUBLIC_BASE_URL}{i['url_publica']}",
+        badge="Detalle",
+        breadcrumb=crumbs,
+        jsonld=[schema_breadcrumb(crumbs), schema_inmueble(i)],
+        bootstrap=Markup(script_bootstrap(datos).decode("utf-8")),
+        scripts=["js/api.js", "js/inmuebles.js", "js/mapa.js", "js/chatbot.js"],
+        asset=asset,
+    )
+
+
+def render_listado(
+    datos: Mapping[str, bytes],
+    query: Mapping[str, str],
+    asset: Callable[[str], str],
+) -> str:
+    """
+    datos = bootstrap_listado(): {"/api/inmuebles?...": [payloads],
+    "/api/inmuebles?...#pagina": {"total", "next"}}.
+    """
+    items, total = [], 0
+    for llave, valor in datos.items():
+        if llave.endswith(SUFIJO_PAGINA):
+            total = json.loads(valor)["total"]
+        else:
+            items = json.loads(valor)
+    total = max(total, len(items))
+    zona = query.get("zona")
+    encabezado = f"Arriendos en {zona}" if zona else "Arriendos en Medellín"
+
+    filtros = [(k, query[k]) for k in ("zona", "tipo", "precio", "hab") if query.get(k)]
+    canonical = f"{PUBLIC_BASE_URL}/listado" + (f"?{urlencode(filtros)}" if filtros else "")
+
+    item_list = {
+        "@context": "https://schema.org",
+        "@type": "ItemList",
+        "itemListElement": [
+            {"@type": "ListItem", "position": n, "url": f"{PUBLIC_BASE_URL}{i['url_publica']}"}
+            for n, i in enumerate(items, start=1)
+        ],
+    }
+    return _template("listado.html").render(
+        items=items,
+        total=total,
+        encabezado=encabezado,
+        title=f"{encabezado} | {SITE_NAME}",
+        description=truncar(
+            f"{total} apartamentos y casas en arriendo"
+            f"{' en ' + zona if zona else ' en Medellín'}. {SITE_NAME}.",
+            155,
+        ),
+        canonical=canonical,
+        badge="Listado",
+        jsonld=[item_list],
+        bootstrap=Markup(script_bootstrap(datos).decode("utf-8")) if datos else "",
+        scripts=["js/api.js", "js/buscador.js", "js/chatbot.js"],
+        asset=asset,
+    )
+
+
+def html_response(request: Request, html: str, status_code: int = 200) -> Response:
+    """
+    HTML renderizado: no-cache + ETag (304), comprimido por el middleware.
+    """
+    body = html.encode("utf-8")
+    etag = etag_for(body)
+    headers = {
+        "Cache-Control": CACHE_CONTROL_HTML,
+        "ETag": etag,
+        # Mismo URL, otro HTML para bots
+        "Vary": "User-Agent",
+        "X-Prerendered": "ssr",
+    }
+    if status_code == 200 and etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, status_code=status_code, media_type="text/html; charset=utf-8", headers=headers)
@@ -0,0 +1,114 @@
+"""
+Fixtures comunes: base SQLite temporal y app con startup ejecutado.
+
+Las variables de entorno van antes de importar db.database / main:
+los engines se crean al importar.
+"""
+
+from __future__ import annotations
+
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Iterator, List
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+_TMP = Path(tempfile.mkdtemp(prefix="metropolitana-tests-"))
+atexit.register(shutil.rmtree, _TMP, True)
+
+os.environ["DATABASE_URL"] = f"sqlite:///{_TMP / 'test.db'}"
+# Sin escribir .br / .gz ni páginas de barrios dentro del repo
+os.environ["PRECOMPRIMIR_ESTATICOS"] = "0"
+os.environ["BARRIOS_ESTATICOS_DIR"] = str(_TMP / "arriendos")
+# Ruta SQL síncrona, sin importar el entorno de quien corre los tests:
+# los conteos de statements y los planes la suponen. El catálogo en
+# memoria se prueba aparte, activándolo dentro del test
+os.environ["CATALOGO_MEMORIA"] = "0"
+os.environ["DB_ASYNC"] = "0"
+
+sys.path.insert(0, str(BACKEND_DIR))
+os.chdir(BACKEND_DIR)
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+from sqlmodel import Session, select  # noqa: E402
+
+import main  # noqa: E402
+from db import database  # noqa: E402
+from models.inmueble import Inmueble, Zona  # noqa: E402
+
+
+# Inmuebles extra: más que PAGE_SIZE_MAX, para comparar páginas de 5 y 100
+INMUEBLES_EXTRA = 150
+
+
+@pytest.fixture(scope="session")
+def client() -> Iterator[TestClient]:
+    with TestClient(main.app) as c:
+        _sembrar_extra()
+        yield c
+
+
+def _sembrar_extra() -> None:
+    with Session(database.engine) as session:
+        zonas = session.exec(select(Zona)).all()
+        session.add_all(
+            Inmueble(
+                titulo=f"Apartamento de prueba {n}",
+                tipo="apartamento" if n % 3 else "casa",
+                precio_cop=1_500_000 + 25_000 * n,
+                area_m2=40 + n % 90,
+                habitaciones=1 + n % 4,
+                banos=1 + n % 3,
+                descripcion="Inmueble sembrado por los tests.",
+                imagenes=f"https://example.com/{n}-a.jpg,https://example.com/{n}-b.jpg",
+                zona_id=zonas[n % len(zonas)].id,
+                direccion_referencia="Referencia general",
+                contacto_whatsapp="Hola",
+                publicado=True,
+            )
+            for n in range(INMUEBLES_EXTRA)
+        )
+        session.commit()
+
+
+class ContadorSQL:
+    """
+    Statements ejecutados en los engines de la app (before_cursor_execute).
+    No cuenta la lectura periódica de catalogo_version (depende del TTL,
+    no del request).
+    """
+
+    def __init__(self) -> None:
+        self.statements: List[str] = []
+        self.parametros: List[Any] = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        if "catalogo_version" not in statement:
+            self.statements.append(statement)
+            self.parametros.append(parameters)
+
+    def __len__(self) -> int:
+        return len(self.statements)
+
+    def reset(self) -> None:
+        self.statements.clear()
+        self.parametros.clear()
+
+
+@pytest.fixture
+def contar_sql() -> Iterator[ContadorSQL]:
+    engines = {id(e): e for e in (database.engine, database.read_engine)}
+    if database.async_engine is not None:
+        engines[id(database.async_engine)] = database.async_engine.sync_engine
+    contador = ContadorSQL()
+    for e in engines.values():
+        event.listen(e, "before_cursor_execute", contador)
+    yield contador
+    for e in engines.values():
+        event.remove(e, "before_cursor_execute", contador)
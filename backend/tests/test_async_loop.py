@@ -0,0 +1,89 @@
+"""
+[user-014] DB_ASYNC=1: ningún statement de los engines sync (versión del
+catálogo, grilla geo, snapshot en memoria) corre en el hilo del event
+loop. Corre en un proceso aparte: DB_ASYNC se lee al importar.
+"""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+pytest.importorskip("aiosqlite")
+
+SCRIPT = textwrap.dedent(
+    """
+    import asyncio, os, sys, threading
+    sys.path.insert(0, os.getcwd())
+
+    import httpx
+    from sqlalchemy import event
+
+    import main
+    from db import database
+
+    en_loop = []
+
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        if threading.get_ident() == hilo_loop:
+            en_loop.append(statement)
+
+    def externo(sql="UPDATE zona SET lat = lat WHERE id = 1"):
+        with database.engine.begin() as conn:
+            conn.exec_driver_sql(sql)
+
+    async def correr():
+        global hilo_loop
+        hilo_loop = threading.get_ident()
+        await main.startup()
+        for e in {id(e): e for e in (database.engine, database.read_engine, database._version_engine)}.values():
+            event.listen(e, "before_cursor_execute", registrar)
+
+        transporte = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transporte, base_url="http://t") as c:
+            for _ in range(3):
+                # Cambio "externo": la próxima lectura relee versión y reconstruye
+                await asyncio.to_thread(externo)
+                rs = await asyncio.gather(
+                    c.get("/api/inmuebles", params={"bbox": "-75.7,6.1,-75.5,6.3"}),
+                    c.get("/api/inmuebles", params={"lat": 6.2, "lng": -75.6}),
+                    c.get("/api/inmuebles/1"),
+                    c.get("/api/inmuebles", params={"orden": "-precio_cop"}),
+                )
+                assert all(r.status_code == 200 for r in rs), [r.status_code for r in rs]
+
+            # La relectura en el hilo sigue viendo escrituras externas
+            assert (await c.get("/api/inmuebles/2")).status_code == 200  # en cache
+            await asyncio.to_thread(externo, "UPDATE inmueble SET publicado = 0 WHERE id = 2")
+            assert (await c.get("/api/inmuebles/2")).status_code == 404
+        print("EN_LOOP", len(en_loop))
+        for s in en_loop:
+            print(s)
+
+    asyncio.run(correr())
+    """
+)
+
+
+@pytest.mark.parametrize("catalogo_memoria", ["0", "1"])
+def test_async_sin_io_sync_en_el_event_loop(tmp_path, catalogo_memoria):
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{tmp_path / 'async.db'}",
+        "DB_ASYNC": "1",
+        "CATALOGO_MEMORIA": catalogo_memoria,
+        "CATALOG_VERSION_TTL": "0",
+        "PRECOMPRIMIR_ESTATICOS": "0",
+        "PREGENERAR_BARRIOS": "0",
+        "BARRIOS_ESTATICOS_DIR": str(tmp_path / "arriendos"),
+    }
+    r = subprocess.run(
+        [sys.executable, "-c", SCRIPT], env=env, capture_output=True, text=True, timeout=120,
+    )
+    assert r.returncode == 0, r.stderr
+    salida = r.stdout[r.stdout.index("EN_LOOP"):]
+    assert salida.startswith("EN_LOOP 0"), salida
@@ -0,0 +1,46 @@
+"""
+[user-024] Pre-generación de /arriendos/*: varios workers generando a la
+vez en el mismo directorio no chocan (temporales propios) y la limpieza
+de páginas viejas no borra los temporales de otro.
+"""
+
+from __future__ import annotations
+
+import threading
+
+from routes import barrios
+from services import compresion
+
+
+def test_generar_concurrente(client, tmp_path):
+    errores = []
+
+    def worker():
+        try:
+            barrios.generar_estaticos(tmp_path)
+        except Exception as e:  # noqa: BLE001
+            errores.append(e)
+
+    hilos = [threading.Thread(target=worker) for _ in range(6)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+
+    assert errores == []
+    assert not list(tmp_path.glob(f"*{compresion.SUFIJO_TMP}"))
+    html = {p.name for p in tmp_path.glob("*.html")}
+    assert html == {f"{slug}.html" for slug in barrios.slugs_territorio()}
+
+
+def test_limpieza_respeta_temporales_ajenos(client, tmp_path):
+    ajeno = tmp_path / f"laureles.html.99999-1{compresion.SUFIJO_TMP}"
+    ajeno.write_bytes(b"a medio escribir")
+    viejos = [tmp_path / "barrio-que-ya-no-existe.html", tmp_path / "barrio-que-ya-no-existe.html.gz"]
+    for viejo in viejos:
+        viejo.write_bytes(b"viejo")
+
+    barrios.generar_estaticos(tmp_path)
+
+    assert ajeno.exists()
+    assert not any(viejo.exists() for viejo in viejos)
@@ -0,0 +1,31 @@
+"""
+[user-013] Detalle en lote: orden pedido, faltantes y validación de ids.
+"""
+
+from __future__ import annotations
+
+import pytest
+
+
+def test_orden_y_faltantes(client):
+    r = client.get("/api/inmuebles/batch", params={"ids": "3,999999,1,3"})
+    assert r.status_code == 200
+    body = r.json()
+    assert [i["id"] for i in body["items"]] == [3, 1]
+    assert body["missing"] == [999999]
+
+
+@pytest.mark.parametrize("ids", ["99999999999999999999", "0", "-5", "1,9223372036854775808", "1,x"])
+def test_ids_invalidos_dan_400(client, ids):
+    assert client.get("/api/inmuebles/batch", params={"ids": ids}).status_code == 400
+
+
+def test_post_ids_fuera_de_rango_da_400(client):
+    r = client.post("/api/inmuebles/batch", json={"ids": [1, 10**20]})
+    assert r.status_code == 400
+
+
+def test_borde_int64(client):
+    r = client.get("/api/inmuebles/batch", params={"ids": str(2**63 - 1)})
+    assert r.status_code == 200
+    assert r.json()["missing"] == [2**63 - 1]
@@ -0,0 +1,71 @@
+"""
+[user-005] El catálogo en memoria (CATALOGO_MEMORIA) devuelve exactamente
+lo mismo que la ruta SQL: páginas, cursores y X-Total-Count, para cada
+orden de ORDENES (asc / desc) con los filtros comunes.
+"""
+
+from __future__ import annotations
+
+from typing import List, Tuple
+
+import pytest
+
+from routes import inmuebles
+from services import catalogo
+
+pytestmark = pytest.mark.skipif(catalogo.np is None, reason="requiere numpy")
+
+# "relevancia" requiere q, y q nunca va por el catálogo en memoria
+ORDENES = [o for k in inmuebles.ORDENES if k != "relevancia" for o in (k, f"-{k}")]
+
+FILTROS = [
+    {},
+    {"tipo": "casa"},
+    {"tipo": "inexistente"},
+    {"zona": "Laureles"},
+    {"zona": "Zona que no existe"},
+    {"precio_min": 2_000_000},
+    {"precio_max": 3_000_000},
+    {"habitaciones_min": 3},
+    {"bbox": "-75.7,6.1,-75.5,6.3"},
+    {"lat": 6.2, "lng": -75.6, "radio_m": 3_000},
+    {"tipo": "apartamento", "precio_min": 1_800_000, "precio_max": 4_000_000, "habitaciones_min": 2},
+]
+
+# Página chica: recorre muchas páginas y empates (area_m2 se repite)
+LIMIT = 13
+
+
+def _recorrer(client, params: dict) -> List[Tuple[List[int], str, str]]:
+    """
+    Todas las páginas: [(ids, X-Next-Cursor, X-Total-Count)].
+    """
+    paginas, cursor = [], None
+    while True:
+        r = client.get("/api/inmuebles", params={**params, "limit": LIMIT, **({"cursor": cursor} if cursor else {})})
+        assert r.status_code == 200, r.text
+        cursor = r.headers.get("X-Next-Cursor")
+        paginas.append(([i["id"] for i in r.json()], cursor, r.headers["X-Total-Count"]))
+        if not cursor:
+            return paginas
+
+
+@pytest.mark.parametrize("filtros", FILTROS, ids=lambda f: "&".join(f"{k}={v}" for k, v in f.items()) or "sin-filtros")
+@pytest.mark.parametrize("orden", ORDENES)
+def test_memoria_igual_a_sql(client, monkeypatch, orden, filtros):
+    params = {**filtros, "orden": orden}
+    consultar = catalogo.consultar
+
+    monkeypatch.setattr(catalogo, "CATALOGO_MEMORIA", False)
+    sql = _recorrer(client, params)
+
+    monkeypatch.setattr(catalogo, "CATALOGO_MEMORIA", True)
+    llamadas = []
+    monkeypatch.setattr(catalogo, "consultar", lambda *a: llamadas.append(a) or consultar(*a))
+    memoria = _recorrer(client, params)
+    assert len(llamadas) == len(memoria)
+
+    assert memoria == sql
+    # El recorrido completo cubre el total, sin repetidos
+    ids = [i for pagina, _, _ in sql for i in pagina]
+    assert len(ids) == len(set(ids)) == int(sql[0][2])
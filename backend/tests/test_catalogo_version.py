@@ -0,0 +1,64 @@
+"""
+[user-006] Escrituras hechas fuera de la app (otro proceso, SQL a mano)
+invalidan los caches: catalogo_version lo suben triggers en la BD.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+
+import pytest
+
+from db import database
+
+pytestmark = pytest.mark.skipif(not database.IS_SQLITE, reason="escritura externa con sqlite3")
+
+
+def _externo(sql: str) -> None:
+    conn = sqlite3.connect(database.engine.url.database)
+    try:
+        conn.execute(sql)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def test_update_externo_invalida_detalle_listado_y_conteo(client, monkeypatch):
+    monkeypatch.setattr(database, "CATALOG_VERSION_TTL", 0)
+    # Calentar caches (payload, conteo)
+    assert client.get("/api/inmuebles/3").status_code == 200
+    total = int(client.get("/api/inmuebles?limit=5").headers["X-Total-Count"])
+    version = database.catalog_version()
+
+    _externo("UPDATE inmueble SET publicado = 0 WHERE id = 3")
+    try:
+        assert client.get("/api/inmuebles/3").status_code == 404
+        r = client.get("/api/inmuebles?limit=5")
+        assert int(r.headers["X-Total-Count"]) == total - 1
+        assert database.catalog_version() > version
+    finally:
+        _externo("UPDATE inmueble SET publicado = 1 WHERE id = 3")
+
+    assert client.get("/api/inmuebles/3").status_code == 200
+
+
+def test_commit_propio_invalida_solo_lo_tocado(client, monkeypatch):
+    from sqlmodel import Session
+
+    from models.inmueble import Inmueble
+    from services.json_cache import payload_cache
+
+    monkeypatch.setattr(database, "CATALOG_VERSION_TTL", 0)
+    client.get("/api/inmuebles/1")
+    client.get("/api/inmuebles/2")
+    database.refrescar_catalog_version(forzar=True)
+
+    with Session(database.engine) as session:
+        i = session.get(Inmueble, 1)
+        i.titulo = i.titulo + " (editado)"
+        session.add(i)
+        session.commit()
+
+    assert payload_cache.get(1) is None
+    assert payload_cache.get(2) is not None
+    assert client.get("/api/inmuebles/1").json()["titulo"].endswith("(editado)")
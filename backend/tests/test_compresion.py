@@ -0,0 +1,92 @@
+"""
+[user-019] Compresión: Vary: Accept-Encoding en toda respuesta de tipo
+comprimible (también sin comprimir) y precomprimir() sin carreras entre
+workers (temporales propios).
+"""
+
+from __future__ import annotations
+
+import gzip
+import threading
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, Response
+from fastapi.testclient import TestClient
+
+from services import compresion
+from services.compresion import CompresionMiddleware, precomprimir
+
+GRANDE = {"x": "a" * 4000}
+CHICO = {"x": 1}
+
+
+@pytest.fixture(scope="module")
+def cliente():
+    app = FastAPI()
+    app.add_middleware(CompresionMiddleware, minimo=1024)
+
+    @app.get("/grande")
+    def grande():
+        return JSONResponse(GRANDE)
+
+    @app.get("/chico")
+    def chico():
+        return JSONResponse(CHICO)
+
+    @app.get("/png")
+    def png():
+        return Response(b"\x89PNG" + b"0" * 4000, media_type="image/png")
+
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("path, accept", [
+    ("/grande", "identity"),
+    ("/grande", ""),
+    ("/chico", "gzip, br"),
+    ("/chico", "identity"),
+])
+def test_vary_sin_comprimir(cliente, path, accept):
+    r = cliente.get(path, headers={"Accept-Encoding": accept})
+    assert "content-encoding" not in r.headers
+    assert r.headers["vary"] == "Accept-Encoding"
+
+
+def test_vary_comprimida(cliente):
+    r = cliente.get("/grande", headers={"Accept-Encoding": "gzip"})
+    assert r.headers["content-encoding"] == "gzip"
+    assert r.headers["vary"] == "Accept-Encoding"
+    assert r.json() == GRANDE
+
+
+@pytest.mark.parametrize("accept", ["gzip", "identity"])
+def test_no_comprimible_sin_vary(cliente, accept):
+    r = cliente.get("/png", headers={"Accept-Encoding": accept})
+    assert "content-encoding" not in r.headers
+    assert "vary" not in r.headers
+
+
+def test_precomprimir_concurrente(tmp_path):
+    data = b"body { color: red; }\n" * 500
+    for n in range(20):
+        (tmp_path / f"{n}.css").write_bytes(data)
+
+    errores = []
+
+    def worker():
+        try:
+            precomprimir(tmp_path)
+        except Exception as e:  # noqa: BLE001
+            errores.append(e)
+
+    hilos = [threading.Thread(target=worker) for _ in range(8)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+
+    assert errores == []
+    assert not list(tmp_path.glob(f"*{compresion.SUFIJO_TMP}"))
+    for n in range(20):
+        assert gzip.decompress((tmp_path / f"{n}.css.gz").read_bytes()) == data
@@ -0,0 +1,103 @@
+"""
+[user-018] inmueble.imagenes → inmueble_imagen lo sincronizan triggers
+en la BD: un INSERT / UPDATE / DELETE por SQL a mano (sin el ORM) deja
+las filas ordenadas igual que urls_imagenes y conserva width / height
+de las URLs que siguen.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from typing import List, Tuple
+
+import pytest
+from sqlmodel import Session
+
+from db import database
+from models.inmueble import Inmueble, urls_imagenes
+
+pytestmark = pytest.mark.skipif(not database.IS_SQLITE, reason="escritura externa con sqlite3")
+
+
+def _externo(sql: str, params: tuple = ()) -> int:
+    conn = sqlite3.connect(database.engine.url.database)
+    try:
+        cur = conn.execute(sql, params)
+        conn.commit()
+        return cur.lastrowid
+    finally:
+        conn.close()
+
+
+def _filas(inmueble_id: int) -> List[Tuple[int, str, object, object]]:
+    conn = sqlite3.connect(database.engine.url.database)
+    try:
+        return conn.execute(
+            "SELECT position, url, width, height FROM inmueble_imagen"
+            " WHERE inmueble_id = ? ORDER BY position",
+            (inmueble_id,),
+        ).fetchall()
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def restaurar():
+    """
+    Devuelve inmueble.imagenes de los ids 4-6 a como estaban.
+    """
+    conn = sqlite3.connect(database.engine.url.database)
+    try:
+        antes = conn.execute("SELECT id, imagenes FROM inmueble WHERE id IN (4, 5, 6)").fetchall()
+    finally:
+        conn.close()
+    yield
+    for iid, imagenes in antes:
+        _externo("UPDATE inmueble SET imagenes = ? WHERE id = ?", (imagenes, iid))
+
+
+@pytest.mark.parametrize("imagenes", [
+    "a.jpg,b.jpg",
+    " a.jpg , ,\tb.jpg\n,",
+    'https://x.co/"q".jpg,https://x.co/a\\b.jpg?w=1&h=2,ñandú.jpg',
+    "",
+])
+def test_update_externo_reescribe_filas(client, restaurar, imagenes):
+    _externo("UPDATE inmueble SET imagenes = ? WHERE id = 4", (imagenes,))
+    assert [url for _, url, _, _ in _filas(4)] == urls_imagenes(imagenes)
+    assert [p for p, _, _, _ in _filas(4)] == list(range(len(urls_imagenes(imagenes))))
+
+
+def test_update_externo_conserva_medidas_y_se_ve_en_detalle(client, restaurar, monkeypatch):
+    monkeypatch.setattr(database, "CATALOG_VERSION_TTL", 0)
+    _externo("UPDATE inmueble SET imagenes = 'a.jpg,b.jpg' WHERE id = 5")
+    _externo("UPDATE inmueble_imagen SET width = 800, height = 600 WHERE inmueble_id = 5 AND url = 'b.jpg'")
+    assert client.get("/api/inmuebles/5").json()["imagenes"] == ["a.jpg", "b.jpg"]
+
+    _externo("UPDATE inmueble SET imagenes = 'b.jpg,c.jpg' WHERE id = 5")
+    assert _filas(5) == [(0, "b.jpg", 800, 600), (1, "c.jpg", None, None)]
+    assert client.get("/api/inmuebles/5").json()["imagenes"] == ["b.jpg", "c.jpg"]
+
+
+def test_insert_y_delete_externos(client):
+    iid = _externo(
+        """
+        INSERT INTO inmueble (titulo, tipo, precio_cop, area_m2, habitaciones, banos,
+            descripcion, imagenes, direccion_referencia, contacto_whatsapp, publicado, zona_id)
+        VALUES ('Externo', 'casa', 2000000, 60, 2, 1, 'SQL a mano', 'p.jpg, q.jpg',
+            'Ref', 'Hola', 1, 1)
+        """
+    )
+    assert _filas(iid) == [(0, "p.jpg", None, None), (1, "q.jpg", None, None)]
+
+    _externo("DELETE FROM inmueble WHERE id = ?", (iid,))
+    assert _filas(iid) == []
+
+
+def test_escritura_por_orm(client, restaurar):
+    with Session(database.engine) as session:
+        i = session.get(Inmueble, 6)
+        i.imagenes = "x.jpg, y.jpg"
+        session.add(i)
+        session.commit()
+    assert [url for _, url, _, _ in _filas(6)] == ["x.jpg", "y.jpg"]
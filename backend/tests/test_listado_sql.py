@@ -0,0 +1,42 @@
+"""
+[user-001] El listado arma la página con un número fijo de statements:
+sin N+1 por inmueble (zona, imágenes), igual para 5 que para 100 filas.
+"""
+
+from __future__ import annotations
+
+import pytest
+
+from routes import inmuebles
+from services.json_cache import payload_cache
+
+
+def _statements(client, contar_sql, path: str) -> int:
+    # Frío: sin payloads ni conteos en memoria
+    payload_cache.clear()
+    inmuebles._COUNT_CACHE.clear()
+    contar_sql.reset()
+    r = client.get(path)
+    assert r.status_code == 200
+    return len(contar_sql)
+
+
+@pytest.mark.parametrize("filtros", ["", "&tipo=apartamento", "&zona=Laureles&habitaciones_min=2"])
+def test_statements_no_dependen_del_tamano_de_pagina(client, contar_sql, filtros):
+    n5 = _statements(client, contar_sql, f"/api/inmuebles?limit=5{filtros}")
+    n100 = _statements(client, contar_sql, f"/api/inmuebles?limit=100{filtros}")
+    assert n5 == n100, contar_sql.statements
+
+
+def test_pagina_de_100_trae_100(client):
+    r = client.get("/api/inmuebles?limit=100")
+    assert len(r.json()) == 100
+    assert all(i["zona"] and i["imagenes"] for i in r.json())
+
+
+def test_detalle_cacheado_no_consulta(client, contar_sql):
+    client.get("/api/inmuebles/1")
+    contar_sql.reset()
+    r = client.get("/api/inmuebles/1")
+    assert r.status_code == 200
+    assert len(contar_sql) == 0, contar_sql.statements
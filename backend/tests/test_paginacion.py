@@ -0,0 +1,49 @@
+"""
+[user-002] Paginación por cursor: cursores forjados dan 400 (nunca 500)
+y el listado con bootstrap lleva total y cursor de la página siguiente.
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+
+import pytest
+
+
+def _cursor(*partes) -> str:
+    raw = json.dumps(list(partes)).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+@pytest.mark.parametrize(
+    "orden, cursor",
+    [
+        ("id", _cursor("id", 1, 10**30)),
+        ("id", _cursor("id", 10**30, 1)),
+        ("precio_cop", _cursor("precio_cop", -(10**19), 5)),
+        ("-area_m2", _cursor("-area_m2", 50, -(2**63) - 1)),
+        ("precio_cop", _cursor("precio_cop", "barato", 5)),
+        ("id", "no-es-base64!"),
+    ],
+)
+def test_cursor_forjado_da_400(client, orden, cursor):
+    r = client.get("/api/inmuebles", params={"orden": orden, "cursor": cursor})
+    assert r.status_code == 400, r.text
+
+
+def test_cursor_en_el_borde_de_int64(client):
+    r = client.get("/api/inmuebles", params={"cursor": _cursor("id", 2**63 - 1, 2**63 - 1)})
+    assert r.status_code == 200
+    assert r.json() == []
+
+
+def test_bootstrap_listado_lleva_total_y_cursor(client):
+    r = client.get("/api/inmuebles", params={"limit": 100})
+    total = int(r.headers["X-Total-Count"])
+    assert total > 100
+
+    html = client.get("/listado").text
+    bloque = html.split('<script id="bootstrap" type="application/json">', 1)[1].split("</script>", 1)[0]
+    pagina = json.loads(bloque)["/api/inmuebles?limit=100#pagina"]
+    assert pagina == {"total": total, "next": r.headers["X-Next-Cursor"]}
@@ -0,0 +1,107 @@
+"""
+[user-004] Planes de consulta del listado (EXPLAIN QUERY PLAN, SQLite).
+
+Ninguna combinación de filtros lee la tabla inmueble completa ("SCAN
+inmueble" sin índice). Por combinación se fija qué índices son
+aceptables para la página de ids y para el conteo:
+
+- Sin filtros / solo habitaciones_min: la página recorre
+  ix_inmueble_pub_id (parcial: solo publicados, en orden de id; corta
+  en LIMIT). habitaciones no tiene índice propio: es poco selectivo.
+- Conteos sin filtro indexable: recorren entero cualquier índice
+  parcial de publicados. Cuestan lo mismo y SQLite desempata por orden
+  de creación (create_all los crea en orden de un set: varía con
+  PYTHONHASHSEED), así que se acepta cualquiera de ellos.
+- precio_min / precio_max: la página puede ir por id (orden + LIMIT) o
+  por ix_inmueble_pub_precio; el conteo, por ix_inmueble_pub_precio.
+"""
+
+from __future__ import annotations
+
+import re
+
+import pytest
+
+from db import database
+from routes import inmuebles
+from services.json_cache import payload_cache
+
+pytestmark = pytest.mark.skipif(not database.IS_SQLITE, reason="EXPLAIN QUERY PLAN de SQLite")
+
+PUB_ID = "ix_inmueble_pub_id"
+PUB_PRECIO = "ix_inmueble_pub_precio"
+PUB_AREA = "ix_inmueble_pub_area"
+TIPO_PRECIO = "ix_inmueble_pub_tipo_precio"
+ZONA = "ix_inmueble_zona_tipo_precio"
+FTS = "inmueble_fts"
+# Índices parciales (WHERE publicado = 1)
+PUBLICADOS = {PUB_ID, PUB_PRECIO, PUB_AREA, TIPO_PRECIO}
+
+# filtros → (índices aceptables para la página, para el conteo)
+PLANES = {
+    "": ({PUB_ID}, PUBLICADOS),
+    "habitaciones_min=2": ({PUB_ID}, PUBLICADOS),
+    "tipo=casa": ({TIPO_PRECIO}, {TIPO_PRECIO}),
+    "zona=Laureles": ({ZONA}, {ZONA}),
+    "precio_min=2000000": ({PUB_ID, PUB_PRECIO}, {PUB_PRECIO}),
+    "precio_max=2500000": ({PUB_ID, PUB_PRECIO}, {PUB_PRECIO}),
+    "tipo=apartamento&precio_max=3000000": ({TIPO_PRECIO}, {TIPO_PRECIO}),
+    "zona=Laureles&tipo=casa": ({TIPO_PRECIO, ZONA}, {TIPO_PRECIO, ZONA}),
+    "zona=Laureles&tipo=casa&precio_max=3000000": ({TIPO_PRECIO, ZONA}, {TIPO_PRECIO, ZONA}),
+    "tipo=casa&habitaciones_min=2": ({TIPO_PRECIO}, {TIPO_PRECIO}),
+    "orden=precio_cop": ({PUB_PRECIO}, PUBLICADOS),
+    "orden=-area_m2": ({PUB_AREA}, PUBLICADOS),
+    "tipo=casa&orden=precio_cop": ({TIPO_PRECIO}, {TIPO_PRECIO}),
+    "q=laureles": ({FTS}, {FTS}),
+    "bbox=-75.7,6.1,-75.5,6.3": ({ZONA}, {ZONA}),
+}
+
+# "SCAN inmueble" / "SEARCH inmueble USING ..." (no inmueble_fts / inmueble_imagen)
+_ACCESO_INMUEBLE = re.compile(r"^(SCAN|SEARCH) inmueble\b(?!_)")
+_INDICE = re.compile(r"USING (?:COVERING )?INDEX (\w+)")
+
+
+def _plan(sql: str, parametros) -> list:
+    conn = database.engine.raw_connection()
+    try:
+        return [fila[3] for fila in conn.execute("EXPLAIN QUERY PLAN " + sql, parametros).fetchall()]
+    finally:
+        conn.close()
+
+
+def _indices(plan: list) -> set:
+    out = set()
+    for linea in plan:
+        if linea.startswith("SCAN inmueble_fts"):
+            out.add(FTS)
+        elif _ACCESO_INMUEBLE.match(linea):
+            m = _INDICE.search(linea)
+            if m:
+                out.add(m.group(1))
+    return out
+
+
+@pytest.mark.parametrize("filtros", list(PLANES))
+def test_listado_usa_indices(client, contar_sql, filtros):
+    payload_cache.clear()
+    inmuebles._COUNT_CACHE.clear()
+    contar_sql.reset()
+    assert client.get(f"/api/inmuebles?limit=5&{filtros}").status_code == 200
+
+    pagina = conteo = None
+    for sql, parametros in zip(contar_sql.statements, contar_sql.parametros):
+        if not re.search(r"\bFROM inmueble\b(?!_)", sql):
+            continue
+        plan = _plan(sql, parametros)
+        for linea in plan:
+            if _ACCESO_INMUEBLE.match(linea):
+                assert "USING" in linea, f"{filtros!r}: lectura completa de inmueble: {plan}\n{sql}"
+        if "count(" in sql:
+            conteo = plan
+        elif pagina is None:
+            pagina = plan
+
+    esperado_pagina, esperado_conteo = PLANES[filtros]
+    assert pagina is not None and conteo is not None
+    assert _indices(pagina) and _indices(pagina) <= esperado_pagina, pagina
+    assert _indices(conteo) and _indices(conteo) <= esperado_conteo, conteo
@@ -0,0 +1,138 @@
+"""
+[user-015] Soak: muchos requests concurrentes no abren conexiones sin
+límite. Las conexiones en uso nunca pasan de pool_size + max_overflow
+y todas vuelven al pool al terminar (sin fugas).
+
+- test_conexiones_acotadas_bajo_concurrencia: un lote de CONCURRENTES.
+- test_soak_sostenido (slow): SOAK_REQUESTS requests (100.000 por
+  defecto) en lotes de SOAK_LOTE concurrentes, un export cada
+  SOAK_EXPORT_CADA; tras cada lote el pool vuelve a 0 y el máximo
+  sigue dentro del límite.
+  Correr con: pytest -m slow  (SOAK_REQUESTS=... para acortarlo)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+
+import httpx
+import pytest
+from sqlalchemy import event
+
+import main
+from db import database
+from services.json_cache import payload_cache
+
+CONCURRENTES = 300
+SOAK_REQUESTS = int(os.getenv("SOAK_REQUESTS", "100000"))
+SOAK_LOTE = int(os.getenv("SOAK_LOTE", "500"))
+# Un export (~50 ms de stream cada uno, máx EXPORT_CONCURRENCIA a la vez)
+# cada tantos requests: con 1 de cada 4, 100.000 requests tardan horas
+SOAK_EXPORT_CADA = int(os.getenv("SOAK_EXPORT_CADA", "40"))
+
+
+class Uso:
+    def __init__(self) -> None:
+        self.en_uso = 0
+        self.maximo = 0
+
+    def checkout(self, *args) -> None:
+        self.en_uso += 1
+        self.maximo = max(self.maximo, self.en_uso)
+
+    def checkin(self, *args) -> None:
+        self.en_uso -= 1
+
+
+def _engines():
+    engines = {id(e): e for e in (database.engine, database.read_engine)}
+    if database.async_engine is not None:
+        engines[id(database.async_engine)] = database.async_engine.sync_engine
+    return list(engines.values())
+
+
+def _paths(n: int, inicio: int = 0, export_cada: int = 4):
+    """
+    Detalle / listado / facetas, y un export (stream largo, con tope de
+    concurrencia) cada export_cada requests.
+    """
+    rnd = random.Random(15 + inicio)
+    for k in range(inicio, inicio + n):
+        if k % export_cada == export_cada - 1:
+            yield "/api/inmuebles/export?formato=ndjson"
+            continue
+        tipo = k % 3
+        if tipo == 0:
+            yield f"/api/inmuebles/{rnd.randint(1, 150)}"
+        elif tipo == 1:
+            yield f"/api/inmuebles?limit=20&precio_max={rnd.randint(20, 60) * 100_000}"
+        else:
+            yield f"/api/inmuebles/facets?habitaciones_min={rnd.randint(1, 4)}&precio_min={k}"
+
+
+sin_pool = pytest.mark.skipif(database._sqlite_en_memoria(database.DATABASE_URL), reason="sin pool")
+
+
+@pytest.fixture
+def usos():
+    """
+    Uso por engine (checkout / checkin) mientras dura el test.
+    """
+    out = {}
+    for e in _engines():
+        uso = out[id(e)] = Uso()
+        event.listen(e, "checkout", uso.checkout)
+        event.listen(e, "checkin", uso.checkin)
+    yield out
+    for e in _engines():
+        event.remove(e, "checkout", out[id(e)].checkout)
+        event.remove(e, "checkin", out[id(e)].checkin)
+
+
+def _verificar_pool(usos) -> None:
+    limite = database.DB_POOL_SIZE + database.DB_MAX_OVERFLOW
+    for e in _engines():
+        uso = usos[id(e)]
+        assert uso.maximo <= limite, (e.url, uso.maximo, limite)
+        # Sin fugas: todo lo que salió del pool volvió
+        assert uso.en_uso == 0, (e.url, uso.en_uso)
+        assert e.pool.checkedout() == 0, e.pool.status()
+
+
+async def _lote(c: httpx.AsyncClient, n: int, inicio: int = 0, export_cada: int = 4) -> None:
+    respuestas = await asyncio.gather(*(c.get(p) for p in _paths(n, inicio, export_cada)))
+    assert all(r.status_code == 200 for r in respuestas), {r.status_code for r in respuestas}
+
+
+def _cliente() -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test")
+
+
+@sin_pool
+def test_conexiones_acotadas_bajo_concurrencia(client, usos):
+    async def soak():
+        async with _cliente() as c:
+            await _lote(c, CONCURRENTES)
+
+    payload_cache.clear()
+    asyncio.run(soak())
+
+    _verificar_pool(usos)
+    assert max(u.maximo for u in usos.values()) > 1  # hubo concurrencia real
+
+
+@pytest.mark.slow
+@sin_pool
+def test_soak_sostenido(client, usos):
+    async def soak():
+        async with _cliente() as c:
+            for inicio in range(0, SOAK_REQUESTS, SOAK_LOTE):
+                # Sin cache de payloads de vez en cuando: vuelve a la BD
+                if inicio % (SOAK_LOTE * 20) == 0:
+                    payload_cache.clear()
+                await _lote(c, min(SOAK_LOTE, SOAK_REQUESTS - inicio), inicio, SOAK_EXPORT_CADA)
+                _verificar_pool(usos)
+
+    asyncio.run(soak())
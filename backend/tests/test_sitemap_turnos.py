@@ -0,0 +1,69 @@
+"""
+[user-025] /sitemaps/sitemap-inmuebles.xml: cada stream retiene una
+conexión de read_engine mientras dura; con muchos crawlers a la vez no
+se usan más de SITEMAP_CONCURRENCIA conexiones y todos reciben el
+sitemap completo.
+"""
+
+from __future__ import annotations
+
+import asyncio
+
+import anyio
+import httpx
+import pytest
+from sqlalchemy import event
+
+import main
+from db import database
+from routes import sitemap_inmuebles
+
+CLIENTES = 12
+TURNOS = 2
+
+
+class Uso:
+    def __init__(self) -> None:
+        self.en_uso = 0
+        self.maximo = 0
+
+    def checkout(self, *args) -> None:
+        self.en_uso += 1
+        self.maximo = max(self.maximo, self.en_uso)
+
+    def checkin(self, *args) -> None:
+        self.en_uso -= 1
+
+
+@pytest.mark.skipif(database._sqlite_en_memoria(database.DATABASE_URL), reason="sin pool")
+def test_sitemaps_concurrentes_acotados(client, monkeypatch):
+    # Lotes chicos: muchos bloques por stream, los requests se solapan
+    monkeypatch.setattr(sitemap_inmuebles, "SITEMAP_YIELD_PER", 10)
+    monkeypatch.setattr(sitemap_inmuebles, "_sitemap_turnos", anyio.Semaphore(TURNOS))
+
+    uso = Uso()
+    event.listen(database.read_engine, "checkout", uso.checkout)
+    event.listen(database.read_engine, "checkin", uso.checkin)
+
+    async def crawlers():
+        transporte = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transporte, base_url="http://test") as c:
+            return await asyncio.gather(
+                *(c.get("/sitemaps/sitemap-inmuebles.xml") for _ in range(CLIENTES))
+            )
+
+    try:
+        respuestas = asyncio.run(crawlers())
+    finally:
+        event.remove(database.read_engine, "checkout", uso.checkout)
+        event.remove(database.read_engine, "checkin", uso.checkin)
+
+    assert all(r.status_code == 200 for r in respuestas)
+    cuerpos = {r.content for r in respuestas}
+    assert len(cuerpos) == 1
+    cuerpo = cuerpos.pop()
+    assert cuerpo.endswith(sitemap_inmuebles.SITEMAP_FIN)
+    assert cuerpo.count(b"<url>") > sitemap_inmuebles.SITEMAP_YIELD_PER
+
+    assert 1 <= uso.maximo <= TURNOS
+    assert uso.en_uso == 0
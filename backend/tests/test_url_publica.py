@@ -0,0 +1,52 @@
+"""
+[user-017] /inmueble/{id}-{slug} se resuelve por url_publica
+(ux_inmueble_url_publica); un slug que no es el canónico da 301.
+"""
+
+from __future__ import annotations
+
+import pytest
+
+from db import database
+
+
+def _url_publica(client, inmueble_id: int) -> str:
+    return client.get(f"/api/inmuebles/{inmueble_id}").json()["url_publica"]
+
+
+@pytest.mark.skipif(not database.IS_SQLITE, reason="EXPLAIN QUERY PLAN de SQLite")
+def test_ruta_canonica_por_indice_url_publica(client, contar_sql):
+    url = _url_publica(client, 3)
+    contar_sql.reset()
+
+    r = client.get(url)
+    assert r.status_code == 200
+    assert '"/api/inmuebles/3"' in r.text
+
+    k = next(n for n, s in enumerate(contar_sql.statements) if "url_publica =" in s)
+    conn = database.engine.raw_connection()
+    try:
+        plan = conn.execute(
+            "EXPLAIN QUERY PLAN " + contar_sql.statements[k], contar_sql.parametros[k]
+        ).fetchall()
+    finally:
+        conn.close()
+    assert any("INDEX ux_inmueble_url_publica" in fila[3] for fila in plan), plan
+
+
+def test_slug_no_canonico_redirige_301(client):
+    url = _url_publica(client, 3)
+    r = client.get("/inmueble/3-slug-viejo", params={"prerender": "1"}, follow_redirects=False)
+    assert r.status_code == 301
+    assert r.headers["location"] == f"{url}?prerender=1"
+
+    # La canónica no redirige
+    assert client.get(url, follow_redirects=False).status_code == 200
+
+
+def test_inexistente_o_sin_id(client):
+    assert client.get("/inmueble/999999-casa-en-ninguna", params={"prerender": "1"}).status_code == 404
+    # Shell sin bootstrap: el JS resuelve el "no encontrado"
+    r = client.get("/inmueble/sin-id", follow_redirects=False)
+    assert r.status_code == 200
+    assert 'id="bootstrap"' not in r.text
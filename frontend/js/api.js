@@ -0,0 +1,44 @@
+// ===============================
+// API (compartido por todas las páginas: cargar antes que el resto)
+// ===============================
+const API_BASE = "http://127.0.0.1:8000";
+
+// Payload inicial embebido por el servidor (<script id="bootstrap">):
+// llave = path de la API, evita el primer round-trip
+function bootstrapGet(path) {
+  const el = document.getElementById("bootstrap");
+  if (!el) return undefined;
+  try {
+    return JSON.parse(el.textContent)[path];
+  } catch (e) {
+    return undefined;
+  }
+}
+
+async function apiGet(path) {
+  const inicial = bootstrapGet(path);
+  if (inicial !== undefined) return inicial;
+
+  const res = await fetch(`${API_BASE}${path}`);
+  if (!res.ok) throw new Error(`API error ${res.status}`);
+  return res.json();
+}
+
+// Página del listado: { items, total, next }. total / next salen de
+// X-Total-Count / X-Next-Cursor (o de "{path}#pagina" en el bootstrap)
+async function apiGetPagina(path) {
+  const items = bootstrapGet(path);
+  const meta = bootstrapGet(`${path}#pagina`);
+  if (items !== undefined && meta !== undefined) {
+    return { items, total: meta.total, next: meta.next };
+  }
+
+  const res = await fetch(`${API_BASE}${path}`);
+  if (!res.ok) throw new Error(`API error ${res.status}`);
+  const total = res.headers.get("X-Total-Count");
+  return {
+    items: await res.json(),
+    total: total === null ? null : Number(total),
+    next: res.headers.get("X-Next-Cursor"),
+  };
+}
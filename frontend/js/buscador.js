@@ -1,8 +1,3 @@
-// ===============================
-// CONFIG
-// ===============================
-const API_BASE = "http://127.0.0.1:8000";
-
 // ===============================
 // HELPERS
 // ===============================
@@ -15,12 +10,6 @@ function formatCOP(value) {
   });
 }
 
-async function apiGet(path) {
-  const res = await fetch(`${API_BASE}${path}`);
-  if (!res.ok) throw new Error(`API error ${res.status}`);
-  return res.json();
-}
-
 function getQueryParams() {
   const p = new URLSearchParams(window.location.search);
   const obj = {};
@@ -50,7 +39,7 @@ function inmuebleCard(i) {
           <a class="btn" href="./inmueble.html?id=${i.id}">Ver detalle</a>
           ${
             i.zona
-              ? `<a class="btn secondary" href="./listado.html?zona=${encodeURIComponent(i.zona.nombre)}">Más en la zona</a>`
+              ? `<a class="btn secondary" href="/listado?zona=${encodeURIComponent(i.zona.nombre)}">Más en la zona</a>`
               : ""
           }
         </div>
@@ -87,8 +76,8 @@ async function loadDestacados() {
   if (!cont) return;
 
   try {
-    const data = await apiGet("/api/inmuebles");
-    cont.innerHTML = data.slice(0, 6).map(inmuebleCard).join("");
+    const data = await apiGet("/api/inmuebles?limit=6");
+    cont.innerHTML = data.map(inmuebleCard).join("");
   } catch (e) {
     cont.innerHTML = `
       <div style="color:var(--muted);">
@@ -104,36 +93,48 @@ async function loadDestacados() {
 async function loadListado() {
   const cards = document.getElementById("cards");
   const resumen = document.getElementById("resumen");
+  const cargarMas = document.getElementById("cargar-mas");
   if (!cards || !resumen) return;
 
   const q = getQueryParams();
 
   try {
-    let data = await apiGet("/api/inmuebles");
+    // FILTROS EN EL BACKEND (el API pagina, no trae todo)
+    const params = new URLSearchParams({ limit: "100" });
+    if (q.zona) params.set("zona", q.zona);
+    if (q.tipo) params.set("tipo", q.tipo);
+    if (q.precio) params.set("precio_max", q.precio);
+    if (q.hab) params.set("habitaciones_min", q.hab);
 
-    // FILTROS FRONTEND
-    if (q.zona) {
-      data = data.filter(i => i.zona?.nombre === q.zona);
-    }
+    const pagina = await apiGetPagina(`/api/inmuebles?${params}`);
 
-    if (q.tipo) {
-      data = data.filter(i => i.tipo === q.tipo);
-    }
+    // Total de la búsqueda (X-Total-Count), no solo lo de esta página
+    resumen.textContent = `${pagina.total ?? pagina.items.length} resultado(s)`;
 
-    if (q.precio) {
-      data = data.filter(i => i.precio_cop <= Number(q.precio));
-    }
+    cards.innerHTML = pagina.items.length
+      ? pagina.items.map(inmuebleCard).join("")
+      : `<div style="color:var(--muted);">No hay resultados con esos filtros.</div>`;
 
-    if (q.hab) {
-      data = data.filter(i => i.habitaciones >= Number(q.hab));
+    // "Cargar más": sigue X-Next-Cursor hasta agotar la búsqueda
+    let next = pagina.next;
+    if (cargarMas) {
+      cargarMas.hidden = !next;
+      cargarMas.onclick = async () => {
+        cargarMas.disabled = true;
+        try {
+          params.set("cursor", next);
+          const siguiente = await apiGetPagina(`/api/inmuebles?${params}`);
+          cards.insertAdjacentHTML("beforeend", siguiente.items.map(inmuebleCard).join(""));
+          next = siguiente.next;
+          cargarMas.hidden = !next;
+        } catch (e) {
+          console.warn("No se pudo cargar la página siguiente:", e);
+        } finally {
+          cargarMas.disabled = false;
+        }
+      };
     }
 
-    resumen.textContent = `${data.length} resultado(s)`;
-
-    cards.innerHTML = data.length
-      ? data.map(inmuebleCard).join("")
-      : `<div style="color:var(--muted);">No hay resultados con esos filtros.</div>`;
-
   } catch (e) {
     cards.innerHTML = `
       <div style="color:var(--muted);">
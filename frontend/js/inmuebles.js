@@ -1,5 +1,3 @@
-const API_BASE = "http://127.0.0.1:8000";
-
 /* ======================================================
    UTILIDADES GENERALES
 ====================================================== */
@@ -12,12 +10,6 @@ function formatCOP(value) {
   });
 }
 
-async function apiGet(path) {
-  const res = await fetch(`${API_BASE}${path}`);
-  if (!res.ok) throw new Error(`Error API ${res.status}`);
-  return res.json();
-}
-
 function safeText(s) {
   return String(s || "").replace(/\s+/g, " ").trim();
 }
@@ -1,5 +1,3 @@
-const API_BASE = "http://127.0.0.1:8000";
-
 let mapInstance = null;
 let markersLayer = null;
 
@@ -15,12 +13,6 @@ function getInmuebleIdFromUrl() {
   return /^\d+$/.test(id) ? id : null;
 }
 
-async function apiGet(path) {
-  const res = await fetch(`${API_BASE}${path}`);
-  if (!res.ok) throw new Error(`API error ${res.status}`);
-  return res.json();
-}
-
 function formatCOP(value) {
   return Number(value || 0).toLocaleString("es-CO", {
     style: "currency",
@@ -139,29 +131,67 @@ async function cargarMapaDetalle() {
    MAPA LISTADO
    ====================================================== */
 
-async function cargarMapaListado() {
-  const data = await apiGet("/api/inmuebles");
-  if (!Array.isArray(data) || !data.length) return;
+function addCluster({ lat, lng, count, precio_min, precio_max }) {
+  if (!markersLayer) return null;
+
+  const size = count < 10 ? 34 : count < 100 ? 42 : 50;
+
+  const marker = L.marker([lat, lng], {
+    icon: L.divIcon({
+      className: "mapa-cluster",
+      html: `<div style="width:${size}px;height:${size}px;line-height:${size}px;border-radius:50%;background:rgba(34,170,119,.85);color:#fff;font-weight:700;text-align:center;">${count}</div>`,
+      iconSize: [size, size],
+      iconAnchor: [size / 2, size / 2]
+    })
+  }).addTo(markersLayer);
+
+  const precio = precio_min === precio_max
+    ? formatCOP(precio_min)
+    : `${formatCOP(precio_min)} – ${formatCOP(precio_max)}`;
+
+  marker.bindPopup(`
+    <strong>${count} inmueble${count === 1 ? "" : "s"}</strong><br/>
+    <span>${precio}</span><br/>
+    <small>Ubicación aproximada</small>
+  `);
 
-  const first = data.find(x => x?.zona?.lat && x?.zona?.lng) || data[0];
+  // Clic: acercar hacia el cluster
+  marker.on("click", () => {
+    if (mapInstance && mapInstance.getZoom() < mapInstance.getMaxZoom()) {
+      mapInstance.setView([lat, lng], mapInstance.getZoom() + 2);
+    }
+  });
+
+  return marker;
+}
 
-  initMap(
-    first?.zona?.lat || 6.2442,
-    first?.zona?.lng || -75.5812,
-    12
+async function cargarClusters() {
+  if (!mapInstance) return;
+
+  const b = mapInstance.getBounds();
+  const bbox = [b.getWest(), b.getSouth(), b.getEast(), b.getNorth()]
+    .map(x => x.toFixed(5))
+    .join(",");
+
+  const data = await apiGet(
+    `/api/inmuebles/clusters?zoom=${mapInstance.getZoom()}&bbox=${bbox}`
   );
+  if (!Array.isArray(data)) return;
+
+  markersLayer.clearLayers();
+  data.forEach(addCluster);
+}
 
-  data.forEach((i) => {
-    if (!i?.zona?.lat || !i?.zona?.lng) return;
+async function cargarMapaListado() {
+  initMap(6.2442, -75.5812, 12);
+  if (!mapInstance) return;
 
-    addMarker({
-      lat: i.zona.lat,
-      lng: i.zona.lng,
-      titulo: i.titulo,
-      precio: formatCOP(i.precio_cop),
-      url: i.url_publica
-    });
+  // Clusters del servidor según zoom + viewport
+  mapInstance.on("moveend", () => {
+    cargarClusters().catch(e => console.warn("Clusters no disponibles", e));
   });
+
+  await cargarClusters();
 }
 
 /* ======================================================